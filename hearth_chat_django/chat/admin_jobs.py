@@ -0,0 +1,292 @@
+"""관리자 백그라운드 작업 (대량 삭제 등)
+
+대량 액션을 요청 안에서 바로 실행하지 않고 AdminJob 행으로 등록한 뒤 워커 스레드 풀에서 실행한다.
+
+- 작업 = 단계 목록. 각 단계는 한 번 호출에 최대 batch_size 행을 처리하는 함수 (chat/purge.py)
+- 배치마다 처리 수/현재 단계를 AdminJob에 기록하고 관리자 WebSocket 그룹(admin_jobs)에 진행 이벤트 전송
+- 회원 탈퇴/유저 삭제는 purge_users(): 계정을 바로 비활성화한 뒤 메시지 삭제(또는 익명화)와 관련 행 정리
+- 대화방 삭제는 soft_delete_rooms(): is_active=False 로 바로 숨긴 뒤 같은 방식으로 배치 삭제
+  삭제 작업이 끝나지 않은 대상은 관리자 화면에서 다시 활성화할 수 없음 (pending_delete_ids)
+- 프로세스가 죽어 updated_at이 ADMIN_JOB_STALE_SECONDS 넘게 멈춘 작업은
+  `python manage.py run_admin_jobs` (또는 다음 작업 등록 시) 기록된 단계부터 이어서 실행
+  각 단계는 남은 행을 다시 조회해 지우므로 같은 배치를 두 번 처리해도 문제가 없다.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    AdminJob, Chat, ChatRoom, ChatRoomParticipant, MessageFavorite, MessageReaction,
+    NotificationRead, PinnedMessage, UserSettings, VoiceCall,
+)
+from .purge import anonymize_messages_chunk, delete_messages_chunk, delete_rows_chunk
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_GROUP = 'admin_jobs'
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_STALE_SECONDS = 300
+# 끝나지 않은 작업 (실패한 작업도 관리자가 재시도할 수 있으므로 포함)
+UNFINISHED_STATUSES = ('pending', 'running', 'failed')
+
+JOB_PLANS = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, int(getattr(settings, 'ADMIN_JOB_WORKERS', DEFAULT_MAX_WORKERS)))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='admin-jobs')
+        return _executor
+
+
+def batch_size():
+    return max(1, int(getattr(settings, 'ADMIN_JOB_BATCH_SIZE', DEFAULT_BATCH_SIZE)))
+
+
+def job_plan(job_type):
+    """작업 종류 등록. 등록 함수는 params → [(단계 이름, chunk(batch_size) → 처리 수, count() → 남은 수)]"""
+    def register(func):
+        JOB_PLANS[job_type] = func
+        return func
+    return register
+
+
+def _rows_step(name, queryset_fn, chunk=delete_rows_chunk):
+    return (name, lambda n: chunk(queryset_fn(), n), lambda: queryset_fn().count())
+
+
+@job_plan('delete_messages')
+def _plan_delete_messages(params):
+    ids = params['ids']
+    return [
+        _rows_step('messages', lambda: Chat.objects.filter(id__in=ids), chunk=delete_messages_chunk),
+    ]
+
+
+@job_plan('delete_rooms')
+def _plan_delete_rooms(params):
+    ids = params['ids']
+    return [
+        _rows_step('messages', lambda: Chat.objects.filter(room_id__in=ids), chunk=delete_messages_chunk),
+        _rows_step('pins', lambda: PinnedMessage.objects.filter(room_id__in=ids)),
+        _rows_step('notification_reads', lambda: NotificationRead.objects.filter(room_id__in=ids)),
+        _rows_step('participants', lambda: ChatRoomParticipant.objects.filter(room_id__in=ids)),
+        _rows_step('voice_calls', lambda: VoiceCall.objects.filter(room_id__in=ids)),
+        _rows_step('rooms', lambda: ChatRoom.objects.filter(id__in=ids)),
+    ]
+
+
+@job_plan('delete_users')
+def _plan_delete_users(params):
+    ids = params['ids']
+    # 이전 버전에서 등록된 작업(messages 없음)은 메시지를 건드리지 않던 동작 유지
+    message_chunk = {
+        'delete': delete_messages_chunk,
+        'anonymize': anonymize_messages_chunk,
+    }.get(params.get('messages'))
+    steps = []
+    if message_chunk is not None:
+        steps.append(_rows_step('messages', lambda: Chat.objects.filter(user_id__in=ids), chunk=message_chunk))
+    return steps + [
+        _rows_step('reactions', lambda: MessageReaction.objects.filter(user_id__in=ids)),
+        _rows_step('favorites', lambda: MessageFavorite.objects.filter(user_id__in=ids)),
+        _rows_step('pins', lambda: PinnedMessage.objects.filter(pinned_by_id__in=ids)),
+        _rows_step('notification_reads', lambda: NotificationRead.objects.filter(user_id__in=ids)),
+        _rows_step('participants', lambda: ChatRoomParticipant.objects.filter(user_id__in=ids)),
+        _rows_step('voice_calls', lambda: VoiceCall.objects.filter(Q(caller_id__in=ids) | Q(receiver_id__in=ids))),
+        _rows_step('settings', lambda: UserSettings.objects.filter(user_id__in=ids)),
+        _rows_step('users', lambda: User.objects.filter(id__in=ids)),
+    ]
+
+
+def job_payload(job):
+    state = _load(job.state)
+    return {
+        'id': job.id,
+        'job_type': job.job_type,
+        'status': job.status,
+        'step': state.get('step_name'),
+        'total': job.total,
+        'processed': job.processed,
+        'progress': round(min(job.processed / job.total, 1.0), 4) if job.total else (1.0 if job.status == 'completed' else 0.0),
+        'error': job.error or None,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'updated_at': job.updated_at.isoformat() if job.updated_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def _load(text):
+    try:
+        return json.loads(text or '{}')
+    except (json.JSONDecodeError, TypeError):
+        return {}
+
+
+def _notify(job):
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is not None:
+            async_to_sync(channel_layer.group_send)(PROGRESS_GROUP, {
+                'type': 'admin_job_progress',
+                'job': job_payload(job),
+            })
+    except Exception as e:
+        logger.debug("관리자 작업 진행 이벤트 전송 실패: %s", e)
+
+
+def submit_job(job_type, params, user=None):
+    """작업 등록 후 워커 풀에 제출. 등록된 AdminJob 반환"""
+    if job_type not in JOB_PLANS:
+        raise ValueError(f'알 수 없는 작업 종류: {job_type}')
+    job = AdminJob.objects.create(
+        job_type=job_type,
+        params=json.dumps(params),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    _notify(job)
+    # 트랜잭션 안에서 등록하면 커밋 후에 실행 (워커가 아직 보이지 않는 행을 읽지 않도록)
+    transaction.on_commit(lambda: submit_existing_job(job.pk))
+    resume_stale_jobs()
+    return job
+
+
+def submit_existing_job(job_id):
+    """대기 상태 작업을 워커 풀에 제출"""
+    _get_executor().submit(run_job, job_id)
+
+
+def run_in_background(func, *args):
+    """AdminJob 행 없이 짧은 유지보수 작업(관리자 통계 증분 집계 등)을 같은 워커 풀에서 실행"""
+    def run():
+        try:
+            func(*args)
+        finally:
+            close_old_connections()
+    return _get_executor().submit(run)
+
+
+def pending_delete_ids(job_type):
+    """끝나지 않은 삭제 작업(delete_rooms/delete_users)의 대상 ID 집합"""
+    ids = set()
+    jobs = AdminJob.objects.filter(job_type=job_type, status__in=UNFINISHED_STATUSES)
+    for params in jobs.values_list('params', flat=True):
+        ids.update(_load(params).get('ids', []))
+    return ids
+
+
+def soft_delete_rooms(room_ids, user=None):
+    """대화방을 즉시 비활성화(목록/조회에서 숨김)하고 메시지 등 의존 행 삭제는 백그라운드 작업으로 등록
+
+    비활성화와 작업 등록을 한 트랜잭션으로 처리하므로 작업 없이 숨겨지기만 한 방이 남지 않는다.
+    """
+    room_ids = [int(pk) for pk in room_ids]
+    with transaction.atomic():
+        ChatRoom.objects.filter(id__in=room_ids).update(is_active=False, updated_at=timezone.now())
+        return submit_job('delete_rooms', {'ids': room_ids}, user)
+
+
+def purge_users(user_ids, requested_by=None, messages='delete'):
+    """계정을 즉시 비활성화(로그인/세션 무효)하고 데이터 삭제는 백그라운드 작업으로 등록
+
+    messages: 'delete' 이면 작성한 메시지 삭제, 'anonymize' 이면 작성자 정보만 제거하고 대화 내용은 유지
+    혼자 방장으로 남은 대화방(AI 대화방 등)은 soft_delete_rooms()로 함께 삭제한다.
+    작업이 끝날 때까지 관리자 화면의 활성화(toggle_active, activate_users)는 거부된다 (pending_delete_ids).
+    """
+    if messages not in ('delete', 'anonymize'):
+        raise ValueError(f'알 수 없는 메시지 처리 방식: {messages}')
+    user_ids = [int(pk) for pk in user_ids]
+    with transaction.atomic():
+        User.objects.filter(id__in=user_ids).update(is_active=False)
+        owned = set(ChatRoomParticipant.objects.filter(user_id__in=user_ids, is_owner=True).values_list('room_id', flat=True))
+        shared = set(ChatRoomParticipant.objects.filter(room_id__in=owned).exclude(user_id__in=user_ids).values_list('room_id', flat=True))
+        if owned - shared:
+            soft_delete_rooms(owned - shared, requested_by)
+        return submit_job('delete_users', {'ids': user_ids, 'messages': messages}, requested_by)
+
+
+def resume_stale_jobs(stale_seconds=None, run_inline=False):
+    """멈춘 작업(대기/실행 중인데 오래 갱신되지 않음)을 가져와 다시 실행. 재개한 작업 ID 목록 반환"""
+    if stale_seconds is None:
+        stale_seconds = float(getattr(settings, 'ADMIN_JOB_STALE_SECONDS', DEFAULT_STALE_SECONDS))
+    cutoff = timezone.now() - timedelta(seconds=stale_seconds)
+    resumed = []
+    for job_id in AdminJob.objects.filter(status__in=['pending', 'running'], updated_at__lt=cutoff).values_list('id', flat=True):
+        # 다른 프로세스와 동시에 가져가지 않도록 조건부 UPDATE로 선점
+        claimed = AdminJob.objects.filter(
+            pk=job_id, status__in=['pending', 'running'], updated_at__lt=cutoff
+        ).update(status='running', updated_at=timezone.now())
+        if not claimed:
+            continue
+        resumed.append(job_id)
+        if run_inline:
+            run_job(job_id, claimed=True)
+        else:
+            _get_executor().submit(run_job, job_id, True)
+    return resumed
+
+
+def run_job(job_id, claimed=False):
+    """작업 실행 (워커 스레드). 기록된 단계부터 시작해 배치마다 진행 상황 저장"""
+    try:
+        if not claimed and not AdminJob.objects.filter(pk=job_id, status='pending').update(
+            status='running', updated_at=timezone.now()
+        ):
+            return
+        job = AdminJob.objects.get(pk=job_id)
+        params = _load(job.params)
+        state = _load(job.state)
+        steps = JOB_PLANS[job.job_type](params)
+        size = batch_size()
+
+        if not state.get('counted'):
+            job.total = sum(count() for _, _, count in steps)
+            state['counted'] = True
+            job.state = json.dumps(state)
+            job.save(update_fields=['total', 'state', 'updated_at'])
+
+        for index in range(state.get('step', 0), len(steps)):
+            name, chunk, _ = steps[index]
+            state['step_name'] = name
+            while True:
+                processed = chunk(size)
+                if not processed:
+                    break
+                job.processed += processed
+                job.state = json.dumps(state)
+                job.save(update_fields=['processed', 'state', 'updated_at'])
+                _notify(job)
+            state['step'] = index + 1
+            job.state = json.dumps(state)
+            job.save(update_fields=['state', 'updated_at'])
+
+        job.status = 'completed'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at', 'updated_at'])
+        _notify(job)
+    except Exception as e:
+        logger.exception("관리자 작업 실패: #%s", job_id)
+        AdminJob.objects.filter(pk=job_id).update(
+            status='failed', error=str(e), finished_at=timezone.now(), updated_at=timezone.now()
+        )
+        job = AdminJob.objects.filter(pk=job_id).first()
+        if job is not None:
+            _notify(job)
+    finally:
+        close_old_connections()
@@ -0,0 +1,133 @@
+"""관리자 목록 API 페이지네이션
+
+PageNumberPagination 그대로 쓰면 페이지마다 `COUNT(*)` 전체 스캔 + 깊은 OFFSET으로 전체 행을 읽고 버린다.
+
+- 개수: 필터가 없으면 DB 통계(PostgreSQL pg_class.reltuples, MySQL information_schema.TABLES.TABLE_ROWS)의
+  추정치, 필터가 있으면 ADMIN_COUNT_CAP까지만 센다. 추정/상한 값이면 응답의 count_is_estimate가 true.
+  작은 테이블이나 통계를 쓸 수 없는 DB(SQLite)는 정확한 COUNT.
+- 기본: 뷰의 keyset_ordering 기준 커서(keyset) 페이지네이션 (?cursor=...).
+  응답의 next / previous URL을 그대로 따라가면 되고 깊이와 무관하게 인덱스 범위 조회 한 번
+- ?page=N (페이지 번호로 바로 이동해야 하는 예전 클라이언트용): OFFSET은 PK만 읽는 쿼리에서 처리하고
+  해당 페이지 행만 다시 조회
+"""
+from django.conf import settings
+from django.core.paginator import EmptyPage, Paginator as DjangoPaginator
+from django.db import connection
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+DEFAULT_EXACT_COUNT_THRESHOLD = 10000
+DEFAULT_COUNT_CAP = 10000
+
+
+def estimated_table_rows(model):
+    """DB 통계에 기록된 테이블 행 수 추정치 (지원하지 않는 DB거나 통계가 없으면 None)"""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    # PostgreSQL은 ANALYZE 전이면 -1
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def fast_count(queryset):
+    """(개수, 추정 여부). 필터 없는 큰 테이블은 통계 추정치, 필터가 있으면 ADMIN_COUNT_CAP에서 멈춤"""
+    if not queryset.query.where:
+        estimate = estimated_table_rows(queryset.model)
+        threshold = int(getattr(settings, 'ADMIN_EXACT_COUNT_THRESHOLD', DEFAULT_EXACT_COUNT_THRESHOLD))
+        if estimate is not None and estimate > threshold:
+            return estimate, True
+        return queryset.count(), False
+    cap = int(getattr(settings, 'ADMIN_COUNT_CAP', DEFAULT_COUNT_CAP))
+    count = queryset.order_by().values('pk')[:cap + 1].count()
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    """count를 fast_count()로 계산하고 페이지 행은 PK 목록을 먼저 구해 조회하는 Paginator"""
+
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        count, self.count_is_estimate = fast_count(self.object_list)
+        return count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # 추정치 기준 마지막 페이지 뒤에도 행이 있을 수 있으므로 빈 페이지로 돌려줌
+            if self.count_is_estimate and int(number) >= 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        ids = list(self.object_list.values_list('pk', flat=True)[bottom:bottom + self.per_page])
+        rows = {obj.pk: obj for obj in self.object_list.filter(pk__in=ids)}
+        return self._get_page([rows[pk] for pk in ids if pk in rows], number, self)
+
+
+class AdminCursorPagination(CursorPagination):
+    """뷰의 keyset_ordering(예: ('-timestamp', '-id')) 기준 커서 페이지네이션"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'keyset_ordering', ('-id',)))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count, self.count_is_estimate = fast_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'count_is_estimate': self.count_is_estimate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class AdminPagination(PageNumberPagination):
+    """관리자 페이지네이션 (기본 커서, ?page=N 이면 페이지 번호)"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    django_paginator_class = EstimatedCountPaginator
+
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get('cursor') or not request.query_params.get(self.page_query_param):
+            self.cursor_paginator = AdminCursorPagination()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return Response({
+            'count': self.page.paginator.count,
+            'count_is_estimate': self.page.paginator.count_is_estimate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
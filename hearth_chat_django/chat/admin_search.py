@@ -0,0 +1,226 @@
+"""관리자 목록 부분 문자열 검색 인덱스
+
+`icontains`(LIKE '%검색어%')는 B-tree 인덱스를 쓰지 못해 chat_chat 전체를 읽는다. DB별로 부분 문자열 검색용 인덱스를
+두고 search_queryset()이 그 인덱스로 후보를 좁힌 뒤 기존 icontains 조건으로 다시 확인한다 (결과는 icontains와 동일).
+
+- PostgreSQL: pg_trgm GIN 인덱스 `UPPER(컬럼::text) gin_trgm_ops`
+  Django의 icontains가 만드는 `UPPER(컬럼::text) LIKE UPPER(...)` 식과 같아서 조건을 바꾸지 않아도 인덱스를 쓴다.
+- MySQL: ngram 파서 FULLTEXT 인덱스 + `MATCH ... AGAINST ('"검색어"' IN BOOLEAN MODE)` (검색어 2자 이상)
+- SQLite: FTS5 trigram 외부 콘텐츠 테이블(<테이블>_search) + 트리거로 동기화 (검색어 3자 이상)
+  Django가 테이블을 다시 만드는 마이그레이션(컬럼 변경 등)은 트리거를 지우므로, migrate가 끝날 때
+  post_migrate 시그널(restore_sqlite_search_triggers)이 빠진 트리거를 다시 만들고 FTS 내용을 다시 채운다.
+
+인덱스는 마이그레이션 0027에서 만든다 (`python manage.py rebuild_search_indexes` 로 다시 만들 수 있음). 인덱스가 없거나 검색어가 짧거나 너무 흔하면 icontains만 사용한다.
+(PostgreSQL은 조건이 같으므로 인덱스 사용 여부를 플래너가 정한다)
+"""
+import logging
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+# 테이블 → 검색 컬럼
+SEARCH_COLUMNS = {
+    'chat_chat': ('content',),
+    'chat_chatroom': ('name',),
+    'auth_user': ('username', 'email'),
+}
+DEFAULT_MAX_CANDIDATES = 5000
+MYSQL_MIN_TERM_LENGTH = 2  # innodb_ngram_token_size 기본값
+SQLITE_MIN_TERM_LENGTH = 3  # trigram
+
+_sqlite_ready = {}
+
+
+def _index_name(table, column):
+    return f'{table}_{column}_search'
+
+
+def _fts_table(table):
+    return f'{table}_search'
+
+
+def _statements(vendor, table, columns):
+    """(vendor, 테이블)별 검색 인덱스 생성 SQL 목록 [(인덱스 이름, SQL)]"""
+    if vendor == 'postgresql':
+        return [
+            (_index_name(table, column),
+             f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {_index_name(table, column)} '
+             f'ON {table} USING gin (UPPER("{column}"::text) gin_trgm_ops)')
+            for column in columns
+        ]
+    if vendor == 'mysql':
+        return [
+            (_index_name(table, column),
+             f'ALTER TABLE `{table}` ADD FULLTEXT INDEX {_index_name(table, column)} (`{column}`) WITH PARSER ngram')
+            for column in columns
+        ]
+    if vendor == 'sqlite':
+        fts = _fts_table(table)
+        cols = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        return [
+            (fts, f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='id', tokenize='trigram')"),
+            (fts, f"INSERT INTO {fts}({fts}) VALUES('rebuild')"),
+            (f'{fts}_ai', f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                          f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"),
+            (f'{fts}_ad', f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                          f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END"),
+            (f'{fts}_au', f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+                          f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+                          f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"),
+        ]
+    return []
+
+
+def install_search_indexes(conn=None, stdout=None):
+    """검색 인덱스 생성 (이미 있으면 건너뜀, SQLite는 FTS 내용을 다시 채움). 인덱스를 갖춘 테이블 수 반환
+
+    확장 기능/파서가 없는 DB에서는 경고만 남기고 icontains 검색을 그대로 쓴다.
+    PostgreSQL은 CONCURRENTLY 이므로 트랜잭션 밖(atomic=False 마이그레이션, 관리 명령)에서 호출할 것.
+    """
+    conn = conn or connection
+    existing = _existing_mysql_indexes(conn) if conn.vendor == 'mysql' else set()
+    installed = 0
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            try:
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            except Exception as e:
+                logger.warning("pg_trgm 확장을 만들 수 없어 검색 인덱스를 건너뜁니다: %s", e)
+                return 0
+        for table, columns in SEARCH_COLUMNS.items():
+            statements = _statements(conn.vendor, table, columns)
+            if not statements:
+                continue
+            try:
+                for name, sql in statements:
+                    if name not in existing:
+                        cursor.execute(sql)
+                installed += 1
+                if stdout is not None:
+                    stdout.write(f'  {table}: {", ".join(columns)}')
+            except Exception as e:
+                logger.warning("검색 인덱스 생성 실패 (%s): %s", table, e)
+    _sqlite_ready.clear()
+    return installed
+
+
+def drop_search_indexes(conn=None):
+    conn = conn or connection
+    existing = _existing_mysql_indexes(conn) if conn.vendor == 'mysql' else set()
+    with conn.cursor() as cursor:
+        for table, columns in SEARCH_COLUMNS.items():
+            if conn.vendor == 'postgresql':
+                for column in columns:
+                    cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {_index_name(table, column)}')
+            elif conn.vendor == 'mysql':
+                for column in columns:
+                    if _index_name(table, column) in existing:
+                        cursor.execute(f'ALTER TABLE `{table}` DROP INDEX {_index_name(table, column)}')
+            elif conn.vendor == 'sqlite':
+                fts = _fts_table(table)
+                for suffix in ('ai', 'ad', 'au'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+                cursor.execute(f'DROP TABLE IF EXISTS {fts}')
+    _sqlite_ready.clear()
+
+
+def restore_sqlite_search_triggers(using='default'):
+    """SQLite: FTS 테이블은 있는데 동기화 트리거가 빠진 테이블의 트리거를 다시 만들고 FTS 내용을 다시 채움
+
+    복구한 테이블 목록 반환. 실패하면 예외를 그대로 올려 migrate가 실패하게 한다.
+    """
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return []
+    restored = []
+    with conn.cursor() as cursor:
+        for table, columns in SEARCH_COLUMNS.items():
+            fts = _fts_table(table)
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+                [fts, f'{fts}_ai', f'{fts}_ad', f'{fts}_au'],
+            )
+            names = {row[0] for row in cursor.fetchall()}
+            if fts not in names or len(names) == 4:
+                continue
+            for _, sql in _statements('sqlite', table, columns):
+                cursor.execute(sql)
+            restored.append(table)
+    if restored:
+        logger.info("SQLite 검색 트리거 복구: %s", ', '.join(restored))
+        _sqlite_ready.clear()
+    return restored
+
+
+def _existing_mysql_indexes(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT INDEX_NAME FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND INDEX_TYPE = 'FULLTEXT'"
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _sqlite_search_ready(table):
+    """FTS 테이블과 동기화 트리거가 모두 있는지 (프로세스 안에서 캐시)"""
+    if table not in _sqlite_ready:
+        fts = _fts_table(table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+                [fts, f'{fts}_ai', f'{fts}_ad', f'{fts}_au'],
+            )
+            _sqlite_ready[table] = cursor.fetchone()[0] == 4
+    return _sqlite_ready[table]
+
+
+def _candidate_sql(table, columns, term):
+    """검색 인덱스로 후보 행 ID를 고르는 (SQL, 파라미터). 인덱스를 쓸 수 없으면 None"""
+    if connection.vendor == 'mysql' and len(term) >= MYSQL_MIN_TERM_LENGTH:
+        phrase = '"%s"' % term.replace('"', ' ')
+        where = ' OR '.join(f'MATCH(`{column}`) AGAINST (%s IN BOOLEAN MODE)' for column in columns)
+        return f'SELECT id FROM `{table}` WHERE {where}', [phrase] * len(columns)
+    if connection.vendor == 'sqlite' and len(term) >= SQLITE_MIN_TERM_LENGTH and _sqlite_search_ready(table):
+        fts = _fts_table(table)
+        phrase = '"%s"' % term.replace('"', '""')
+        return f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [phrase]
+    return None
+
+
+def _candidate_ids(table, columns, term):
+    """검색 인덱스 후보 ID 서브쿼리 (인덱스를 쓸 수 없거나 후보가 너무 많으면 None)
+
+    후보 서브쿼리는 일치하는 행 전체를 모으므로 흔한 검색어면 정렬 순서대로 훑다가 한 페이지를 채우고 멈추는
+    icontains보다 느리다. 후보 수를 ADMIN_SEARCH_MAX_CANDIDATES 까지만 세어 보고 넘으면 인덱스를 쓰지 않는다.
+    """
+    candidate = _candidate_sql(table, columns, term)
+    if candidate is None:
+        return None
+    sql, params = candidate
+    limit = int(getattr(settings, 'ADMIN_SEARCH_MAX_CANDIDATES', DEFAULT_MAX_CANDIDATES))
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM ({sql} LIMIT %s) probe', [*params, limit + 1])
+        if cursor.fetchone()[0] > limit:
+            return None
+    return RawSQL(sql, params)
+
+
+def search_queryset(queryset, term):
+    """queryset 모델의 검색 컬럼 중 하나라도 term을 포함하는 행으로 필터 (대소문자 무시)"""
+    term = (term or '').strip()
+    if not term:
+        return queryset
+    table = queryset.model._meta.db_table
+    columns = SEARCH_COLUMNS[table]
+    condition = Q()
+    for column in columns:
+        condition |= Q(**{f'{column}__icontains': term})
+    candidates = _candidate_ids(table, columns, term)
+    if candidates is not None:
+        queryset = queryset.filter(pk__in=candidates)
+    return queryset.filter(condition)
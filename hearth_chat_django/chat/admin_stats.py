@@ -0,0 +1,277 @@
+"""관리자 통계 일별 집계
+
+대시보드가 열릴 때마다 `timestamp__date=today` 스캔(인덱스 사용 불가)으로 구하던 오늘 통계와
+날짜별 시계열을 미리 집계한 일별 테이블 조회로 바꾼다.
+전체 합계와 타입별 합계도 원본 테이블을 세지 않고 집계 테이블을 더해 구한다.
+
+    DailyMessageStat  날짜 × 대화방 타입 × 발신자 타입별 메시지 수
+    DailyRoomStat     날짜 × 대화방 타입별 새 대화방 수
+    DailyUserStat     날짜별 새 유저 수
+    HourlyTrafficStat / DailyTrafficStat
+                      시간/날짜 × 대화방 × 발신자 타입 × AI 이름/타입 × 감정별 메시지 수 (분석 API용)
+
+집계는 대상별 워터마크(StatsWatermark.last_id) 이후에 생긴 행만 ID 범위로 읽어 더한다.
+아직 커밋되지 않은 앞 번호 트랜잭션을 건너뛰지 않도록 ADMIN_STATS_LAG_SECONDS 이전에
+생성된 행까지만 집계한다. 행을 지우는 곳(chat/purge.py의 배치 삭제, 메시지 단건 삭제)은 같은 트랜잭션에서
+subtract_deleted_rows()로 이미 집계된 행을 빼므로, 일별 값은 '그날 생성되어 남아 있는 수' 기준이다.
+범위 상한은 ID 역순(기본 키 인덱스)으로 찾으므로 생성 시각 필드에 인덱스가 없어도 된다.
+
+- 대시보드/분석 API는 집계 테이블만 읽는다. 마지막 집계 후 ADMIN_STATS_REFRESH_INTERVAL이 지났으면
+  관리자 작업 워커 풀(chat/admin_jobs.py)에 증분 집계를 넘기고 바로 응답 (처음 실행 시 전체 백필도 여기서 진행)
+- 정기 실행(cron 등): `python manage.py refresh_admin_stats`
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from .models import Chat, ChatRoom, DailyMessageStat, DailyRoomStat, DailyTrafficStat, DailyUserStat, HourlyTrafficStat, StatsWatermark
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50000
+DEFAULT_LAG_SECONDS = 30
+DEFAULT_REFRESH_INTERVAL_SECONDS = 60
+APPLY_BATCH_SIZE = 1000
+REFRESH_LOCK_KEY = 'chat:admin_stats:refresh_lock'
+REFRESHED_AT_KEY = 'chat:admin_stats:refreshed_at'
+# 처음 백필처럼 오래 걸리는 집계도 잠금이 먼저 풀리지 않도록 넉넉히 (워커가 끝나면 바로 해제)
+REFRESH_LOCK_TIMEOUT = 3600
+
+
+class Rollup:
+    """원본 테이블 → 집계 테이블 증분 집계 정의
+
+    time_field: 집계 범위(지연 기준)를 정하는 생성 시각 필드
+    dimensions: {집계 테이블 필드: 원본 values() 경로}
+    bucket: (집계 테이블의 시간 필드, 자르기 함수) - 일별은 ('date', TruncDate), 시간별은 ('hour', TruncHour)
+    bucket_source: 버킷을 나눌 원본 시각 필드 (기본 time_field, 메시지는 전송 시각 timestamp)
+    empty: 원본 값이 NULL일 때 넣을 값 (기본 '')
+    """
+
+    def __init__(self, name, queryset, time_field, target, dimensions, bucket=('date', TruncDate),
+                 bucket_source=None, empty=None):
+        self.name = name
+        self.queryset = queryset
+        self.time_field = time_field
+        self.target = target
+        self.dimensions = dimensions
+        self.bucket_field, self.bucket_func = bucket
+        self.bucket_source = bucket_source or time_field
+        self.empty = empty or {}
+
+    def source(self):
+        # 기본 ordering(Chat.timestamp 등)이 GROUP BY에 섞이지 않도록 order_by() 로 제거
+        return self.queryset().order_by()
+
+    def upper_id(self, cutoff):
+        """cutoff 이전에 생성된 가장 큰 ID
+
+        최신 ID부터 기본 키 인덱스를 거꾸로 읽다가 cutoff 이전 행을 만나면 멈추므로
+        생성 시각 필드(User.date_joined 등)에 인덱스가 없어도 지연 구간 행만 읽는다.
+        """
+        return self.source().filter(**{f'{self.time_field}__lt': cutoff}).order_by(
+            '-id'
+        ).values_list('id', flat=True).first() or 0
+
+    def model(self):
+        return self.queryset().model
+
+    def group(self, queryset):
+        return queryset.order_by().annotate(
+            bucket=self.bucket_func(self.bucket_source)
+        ).values('bucket', *self.dimensions.values()).annotate(n=Count('id'))
+
+    def aggregate(self, start_id, end_id):
+        return self.group(self.source().filter(id__gt=start_id, id__lte=end_id))
+
+    def apply(self, rows, sign=1):
+        """집계 결과를 더함(sign=-1이면 뺌). 같은 버킷의 기존 행을 한 번에 읽어 bulk_update / bulk_create
+
+        워터마크 행 잠금 안에서 호출되므로 같은 집계 테이블을 동시에 쓰는 작업은 없다.
+        """
+        fields = [self.bucket_field, *self.dimensions]
+        counts = {}
+        for row in rows:
+            key = [row['bucket']]
+            for field, path in self.dimensions.items():
+                value = row[path]
+                key.append(self.empty.get(field, '') if value is None else value)
+            counts[tuple(key)] = counts.get(tuple(key), 0) + sign * row['n']
+        if not counts:
+            return
+
+        buckets = {key[0] for key in counts}
+        existing = {
+            tuple(getattr(obj, field) for field in fields): obj
+            for obj in self.target.objects.filter(**{f'{self.bucket_field}__in': buckets})
+        }
+        to_update, to_create = [], []
+        for key, n in counts.items():
+            obj = existing.get(key)
+            if obj is not None:
+                obj.count = max(0, obj.count + n)
+                to_update.append(obj)
+            elif n > 0:
+                to_create.append(self.target(count=n, **dict(zip(fields, key))))
+        self.target.objects.bulk_update(to_update, ['count'], batch_size=APPLY_BATCH_SIZE)
+        self.target.objects.bulk_create(to_create, batch_size=APPLY_BATCH_SIZE)
+
+
+TRAFFIC_DIMENSIONS = {
+    'room_id': 'room_id', 'sender_type': 'sender_type',
+    'ai_name': 'ai_name', 'ai_type': 'ai_type', 'emotion': 'emotion',
+}
+
+ROLLUPS = [
+    Rollup('chat_daily', lambda: Chat.objects.all(), 'created_at', DailyMessageStat,
+           {'room_type': 'room__room_type', 'sender_type': 'sender_type'}, bucket_source='timestamp'),
+    Rollup('room_daily', lambda: ChatRoom.objects.all(), 'created_at', DailyRoomStat,
+           {'room_type': 'room_type'}),
+    Rollup('user_daily', lambda: User.objects.all(), 'date_joined', DailyUserStat, {}),
+    Rollup('chat_hourly', lambda: Chat.objects.all(), 'created_at', HourlyTrafficStat, TRAFFIC_DIMENSIONS,
+           bucket=('hour', TruncHour), bucket_source='timestamp', empty={'room_id': 0}),
+    Rollup('chat_daily_traffic', lambda: Chat.objects.all(), 'created_at', DailyTrafficStat, TRAFFIC_DIMENSIONS,
+           bucket_source='timestamp', empty={'room_id': 0}),
+]
+
+
+def run_rollup(rollup, batch_size=None, max_batches=None, cutoff=None):
+    """워터마크 이후 행을 배치 단위로 집계. 집계한 ID 범위 수(배치 수) 반환
+
+    배치마다 집계 결과와 워터마크를 한 트랜잭션으로 기록하므로 중간에 멈춰도 다음 실행이 이어서 처리한다.
+    """
+    batch_size = batch_size or int(getattr(settings, 'ADMIN_STATS_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+    if cutoff is None:
+        cutoff = timezone.now() - timedelta(seconds=float(getattr(settings, 'ADMIN_STATS_LAG_SECONDS', DEFAULT_LAG_SECONDS)))
+    upper_id = rollup.upper_id(cutoff)
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            watermark, _ = StatsWatermark.objects.select_for_update().get_or_create(name=rollup.name)
+            start_id = watermark.last_id
+            if start_id >= upper_id:
+                break
+            end_id = min(start_id + batch_size, upper_id)
+            rollup.apply(rollup.aggregate(start_id, end_id))
+            watermark.last_id = end_id
+            watermark.save(update_fields=['last_id', 'updated_at'])
+        batches += 1
+    return batches
+
+
+def subtract_deleted_rows(queryset):
+    """곧 삭제할 행 중 이미 집계된(워터마크 이하) 행을 집계 테이블에서 뺌
+
+    삭제와 같은 트랜잭션 안에서 호출해야 한다. 워터마크 행 잠금을 삭제가 커밋될 때까지 쥐고 있으므로
+    그 사이 증분 집계가 아직 지워지지 않은 행을 새로 더하는 일이 없다.
+    """
+    rollups = [rollup for rollup in ROLLUPS if rollup.model() is queryset.model]
+    if not rollups:
+        return
+    with transaction.atomic():
+        for rollup in rollups:
+            watermark = StatsWatermark.objects.select_for_update().filter(name=rollup.name).first()
+            if watermark is None or not watermark.last_id:
+                continue
+            rollup.apply(rollup.group(queryset.filter(id__lte=watermark.last_id)), sign=-1)
+
+
+def refresh_admin_stats(batch_size=None, max_batches=None, cutoff=None):
+    """모든 집계 실행. {집계 이름: 처리한 배치 수}"""
+    result = {
+        rollup.name: run_rollup(rollup, batch_size=batch_size, max_batches=max_batches, cutoff=cutoff)
+        for rollup in ROLLUPS
+    }
+    cache.set(REFRESHED_AT_KEY, time.time(), timeout=None)
+    return result
+
+
+def _refresh_in_background():
+    try:
+        refresh_admin_stats()
+    except Exception:
+        logger.exception("관리자 통계 증분 집계 실패")
+    finally:
+        cache.delete(REFRESH_LOCK_KEY)
+
+
+def schedule_admin_stats_refresh():
+    """대시보드 조회 시 호출. 마지막 집계가 오래되었으면 워커 풀에 증분 집계를 넘김 (요청은 기다리지 않음)
+
+    동시에 한 작업만 돌도록 캐시 잠금을 잡고, 잠금은 작업이 끝나면 워커에서 푼다.
+    """
+    interval = float(getattr(settings, 'ADMIN_STATS_REFRESH_INTERVAL', DEFAULT_REFRESH_INTERVAL_SECONDS))
+    refreshed_at = cache.get(REFRESHED_AT_KEY)
+    if refreshed_at is not None and time.time() - refreshed_at < interval:
+        return False
+    if not cache.add(REFRESH_LOCK_KEY, 1, timeout=REFRESH_LOCK_TIMEOUT):
+        return False
+    from .admin_jobs import run_in_background
+    try:
+        run_in_background(_refresh_in_background)
+    except Exception:
+        cache.delete(REFRESH_LOCK_KEY)
+        logger.exception("관리자 통계 증분 집계 등록 실패")
+        return False
+    return True
+
+
+def _total(model, **filters):
+    return model.objects.filter(**filters).aggregate(total=Sum('count'))['total'] or 0
+
+
+def overview_totals():
+    """현재 유저/대화방/메시지 수 (집계 테이블 합계, 삭제 반영)"""
+    return {
+        'total_users': _total(DailyUserStat),
+        'total_rooms': _total(DailyRoomStat),
+        'total_messages': _total(DailyMessageStat),
+    }
+
+
+def day_totals(date):
+    return {
+        'new_messages': _total(DailyMessageStat, date=date),
+        'new_rooms': _total(DailyRoomStat, date=date),
+        'new_users': _total(DailyUserStat, date=date),
+    }
+
+
+def _totals_by(model, field):
+    rows = model.objects.values(field).annotate(count=Sum('count')).filter(count__gt=0).order_by(field)
+    return [{field: row[field], 'count': row['count']} for row in rows]
+
+
+def room_type_totals():
+    return _totals_by(DailyRoomStat, 'room_type')
+
+
+def sender_type_totals():
+    return _totals_by(DailyMessageStat, 'sender_type')
+
+
+def daily_time_series(start_date, end_date):
+    """[start_date, end_date] 날짜별 메시지/새 대화방/새 유저 수 (빈 날짜는 0)"""
+    series = {}
+    day = start_date
+    while day <= end_date:
+        series[day] = {'date': day.isoformat(), 'messages': 0, 'new_rooms': 0, 'new_users': 0}
+        day += timedelta(days=1)
+    for key, model in (('messages', DailyMessageStat), ('new_rooms', DailyRoomStat), ('new_users', DailyUserStat)):
+        rows = model.objects.filter(date__range=(start_date, end_date)).values('date').annotate(total=Sum('count'))
+        for row in rows:
+            series[row['date']][key] = row['total']
+    return list(series.values())
+
+
+def last_refreshed_at():
+    watermark = StatsWatermark.objects.order_by('-updated_at').first()
+    return watermark.updated_at if watermark else None
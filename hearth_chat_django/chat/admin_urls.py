@@ -4,7 +4,10 @@ from .admin_views import (
     AdminRoomViewSet, 
     AdminMessageViewSet, 
     AdminStatsView,
+    AdminAnalyticsView,
     AdminBulkActionView,
+    AdminJobListView,
+    AdminJobDetailView,
     AdminMediaUploadView,
     AdminMediaListView,
     AdminMediaDeleteView,
@@ -21,7 +24,10 @@ router.register(r'messages', AdminMessageViewSet, basename='admin-message')
 # 관리자용 URL 패턴
 urlpatterns = [
     path('stats/', AdminStatsView.as_view(), name='admin-stats'),
+    path('analytics/', AdminAnalyticsView.as_view(), name='admin-analytics'),
     path('bulk-action/', AdminBulkActionView.as_view(), name='admin-bulk-action'),
+    path('jobs/', AdminJobListView.as_view(), name='admin-jobs'),
+    path('jobs/<int:pk>/', AdminJobDetailView.as_view(), name='admin-job-detail'),
     path('admin_upload_media/', AdminMediaUploadView.as_view(), name='admin-upload-media'),
     path('admin_list_media_files/', AdminMediaListView.as_view(), name='admin-list-media-files'),
     path('admin_delete_media_file/<int:pk>/', AdminMediaDeleteView.as_view(), name='admin-delete-media-file'),
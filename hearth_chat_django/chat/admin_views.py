@@ -2,16 +2,22 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAdminUser
 from django.contrib.auth.models import User
+from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import timedelta
 from .models import ChatRoom, Chat, ChatRoomParticipant, MessageReaction, MessageReply, PinnedMessage
-from .models import MediaFile
+from .models import MediaFile, AdminJob
 from .serializers import UserSerializer, ChatRoomSerializer, ChatSerializer
 from .serializers import MediaFileSerializer
+from .ai_cache import ai_response_cache
+from .admin_pagination import AdminPagination
+from .admin_search import search_queryset
+from . import admin_jobs, admin_stats, analytics
+from .media_store import release_chat_media
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework.permissions import IsAdminUser
@@ -24,30 +30,22 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         return request.user and request.user.is_staff
 
 
-class AdminPagination(PageNumberPagination):
-    """관리자 페이지네이션"""
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-
 class AdminUserViewSet(viewsets.ModelViewSet):
     """관리자용 유저 관리 ViewSet"""
-    queryset = User.objects.all().order_by('-date_joined')
+    queryset = User.objects.all().order_by('-id')
     serializer_class = UserSerializer
     permission_classes = [IsAdminOrReadOnly]
     pagination_class = AdminPagination
+    # auth_user.date_joined에는 인덱스가 없으므로 가입 순서와 같은 PK 역순으로 정렬
+    keyset_ordering = ('-id',)
 
     def get_queryset(self):
-        queryset = User.objects.all().order_by('-date_joined')
+        queryset = User.objects.all().order_by(*self.keyset_ordering)
         
         # 검색 필터
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(username__icontains=search) | 
-                Q(email__icontains=search)
-            )
+            queryset = search_queryset(queryset, search)
         
         # 상태 필터
         is_active = self.request.query_params.get('is_active', None)
@@ -90,8 +88,10 @@ class AdminUserViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def toggle_active(self, request, pk=None):
-        """유저 활성/비활성 토글"""
+        """유저 활성/비활성 토글 (삭제 작업이 끝나지 않은 유저는 409)"""
         user = self.get_object()
+        if user.id in admin_jobs.pending_delete_ids('delete_users'):
+            return Response({'error': '삭제 처리 중인 유저입니다.'}, status=status.HTTP_409_CONFLICT)
         user.is_active = not user.is_active
         user.save()
         return Response({
@@ -103,23 +103,17 @@ class AdminUserViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['delete'])
     def delete_user(self, request, pk=None):
-        """유저 삭제 (관련 데이터 포함)"""
+        """유저 삭제 (바로 비활성화, 메시지 등 관련 데이터는 백그라운드 작업으로 배치 삭제)"""
         user = self.get_object()
         username = user.username
         
         try:
-            # 관련 데이터 삭제
-            ChatRoomParticipant.objects.filter(user=user).delete()
-            Chat.objects.filter(user_id=user.id).delete()
-            MessageReaction.objects.filter(user=user).delete()
-            PinnedMessage.objects.filter(pinned_by=user).delete()
-            
-            # 유저 삭제
-            user.delete()
+            job = admin_jobs.purge_users([user.id], request.user)
             
             return Response({
                 'status': 'user deleted',
-                'username': username
+                'username': username,
+                'job': admin_jobs.job_payload(job)
             })
         except Exception as e:
             return Response({
@@ -129,18 +123,19 @@ class AdminUserViewSet(viewsets.ModelViewSet):
 
 class AdminRoomViewSet(viewsets.ModelViewSet):
     """관리자용 방 관리 ViewSet"""
-    queryset = ChatRoom.objects.all().order_by('-created_at')
+    queryset = ChatRoom.objects.all().order_by('-created_at', '-id')
     serializer_class = ChatRoomSerializer
     permission_classes = [IsAdminOrReadOnly]
     pagination_class = AdminPagination
+    keyset_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
-        queryset = ChatRoom.objects.all().order_by('-created_at')
+        queryset = ChatRoom.objects.all().order_by(*self.keyset_ordering)
         
         # 검색 필터
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(name__icontains=search)
+            queryset = search_queryset(queryset, search)
         
         # 타입 필터
         room_type = self.request.query_params.get('room_type', None)
@@ -161,8 +156,10 @@ class AdminRoomViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def toggle_active(self, request, pk=None):
-        """방 활성/비활성 토글"""
+        """방 활성/비활성 토글 (삭제 작업이 끝나지 않은 방은 409)"""
         room = self.get_object()
+        if room.id in admin_jobs.pending_delete_ids('delete_rooms'):
+            return Response({'error': '삭제 처리 중인 방입니다.'}, status=status.HTTP_409_CONFLICT)
         room.is_active = not room.is_active
         room.save()
         return Response({
@@ -174,21 +171,17 @@ class AdminRoomViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['delete'])
     def delete_room(self, request, pk=None):
-        """방 삭제 (관련 메시지 포함)"""
+        """방 삭제 (바로 비활성화, 관련 메시지는 백그라운드 작업으로 배치 삭제)"""
         room = self.get_object()
         room_name = room.name
         
         try:
-            # 관련 메시지 삭제
-            Chat.objects.filter(room=room).delete()
-            PinnedMessage.objects.filter(room=room).delete()
-            
-            # 방 삭제
-            room.delete()
+            job = admin_jobs.soft_delete_rooms([room.id], request.user)
             
             return Response({
                 'status': 'room deleted',
-                'room_name': room_name
+                'room_name': room_name,
+                'job': admin_jobs.job_payload(job)
             })
         except Exception as e:
             return Response({
@@ -198,18 +191,19 @@ class AdminRoomViewSet(viewsets.ModelViewSet):
 
 class AdminMessageViewSet(viewsets.ModelViewSet):
     """관리자용 메시지 관리 ViewSet"""
-    queryset = Chat.objects.all().order_by('-timestamp')
+    queryset = Chat.objects.all().order_by('-timestamp', '-id')
     serializer_class = ChatSerializer
     permission_classes = [IsAdminOrReadOnly]
     pagination_class = AdminPagination
+    keyset_ordering = ('-timestamp', '-id')
 
     def get_queryset(self):
-        queryset = Chat.objects.all().order_by('-timestamp')
+        queryset = Chat.objects.all().order_by(*self.keyset_ordering)
         
         # 검색 필터
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(content__icontains=search)
+            queryset = search_queryset(queryset, search)
         
         # 방 필터
         room_id = self.request.query_params.get('room_id', None)
@@ -241,7 +235,10 @@ class AdminMessageViewSet(viewsets.ModelViewSet):
             PinnedMessage.objects.filter(message=message).delete()
             
             # 메시지 삭제
-            message.delete()
+            with transaction.atomic():
+                release_chat_media(Chat.objects.filter(id=message.id))
+                admin_stats.subtract_deleted_rows(Chat.objects.filter(id=message.id))
+                message.delete()
             
             return Response({
                 'status': 'message deleted',
@@ -258,11 +255,11 @@ class AdminStatsView(APIView):
     permission_classes = [IsAdminOrReadOnly]
 
     def get(self, request):
-        """전체 통계 조회"""
+        """전체 통계 조회 (오늘/시계열은 일별 집계 테이블 기준, ?days=N 이면 최근 N일 시계열 포함)"""
+        admin_stats.schedule_admin_stats_refresh()
+
         # 기본 통계
-        user_count = User.objects.count()
-        room_count = ChatRoom.objects.count()
-        message_count = Chat.objects.count()
+        overview = admin_stats.overview_totals()
         
         # 활성 유저 수 (최근 30일)
         thirty_days_ago = timezone.now() - timedelta(days=30)
@@ -272,27 +269,17 @@ class AdminStatsView(APIView):
         
         # 최근 활동 통계
         today = timezone.now().date()
-        today_messages = Chat.objects.filter(
-            timestamp__date=today
-        ).count()
-        
-        today_rooms = ChatRoom.objects.filter(
-            created_at__date=today
-        ).count()
-        
-        today_users = User.objects.filter(
-            date_joined__date=today
-        ).count()
-        
-        # 방 타입별 통계
-        room_type_stats = ChatRoom.objects.values('room_type').annotate(
-            count=Count('id')
-        )
+        today_stats = admin_stats.day_totals(today)
         
-        # 메시지 타입별 통계
-        message_type_stats = Chat.objects.values('sender_type').annotate(
-            count=Count('id')
-        )
+        # 방 타입별 / 메시지(발신자) 타입별 통계
+        room_type_stats = admin_stats.room_type_totals()
+        message_type_stats = admin_stats.sender_type_totals()
+
+        try:
+            days = min(365, max(0, int(request.query_params.get('days', 0))))
+        except ValueError:
+            days = 0
+        time_series = admin_stats.daily_time_series(today - timedelta(days=days - 1), today) if days else []
         
         # 최근 메시지 (최근 10개)
         recent_messages = Chat.objects.select_related('room').order_by('-timestamp')[:10]
@@ -322,20 +309,52 @@ class AdminStatsView(APIView):
         
         return Response({
             'overview': {
-                'total_users': user_count,
-                'total_rooms': room_count,
-                'total_messages': message_count,
+                **overview,
                 'active_users_30d': active_users
             },
-            'today_stats': {
-                'new_messages': today_messages,
-                'new_rooms': today_rooms,
-                'new_users': today_users
-            },
-            'room_type_stats': list(room_type_stats),
-            'message_type_stats': list(message_type_stats),
+            'today_stats': today_stats,
+            'room_type_stats': room_type_stats,
+            'message_type_stats': message_type_stats,
+            'time_series': time_series,
+            'stats_updated_at': admin_stats.last_refreshed_at(),
             'recent_messages': recent_messages_data,
-            'recent_users': recent_users_data
+            'recent_users': recent_users_data,
+            'ai_response_cache': ai_response_cache.stats()
+        })
+
+
+class AdminAnalyticsView(APIView):
+    """관리자용 메시지 트래픽 분석 API (시간별 집계 테이블 범위 조회)
+
+    ?granularity=hour|day&start=&end=&group_by=room,sender_type,ai_name,ai_type,emotion
+     &room_id=&sender_type=&ai_name=&ai_type=&emotion=
+    """
+    permission_classes = [IsAdminOrReadOnly]
+
+    def get(self, request):
+        admin_stats.schedule_admin_stats_refresh()
+        granularity = request.query_params.get('granularity', 'hour')
+        start, end = analytics.default_range(granularity, timezone.now())
+        try:
+            if request.query_params.get('start'):
+                start = analytics.parse_bound(request.query_params['start'])
+            if request.query_params.get('end'):
+                end = analytics.parse_bound(request.query_params['end'])
+            if start is None or end is None:
+                raise analytics.AnalyticsQueryError('start/end는 ISO 8601 날짜 또는 시각이어야 합니다.')
+            group_by = [name for name in request.query_params.get('group_by', '').split(',') if name]
+            filters = {field: request.query_params.get(field) for field in analytics.FILTER_FIELDS}
+            result = analytics.message_traffic(start, end, granularity, group_by, filters)
+        except analytics.AnalyticsQueryError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'granularity': granularity,
+            'start': start,
+            'end': end,
+            'group_by': group_by,
+            'stats_updated_at': admin_stats.last_refreshed_at(),
+            **result,
         })
 
 
@@ -352,31 +371,30 @@ class AdminBulkActionView(APIView):
             return Response({
                 'error': 'action and ids are required'
             }, status=400)
+        try:
+            if not isinstance(target_ids, list):
+                raise TypeError(target_ids)
+            target_ids = [int(pk) for pk in target_ids]
+        except (TypeError, ValueError):
+            return Response({
+                'error': 'ids must be a list of integers'
+            }, status=400)
         
         try:
-            if action_type == 'delete_users':
-                deleted_count = User.objects.filter(id__in=target_ids).delete()[0]
-                return Response({
-                    'status': 'success',
-                    'action': 'delete_users',
-                    'deleted_count': deleted_count
-                })
-            
-            elif action_type == 'delete_rooms':
-                deleted_count = ChatRoom.objects.filter(id__in=target_ids).delete()[0]
-                return Response({
-                    'status': 'success',
-                    'action': 'delete_rooms',
-                    'deleted_count': deleted_count
-                })
-            
-            elif action_type == 'delete_messages':
-                deleted_count = Chat.objects.filter(id__in=target_ids).delete()[0]
+            if action_type in ('delete_users', 'delete_rooms', 'delete_messages'):
+                # 삭제는 백그라운드 작업으로 배치 처리 (진행 상황은 WebSocket admin_job_progress / jobs API)
+                if action_type == 'delete_users':
+                    job = admin_jobs.purge_users(target_ids, request.user)
+                elif action_type == 'delete_rooms':
+                    job = admin_jobs.soft_delete_rooms(target_ids, request.user)
+                else:
+                    job = admin_jobs.submit_job(action_type, {'ids': target_ids}, request.user)
                 return Response({
-                    'status': 'success',
-                    'action': 'delete_messages',
-                    'deleted_count': deleted_count
-                })
+                    'status': 'accepted',
+                    'action': action_type,
+                    'queued_count': len(target_ids),
+                    'job': admin_jobs.job_payload(job)
+                }, status=status.HTTP_202_ACCEPTED)
             
             elif action_type == 'deactivate_users':
                 updated_count = User.objects.filter(id__in=target_ids).update(is_active=False)
@@ -387,11 +405,14 @@ class AdminBulkActionView(APIView):
                 })
             
             elif action_type == 'activate_users':
-                updated_count = User.objects.filter(id__in=target_ids).update(is_active=True)
+                # 삭제 처리 중인 유저는 다시 활성화하지 않음
+                deleting = admin_jobs.pending_delete_ids('delete_users') & set(target_ids)
+                updated_count = User.objects.filter(id__in=target_ids).exclude(id__in=deleting).update(is_active=True)
                 return Response({
                     'status': 'success',
                     'action': 'activate_users',
-                    'updated_count': updated_count
+                    'updated_count': updated_count,
+                    'skipped_ids': sorted(deleting)
                 })
             
             else:
@@ -405,6 +426,36 @@ class AdminBulkActionView(APIView):
             }, status=500) 
 
 
+class AdminJobListView(APIView):
+    """관리자 백그라운드 작업 목록 (최근 50개, ?status= 로 필터)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        qs = AdminJob.objects.order_by('-created_at')
+        if request.query_params.get('status'):
+            qs = qs.filter(status=request.query_params['status'])
+        return Response([admin_jobs.job_payload(job) for job in qs[:50]])
+
+
+class AdminJobDetailView(APIView):
+    """관리자 백그라운드 작업 진행 상황 조회 / 실패한 작업 재시도 (POST)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        job = get_object_or_404(AdminJob, pk=pk)
+        return Response(admin_jobs.job_payload(job))
+
+    def post(self, request, pk):
+        job = get_object_or_404(AdminJob, pk=pk)
+        if job.status != 'failed':
+            return Response({'error': '실패한 작업만 다시 실행할 수 있습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        # 기록된 단계/처리 수는 그대로 두고 이어서 실행
+        AdminJob.objects.filter(pk=pk, status='failed').update(status='pending', error='', finished_at=None)
+        admin_jobs.submit_existing_job(pk)
+        job.refresh_from_db()
+        return Response(admin_jobs.job_payload(job), status=status.HTTP_202_ACCEPTED)
+
+
 # @method_decorator(csrf_exempt, name="dispatch")
 class AdminMediaUploadView(APIView):    
     permission_classes = [IsAdminUser]
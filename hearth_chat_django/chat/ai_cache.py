@@ -0,0 +1,119 @@
+"""AI 응답 캐시
+
+공개 방에서는 같은 질문(FAQ 등)이 같은 감정 상태, 같은 모델로 반복해서 들어온다.
+(제공자, 모델, 엔드포인트, 범위, 정규화된 프롬프트, 감정 전략, 이미지 해시)가 같으면 이전 응답을 재사용한다.
+
+- 범위(scope): 사용자별 서버 주소나 방/세션 RAG 컨텍스트로 답하는 제공자(Lily)는 사용자/방/세션을
+  키에 넣어 다른 사용자의 응답이 재사용되지 않도록 한다
+
+- 정확히 일치하는 프롬프트만 재사용 (공백/대소문자 정규화)
+- TTL이 지난 항목은 버리고, 최대 개수를 넘으면 가장 오래 쓰이지 않은 항목부터 제거 (LRU)
+- 방 단위 사용 여부는 ChatRoom.ai_response_cache_enabled 로 설정 (기본 꺼짐)
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+DEFAULT_TTL_SECONDS = 600
+DEFAULT_MAX_ENTRIES = 1000
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt):
+    """대소문자와 연속 공백 차이를 무시한 프롬프트"""
+    return _WHITESPACE_RE.sub(' ', (prompt or '').strip()).lower()
+
+
+def image_fingerprints(image_urls):
+    """이미지 목록의 식별 해시 (순서 무관). 내용 해시 경로의 blob은 내용 해시를 그대로 사용"""
+    from .media_store import content_hash_for_url
+    return sorted(
+        content_hash_for_url(url) or hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+        for url in image_urls or []
+    )
+
+
+def make_cache_key(provider, model, prompt, emotion_strategy, image_hashes=(), endpoint='', scope=''):
+    raw = "\x1f".join([
+        provider or '',
+        model or '',
+        endpoint or '',
+        scope or '',
+        normalize_prompt(prompt),
+        emotion_strategy or '',
+        ",".join(image_hashes),
+    ])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class AIResponseCache:
+    """프로세스 메모리 TTL + LRU 캐시"""
+
+    def __init__(self, ttl_seconds=None, max_entries=None):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (만료 시각, 응답 dict)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def ttl_seconds(self):
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return float(getattr(settings, 'AI_RESPONSE_CACHE_TTL', DEFAULT_TTL_SECONDS))
+
+    @property
+    def max_entries(self):
+        if self._max_entries is not None:
+            return self._max_entries
+        return max(1, int(getattr(settings, 'AI_RESPONSE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+ai_response_cache = AIResponseCache()
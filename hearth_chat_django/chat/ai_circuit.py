@@ -0,0 +1,212 @@
+"""AI 제공자 서킷 브레이커와 폴백 체인
+
+제공자(lily, huggingface, gemini)마다 연속 실패와 응답 지연을 추적한다.
+
+- CLOSED: 정상 호출
+- OPEN: 실패가 임계치를 넘으면 일정 시간 호출하지 않고 바로 다음 제공자로 넘어감 (fast-fail)
+- HALF_OPEN: 대기 시간이 지나면 요청 1건만 시험 호출(probe)하고, 성공하면 CLOSED로 복귀
+
+폴백 체인은 settings.AI_PROVIDER_FALLBACKS (예: {"lily": ["gemini"]})로 설정한다.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_BREAKER_SETTINGS = {
+    'failure_threshold': 3,     # 연속 실패 몇 번이면 OPEN
+    'recovery_timeout': 30,     # OPEN 유지 시간(초), 이후 HALF_OPEN 시험 호출
+    'slow_call_seconds': None,  # 이 시간보다 오래 걸린 성공도 실패로 집계 (None이면 미사용)
+}
+# 제공자별 기본값 (AI_CIRCUIT_BREAKER 설정이 우선)
+# Lily는 자체 호스팅 서버라 느려지는 경우가 잦으므로, 응답은 왔어도 30초 넘게 걸리면 실패로 집계해 폴백으로 넘어감
+DEFAULT_PROVIDER_BREAKER_SETTINGS = {
+    'lily': {'slow_call_seconds': 30},
+}
+DEFAULT_PROVIDER_FALLBACKS = {
+    'lily': ['gemini'],
+    'huggingface': ['gemini'],
+}
+# (연결 타임아웃, 응답 타임아웃) 초. 멈춘 서버가 호출을 오래 붙잡지 않도록 응답 대기는 60초까지
+DEFAULT_PROVIDER_TIMEOUTS = {
+    'lily': (5, 60),
+    'huggingface': (5, 120),
+    'gemini': (5, 60),
+}
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 호출하지 않은 경우"""
+
+
+class CircuitBreaker:
+    """제공자 1개의 서킷 상태"""
+
+    def __init__(self, name, failure_threshold=3, recovery_timeout=30, slow_call_seconds=None):
+        self.name = name
+        self._lock = threading.Lock()
+        self.configure(failure_threshold, recovery_timeout, slow_call_seconds)
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.total_calls = 0
+        self.total_failures = 0
+        self.avg_latency = None  # 지수 이동 평균(초)
+        self.last_error = None
+
+    def configure(self, failure_threshold=3, recovery_timeout=30, slow_call_seconds=None):
+        """임계치/대기 시간 변경 (현재 상태와 집계는 유지)"""
+        with self._lock:
+            self.failure_threshold = max(1, int(failure_threshold))
+            self.recovery_timeout = float(recovery_timeout)
+            self.slow_call_seconds = slow_call_seconds
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+            logger.info("AI 서킷 HALF_OPEN: %s (시험 호출 대기)", self.name)
+        return self._state
+
+    def available(self):
+        """호출 가능성이 있는지 (HALF_OPEN 시험 호출 슬롯은 예약하지 않음)"""
+        with self._lock:
+            state = self._current_state()
+            return state == CLOSED or (state == HALF_OPEN and not self._probe_in_flight)
+
+    def try_acquire(self):
+        """호출 허가를 받는다. HALF_OPEN이면 시험 호출 1건만 허용"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """결과 없이 끝난 호출(취소 등)의 시험 호출 슬롯 반환"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self, latency):
+        if self.slow_call_seconds and latency > self.slow_call_seconds:
+            self.record_failure(f"응답 지연 {latency:.1f}초", latency)
+            return
+        with self._lock:
+            self.total_calls += 1
+            self._observe_latency(latency)
+            if self._state != CLOSED:
+                logger.info("AI 서킷 CLOSED: %s (복구 확인)", self.name)
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error=None, latency=None):
+        with self._lock:
+            self.total_calls += 1
+            self.total_failures += 1
+            self.last_error = str(error)[:200] if error else None
+            if latency is not None:
+                self._observe_latency(latency)
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning("AI 서킷 OPEN: %s (연속 실패 %d회, 마지막 오류: %s)",
+                                   self.name, self._consecutive_failures, self.last_error)
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def _observe_latency(self, latency):
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = self.avg_latency * 0.8 + latency * 0.2
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'provider': self.name,
+                'state': self._current_state(),
+                'consecutive_failures': self._consecutive_failures,
+                'total_calls': self.total_calls,
+                'total_failures': self.total_failures,
+                'avg_latency': self.avg_latency,
+                'last_error': self.last_error,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def _breaker_settings(provider):
+    conf = dict(DEFAULT_BREAKER_SETTINGS)
+    conf.update(DEFAULT_PROVIDER_BREAKER_SETTINGS.get(provider, {}))
+    overrides = getattr(settings, 'AI_CIRCUIT_BREAKER', None) or {}
+    # 최상위 값은 전체 기본값, 제공자 이름 키의 dict는 해당 제공자 전용 값
+    conf.update({k: v for k, v in overrides.items() if not isinstance(v, dict)})
+    provider_overrides = overrides.get(provider)
+    if isinstance(provider_overrides, dict):
+        conf.update(provider_overrides)
+    return conf
+
+
+def get_circuit_breaker(provider):
+    """제공자 서킷 (상태는 프로세스 동안 유지, 설정은 부를 때마다 settings에서 다시 읽음)"""
+    conf = _breaker_settings(provider)
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(provider, **conf)
+            _breakers[provider] = breaker
+        else:
+            breaker.configure(**conf)
+        return breaker
+
+
+def reset_circuit_breakers():
+    """모든 제공자 서킷 상태 초기화"""
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def all_circuit_breakers():
+    with _breakers_lock:
+        return list(_breakers.values())
+
+
+def get_provider_chain(provider):
+    """기본 제공자 + 폴백 제공자 목록 (중복 제거)"""
+    fallbacks = dict(DEFAULT_PROVIDER_FALLBACKS)
+    fallbacks.update(getattr(settings, 'AI_PROVIDER_FALLBACKS', None) or {})
+    chain = [provider]
+    for fallback in fallbacks.get(provider, []):
+        if fallback not in chain:
+            chain.append(fallback)
+    return chain
+
+
+def get_provider_timeout(provider):
+    """requests용 (연결, 응답) 타임아웃"""
+    timeouts = dict(DEFAULT_PROVIDER_TIMEOUTS)
+    timeouts.update(getattr(settings, 'AI_PROVIDER_TIMEOUTS', None) or {})
+    value = timeouts.get(provider, (5, 60))
+    if isinstance(value, (int, float)):
+        return (5, float(value))
+    return tuple(value)
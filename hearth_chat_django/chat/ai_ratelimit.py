@@ -0,0 +1,241 @@
+"""AI 제공자별 토큰 버킷 속도 제한
+
+제공자/모델 단위로 토큰 버킷을 두고, 토큰이 없으면 요청을 실패시키는 대신 대기열에 넣는다.
+대기열은 사용자별 라운드로빈으로 처리해 한 사용자가 연속으로 보낸 요청이 다른 사용자를
+밀어내지 않도록 한다.
+
+- Redis 채널 레이어를 쓰는 배포: Redis(Lua 스크립트)에 버킷 상태를 저장 → 여러 서버가 한도를 공유
+- InMemoryChannelLayer 배포 또는 Redis 장애 시: 프로세스 메모리 버킷으로 폴백
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 분당 요청 수(rate_per_minute)와 순간 허용량(burst). settings.AI_RATE_LIMITS 로 덮어쓴다.
+# 키는 'provider' 또는 'provider:model' 형식이며, 'provider:model'이 우선한다.
+DEFAULT_RATE_LIMITS = {
+    'default': {'rate_per_minute': 30, 'burst': 5},
+    'gemini': {'rate_per_minute': 15, 'burst': 5},
+    'lily': {'rate_per_minute': 30, 'burst': 3},
+    'huggingface': {'rate_per_minute': 30, 'burst': 3},
+}
+DEFAULT_MAX_WAIT_SECONDS = 60
+
+TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', key, math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+
+class AIRateLimitExceeded(Exception):
+    """대기 시간 한도를 넘겨 AI 요청을 보내지 못한 경우"""
+
+
+class InMemoryTokenBucket:
+    """프로세스 로컬 토큰 버킷"""
+
+    def __init__(self):
+        self._buckets = {}
+
+    async def take(self, key, rate, burst):
+        """토큰 1개를 가져온다. 성공하면 0, 부족하면 다음 토큰까지 남은 초를 반환"""
+        now = time.monotonic()
+        tokens, ts = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + max(0.0, now - ts) * rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / rate
+
+
+class RedisTokenBucket:
+    """Redis 공유 토큰 버킷 (여러 Daphne 인스턴스가 같은 한도를 사용)"""
+
+    def __init__(self, url):
+        import redis.asyncio as aioredis
+        self._client = aioredis.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_LUA)
+
+    async def take(self, key, rate, burst):
+        wait = await self._script(keys=[f"ai_ratelimit:{key}"], args=[rate, burst])
+        if isinstance(wait, bytes):
+            wait = wait.decode()
+        return float(wait)
+
+
+class _FairQueue:
+    """사용자별 라운드로빈 대기열"""
+
+    def __init__(self):
+        self.waiters = OrderedDict()  # user_key -> deque[(future, on_queued)]
+        self.drain_task = None
+
+    def __bool__(self):
+        return any(self.waiters.values())
+
+    def push(self, user_key, future, on_queued):
+        self.waiters.setdefault(user_key, deque()).append((future, on_queued))
+
+    def discard_done(self):
+        for user_key in list(self.waiters):
+            pending = deque(w for w in self.waiters[user_key] if not w[0].done())
+            if pending:
+                self.waiters[user_key] = pending
+            else:
+                del self.waiters[user_key]
+
+    def pop(self):
+        """다음 차례의 대기자를 꺼낸다 (꺼낸 사용자는 순서 맨 뒤로)"""
+        self.discard_done()
+        if not self.waiters:
+            return None
+        user_key, pending = next(iter(self.waiters.items()))
+        waiter = pending.popleft()
+        if pending:
+            self.waiters.move_to_end(user_key)
+        else:
+            del self.waiters[user_key]
+        return waiter
+
+    def ordered(self):
+        """라운드로빈 처리 순서대로 (future, on_queued) 나열"""
+        queues = [list(pending) for pending in self.waiters.values()]
+        depth = max((len(q) for q in queues), default=0)
+        for i in range(depth):
+            for q in queues:
+                if i < len(q):
+                    yield q[i]
+
+
+class AIRateLimiter:
+    """제공자/모델 단위 속도 제한기"""
+
+    def __init__(self):
+        self._backend = None
+        self._fallback = InMemoryTokenBucket()
+        self._queues = {}
+
+    def _get_backend(self):
+        if self._backend is None:
+            layer_backend = settings.CHANNEL_LAYERS.get('default', {}).get('BACKEND', '')
+            redis_url = getattr(settings, 'REDIS_URL', None)
+            if redis_url and 'InMemoryChannelLayer' not in layer_backend:
+                try:
+                    self._backend = RedisTokenBucket(redis_url)
+                except Exception as e:
+                    logger.warning("Redis 속도 제한기 초기화 실패, 메모리 버킷 사용: %s", e)
+                    self._backend = self._fallback
+            else:
+                self._backend = self._fallback
+        return self._backend
+
+    def get_limits(self, provider, model=None):
+        """(초당 토큰 수, burst) 반환"""
+        limits = dict(DEFAULT_RATE_LIMITS)
+        limits.update(getattr(settings, 'AI_RATE_LIMITS', None) or {})
+        conf = (
+            (model and limits.get(f"{provider}:{model}"))
+            or limits.get(provider)
+            or limits['default']
+        )
+        rate = max(float(conf.get('rate_per_minute', 30)), 0.001) / 60.0
+        burst = max(float(conf.get('burst', 1)), 1.0)
+        return rate, burst
+
+    async def _take(self, key, rate, burst):
+        backend = self._get_backend()
+        try:
+            return await backend.take(key, rate, burst)
+        except Exception as e:
+            if backend is self._fallback:
+                raise
+            logger.warning("Redis 속도 제한기 오류, 메모리 버킷으로 폴백: %s", e)
+            return await self._fallback.take(key, rate, burst)
+
+    async def acquire(self, provider, model, user_key, on_queued=None, timeout=None):
+        """토큰을 얻을 때까지 대기한다.
+
+        바로 보낼 수 없으면 대기열에 들어가고, 순번이 바뀔 때마다 on_queued(position)이 호출된다.
+        timeout(기본 settings.AI_RATE_LIMIT_MAX_WAIT) 안에 차례가 오지 않으면 AIRateLimitExceeded.
+        """
+        key = f"{provider}:{model}" if model else provider
+        rate, burst = self.get_limits(provider, model)
+        queue = self._queues.setdefault(key, _FairQueue())
+
+        if not queue and await self._take(key, rate, burst) == 0:
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        queue.push(user_key, future, on_queued)
+        self._notify_positions(queue)
+        if queue.drain_task is None or queue.drain_task.done():
+            queue.drain_task = asyncio.ensure_future(self._drain(key, queue, rate, burst))
+
+        if timeout is None:
+            timeout = getattr(settings, 'AI_RATE_LIMIT_MAX_WAIT', DEFAULT_MAX_WAIT_SECONDS)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise AIRateLimitExceeded(f"{key} 요청 대기 시간 초과 ({timeout}초)")
+
+    async def _drain(self, key, queue, rate, burst):
+        try:
+            while True:
+                queue.discard_done()
+                if not queue:
+                    break
+                wait = await self._take(key, rate, burst)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+                waiter = queue.pop()
+                if waiter is None:
+                    break
+                waiter[0].set_result(True)
+                self._notify_positions(queue)
+        except Exception:
+            logger.exception("AI 속도 제한 대기열 처리 실패: %s", key)
+            for future, _ in queue.ordered():
+                if not future.done():
+                    future.set_exception(AIRateLimitExceeded(f"{key} 대기열 처리 실패"))
+        finally:
+            queue.drain_task = None
+            if not queue:
+                self._queues.pop(key, None)
+
+    def _notify_positions(self, queue):
+        for position, (future, on_queued) in enumerate(queue.ordered(), start=1):
+            if on_queued and not future.done():
+                asyncio.ensure_future(on_queued(position))
+
+    def queue_length(self, provider=None):
+        return sum(
+            sum(1 for _ in queue.ordered())
+            for key, queue in self._queues.items()
+            if provider is None or key.split(':', 1)[0] == provider
+        )
+
+
+ai_rate_limiter = AIRateLimiter()
@@ -0,0 +1,259 @@
+"""대화방 단위 AI 응답 스케줄러
+
+그룹/공개 방에서 여러 사람이 동시에 메시지를 보내면 메시지마다 AI를 호출하던 구조를
+방별 asyncio 작업 큐로 바꾼다.
+
+- 짧은 시간(디바운스) 안에 들어온 방의 메시지는 보낸 사람과 관계없이 하나의 프롬프트로 묶어 한 번만 호출
+  보낸 사람이 여럿인 묶음(ticket.shared)은 개인 AI 설정 대신 방 단위 설정으로 응답 (consumers.py)
+- 방마다 동시에 진행 중인 AI 호출 수 제한 (기본 1개)
+- 새 묶음이 준비되면 아직 제공자 호출을 시작하지 않은 이전 묶음은 취소하고 새 묶음에 합침
+  (제공자 호출을 시작한 묶음은 취소하지 않음)
+- 메시지가 계속 들어와도 가장 오래된 메시지가 max_defer_seconds 이상 미뤄지지 않음
+"""
+import asyncio
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE_SECONDS = 0.6
+DEFAULT_MAX_IN_FLIGHT = 1
+DEFAULT_MAX_BATCH = 10
+DEFAULT_MAX_DEFER_SECONDS = 5.0
+
+
+class AITicket:
+    """진행 중인 AI 호출 1건의 상태
+
+    핸들러는 제공자 호출 직전에 start_call(), 응답을 받은 뒤 commit()을 호출한다. 제공자 호출은
+    스레드에서 실행되어 되돌릴 수 없으므로 start_call 이후에는 새 메시지가 들어와도 취소하지 않는다.
+    """
+
+    def __init__(self, items, handlers, created_at):
+        self.items = items
+        self.handlers = handlers  # 묶음에 메시지를 넣은 보낸 사람(소켓)별 핸들러, 처음 제출된 순서
+        self.handler = handlers[-1]  # 응답을 만들 핸들러 (가장 최근 보낸 사람)
+        self.created_at = created_at  # 묶음에서 가장 오래된 메시지의 제출 시각 (loop.time())
+        self.task = None
+        self.started = False
+        self.committed = False
+        self.cancelled = False
+
+    @property
+    def shared(self):
+        """보낸 사람이 여럿인 묶음인지 (방 단위 AI 설정으로 응답)"""
+        return len(self.handlers) > 1
+
+    def start_call(self):
+        """제공자 호출 직전 확인. 이미 대체된 묶음이면 False (호출하지 말 것)"""
+        if self.cancelled:
+            return False
+        self.started = True
+        return True
+
+    def commit(self):
+        self.committed = True
+
+    def cancel(self):
+        self.cancelled = True
+        if self.task:
+            self.task.cancel()
+
+
+class _RoomState:
+    def __init__(self):
+        self.pending = []          # 아직 AI에 전달되지 않은 (item, handler, 제출 시각) 목록
+        self.debounce_task = None  # 디바운스 타이머 작업
+        self.flush_task = None     # 디바운스가 끝나 묶음을 처리 중인 작업
+        self.in_flight = []        # 진행 중인 AITicket 목록
+        self.lock = asyncio.Lock()
+
+
+def _unique_handlers(handlers):
+    unique = []
+    for handler in handlers:
+        if handler not in unique:
+            unique.append(handler)
+    return unique
+
+
+class RoomAIScheduler:
+    """방별 AI 요청 큐 (프로세스 단위)"""
+
+    def __init__(self, debounce_seconds=None, max_in_flight=None, max_batch=None, max_defer_seconds=None):
+        self._debounce_seconds = debounce_seconds
+        self._max_in_flight = max_in_flight
+        self._max_batch = max_batch
+        self._max_defer_seconds = max_defer_seconds
+        self._rooms = {}
+
+    @property
+    def debounce_seconds(self):
+        if self._debounce_seconds is not None:
+            return self._debounce_seconds
+        return float(getattr(settings, 'AI_COALESCE_DEBOUNCE_SECONDS', DEFAULT_DEBOUNCE_SECONDS))
+
+    @property
+    def max_in_flight(self):
+        if self._max_in_flight is not None:
+            return self._max_in_flight
+        return max(1, int(getattr(settings, 'AI_ROOM_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT)))
+
+    @property
+    def max_batch(self):
+        if self._max_batch is not None:
+            return self._max_batch
+        return max(1, int(getattr(settings, 'AI_COALESCE_MAX_BATCH', DEFAULT_MAX_BATCH)))
+
+    @property
+    def max_defer_seconds(self):
+        if self._max_defer_seconds is not None:
+            return self._max_defer_seconds
+        return float(getattr(settings, 'AI_COALESCE_MAX_DEFER_SECONDS', DEFAULT_MAX_DEFER_SECONDS))
+
+    def pending_count(self, room_key=None):
+        """대기 중 + 진행 중인 AI 작업 수"""
+        rooms = [self._rooms.get(room_key)] if room_key is not None else list(self._rooms.values())
+        return sum(len(state.pending) + len(state.in_flight) for state in rooms if state)
+
+    def task_counts(self):
+        """(묶음 대기 중인 메시지 수, 진행 중인 AI 호출 수) 전체 방 합계"""
+        rooms = list(self._rooms.values())
+        return sum(len(state.pending) for state in rooms), sum(len(state.in_flight) for state in rooms)
+
+    async def submit(self, room_key, item, handler):
+        """메시지 1건을 방 큐에 넣는다.
+
+        handler(items, ticket)는 묶인 메시지 목록으로 AI 응답을 만들어 전송하는 코루틴이다.
+        방의 메시지는 보낸 사람과 관계없이 묶이고, 묶음의 마지막 보낸 사람 handler가 호출된다.
+        """
+        now = asyncio.get_running_loop().time()
+        state = self._rooms.setdefault(room_key, _RoomState())
+        state.pending.append((item, handler, now))
+
+        if state.debounce_task and not state.debounce_task.done():
+            state.debounce_task.cancel()
+
+        if len(state.pending) >= self.max_batch:
+            delay = 0
+        else:
+            # 디바운스가 계속 연장되어도 가장 오래된 메시지는 max_defer_seconds 안에 처리
+            oldest = state.pending[0][2]
+            delay = min(self.debounce_seconds, max(0.0, oldest + self.max_defer_seconds - now))
+        state.debounce_task = asyncio.ensure_future(self._flush_later(room_key, delay))
+
+    async def _flush_later(self, room_key, delay):
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+        # 묶음 처리는 별도 작업으로: 이후 디바운스 취소가 꺼낸 묶음을 잃어버리지 않도록
+        state = self._rooms.get(room_key)
+        if state:
+            state.flush_task = asyncio.ensure_future(self._flush(room_key))
+
+    def _supersedable(self, ticket, now):
+        return (
+            not ticket.started
+            and not ticket.committed
+            and now - ticket.created_at < self.max_defer_seconds
+        )
+
+    async def _flush(self, room_key):
+        state = self._rooms.get(room_key)
+        if not state:
+            return
+        async with state.lock:
+            if not state.pending:
+                return
+            batch = state.pending
+            state.pending = []
+            items = [item for item, _, _ in batch]
+            handlers = _unique_handlers(handler for _, handler, _ in batch)
+            await self._start(room_key, state, items, handlers, batch[0][2])
+        self._release_if_idle(room_key)
+
+    async def _start(self, room_key, state, items, handlers, created_at):
+        # 진행 중인 호출이 한도에 도달하면 아직 호출 전인 묶음을 취소하고 메시지를 흡수,
+        # 그런 묶음이 없으면 하나가 끝날 때까지 대기
+        while len(state.in_flight) >= self.max_in_flight:
+            now = asyncio.get_running_loop().time()
+            superseded = next((t for t in state.in_flight if self._supersedable(t, now)), None)
+            if superseded is None:
+                await asyncio.wait([t.task for t in state.in_flight], return_when=asyncio.FIRST_COMPLETED)
+                continue
+            state.in_flight.remove(superseded)
+            superseded.cancel()
+            items = superseded.items + items
+            handlers = _unique_handlers(superseded.handlers + handlers)
+            created_at = min(created_at, superseded.created_at)
+            logger.info("AI 요청 대체: room=%s, 취소된 묶음 %d건", room_key, len(superseded.items))
+
+        ticket = AITicket(items, handlers, created_at)
+        ticket.task = asyncio.ensure_future(self._run(room_key, ticket, ticket.handler))
+        state.in_flight.append(ticket)
+
+    async def _run(self, room_key, ticket, handler):
+        try:
+            await handler(ticket.items, ticket)
+        except asyncio.CancelledError:
+            logger.debug("AI 요청 취소됨: room=%s", room_key)
+        except Exception:
+            logger.exception("AI 응답 처리 실패: room=%s", room_key)
+        finally:
+            state = self._rooms.get(room_key)
+            if state and ticket in state.in_flight:
+                state.in_flight.remove(ticket)
+            self._release_if_idle(room_key)
+
+    def _release_if_idle(self, room_key):
+        state = self._rooms.get(room_key)
+        if not state:
+            return
+        idle = not state.pending and not state.in_flight and not state.lock.locked() and (
+            state.debounce_task is None or state.debounce_task.done()
+        )
+        if idle:
+            self._rooms.pop(room_key, None)
+
+
+def coalesce_items(items, shared=False):
+    """묶인 메시지 목록을 AI 호출 1건의 입력으로 합친다.
+
+    shared(보낸 사람이 여럿)이면 한 사람이 보낸 클라이언트 AI 설정은 쓰지 않는다.
+    """
+    last = items[-1]
+    if len(items) == 1:
+        message = last.get('message') or ''
+    else:
+        lines = []
+        for item in items:
+            text = item.get('message') or ''
+            if not text and item.get('image_urls'):
+                text = '[이미지 첨부]'
+            speaker = item.get('username')
+            lines.append(f"{speaker}: {text}" if speaker else text)
+        message = "\n".join(lines)
+
+    image_urls = []
+    for item in items:
+        for url in item.get('image_urls') or []:
+            if url not in image_urls:
+                image_urls.append(url)
+
+    documents = next((item['documents'] for item in reversed(items) if item.get('documents')), [])
+
+    return {
+        'message': message,
+        'emotion': last.get('emotion') or 'neutral',
+        'image_url': last.get('image_url') or (image_urls[0] if image_urls else ''),
+        'image_urls': image_urls,
+        'documents': documents,
+        'user_message_obj': last.get('user_message_obj'),
+        'client_ai_settings': None if shared else last.get('client_ai_settings'),
+    }
+
+
+ai_scheduler = RoomAIScheduler()
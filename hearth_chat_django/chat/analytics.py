@@ -0,0 +1,103 @@
+"""메시지 트래픽 시간대별 분석
+
+HourlyTrafficStat / DailyTrafficStat(chat/admin_stats.py 에서 증분 집계)만 범위 조회하므로
+chat_chat 크기와 무관하게 응답 시간이 (조회 기간 × 차원 조합 수)에 비례한다.
+
+- granularity: hour | day (각각 시간별/일별 집계 테이블 사용)
+- group_by: room, sender_type, ai_name, ai_type, emotion 중 0개 이상
+- 필터: room_id, sender_type, ai_name, ai_type, emotion
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import DailyTrafficStat, HourlyTrafficStat
+
+# granularity → (집계 테이블, 버킷 필드)
+GRANULARITIES = {
+    'hour': (HourlyTrafficStat, 'hour'),
+    'day': (DailyTrafficStat, 'date'),
+}
+GROUP_FIELDS = {
+    'room': 'room_id',
+    'sender_type': 'sender_type',
+    'ai_name': 'ai_name',
+    'ai_type': 'ai_type',
+    'emotion': 'emotion',
+}
+FILTER_FIELDS = ('room_id', 'sender_type', 'ai_name', 'ai_type', 'emotion')
+MAX_HOUR_RANGE = timedelta(days=31)
+MAX_DAY_RANGE = timedelta(days=366)
+
+
+class AnalyticsQueryError(ValueError):
+    """잘못된 분석 조회 조건 (메시지는 사용자에게 그대로 전달)"""
+
+
+def parse_bound(value):
+    """'2024-05-01' 또는 '2024-05-01T09:00:00' → aware datetime (형식이 틀리면 None)"""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def default_range(granularity, now):
+    """hour: 최근 24시간, day: 최근 30일"""
+    if granularity == 'hour':
+        end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        return end - timedelta(hours=24), end
+    end = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return end - timedelta(days=30), end
+
+
+def message_traffic(start, end, granularity='hour', group_by=(), filters=None):
+    """[start, end) 구간 버킷별 메시지 수
+
+    반환: {'series': [{'bucket', <group_by 필드>..., 'count'}], 'total': int}
+    """
+    if granularity not in GRANULARITIES:
+        raise AnalyticsQueryError(f'granularity는 {", ".join(GRANULARITIES)} 중 하나여야 합니다.')
+    unknown = [name for name in group_by if name not in GROUP_FIELDS]
+    if unknown:
+        raise AnalyticsQueryError(f'지원하지 않는 group_by: {", ".join(unknown)}')
+    if end <= start:
+        raise AnalyticsQueryError('end는 start보다 뒤여야 합니다.')
+    if end - start > (MAX_HOUR_RANGE if granularity == 'hour' else MAX_DAY_RANGE):
+        raise AnalyticsQueryError('조회 기간이 너무 깁니다. (시간별 31일, 일별 366일까지)')
+
+    model, bucket_field = GRANULARITIES[granularity]
+    if granularity == 'day':
+        # 일 단위로 맞춤 (end가 자정이 아니면 그날까지 포함)
+        end_date = timezone.localdate(end)
+        if timezone.localtime(end).time() != time.min:
+            end_date += timedelta(days=1)
+        start, end = timezone.localdate(start), end_date
+    qs = model.objects.filter(**{f'{bucket_field}__gte': start, f'{bucket_field}__lt': end})
+    for field, value in (filters or {}).items():
+        if field in FILTER_FIELDS and value not in (None, ''):
+            qs = qs.filter(**{field: value})
+
+    group_fields = [GROUP_FIELDS[name] for name in group_by]
+    rows = qs.annotate(bucket=F(bucket_field)).values('bucket', *group_fields).annotate(
+        count=Sum('count')
+    ).order_by('bucket', *group_fields)
+
+    series = []
+    total = 0
+    for row in rows:
+        item = {'bucket': row['bucket'].isoformat()}
+        for name in group_by:
+            item[name] = row[GROUP_FIELDS[name]]
+        item['count'] = row['count']
+        total += row['count']
+        series.append(item)
+    return {'series': series, 'total': total}
@@ -0,0 +1,167 @@
+"""에셋(미디어/정적 파일) 존재 여부 메모리 색인
+
+아바타(VRM)나 미디어가 많은 화면은 로드 시 file_exists를 파일마다 순서대로 호출했다.
+배치 API(assets/exists/)는 이 색인에서 경로별 존재 여부, 크기, ETag를 한 번에 돌려준다.
+
+- 정적 파일(STATIC_ROOT): 배포 시에만 바뀌므로 통째로 메모리에 올리고 ASSET_INDEX_STATIC_TTL마다 다시 읽음
+- 미디어: MediaIndexEntry가 기준. 조회 결과(없는 경로 포함)를 메모리에 보관하고 저장소는 조회하지 않음
+  (색인 밖에서 저장소에 넣은 파일은 `python manage.py rebuild_media_index` 로 반영)
+  저장소가 바뀌면(media_index.index_file/unindex_paths) 바뀐 경로 목록을 캐시에 버전별로 남기고 버전 키를 올린다.
+  각 프로세스는 다음 조회 때 밀린 버전의 경로만 메모리에서 버린다.
+  (변경 기록이 만료됐거나 너무 많이 밀렸으면, 또는 전체 재구성이면 통째로 비움)
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import MediaIndexEntry
+
+VERSION_CACHE_KEY = 'chat:asset_index:version'
+CHANGE_CACHE_KEY_PREFIX = 'chat:asset_index:change:'
+CHANGE_TTL_SECONDS = 3600
+MAX_PENDING_CHANGES = 1000
+ALL_PATHS = '*'
+DEFAULT_STATIC_TTL_SECONDS = 300
+DEFAULT_MAX_MEDIA_ENTRIES = 50000
+
+
+def make_etag(size, mtime=None, sha256=''):
+    """내용 해시가 있으면 강한 ETag, 없으면 크기/수정 시각 기반 약한 ETag"""
+    if sha256:
+        return f'"{sha256[:32]}"'
+    return f'W/"{size:x}-{int(mtime or 0):x}"'
+
+
+def _entry_for_row(row):
+    mtime = row['mtime'].timestamp() if row['mtime'] else 0
+    return {'size': row['size'], 'etag': make_etag(row['size'], mtime, row['sha256'])}
+
+
+def _static_path(path):
+    return path[len('static/'):] if path.startswith('static/') else path
+
+
+def _current_version():
+    try:
+        return cache.get(VERSION_CACHE_KEY, 0)
+    except Exception:
+        return 0
+
+
+class AssetIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._media = {}        # 저장소 경로 -> {'size', 'etag'} 또는 None(없음)
+        self._media_version = None
+        self._static = None     # STATIC_ROOT 상대 경로 -> {'size', 'etag'}
+        self._static_loaded_at = 0.0
+
+    @property
+    def static_ttl(self):
+        return float(getattr(settings, 'ASSET_INDEX_STATIC_TTL', DEFAULT_STATIC_TTL_SECONDS))
+
+    @property
+    def max_media_entries(self):
+        return int(getattr(settings, 'ASSET_INDEX_MAX_MEDIA_ENTRIES', DEFAULT_MAX_MEDIA_ENTRIES))
+
+    def invalidate(self, paths=None):
+        """저장소 변경 알림 (paths=None이면 전체). 이 프로세스는 바로 버리고, 다른 프로세스는 변경 기록으로 알게 됨"""
+        paths = None if paths is None else list(paths)
+        with self._lock:
+            if paths is None:
+                self._media.clear()
+            else:
+                for path in paths:
+                    self._media.pop(path, None)
+        try:
+            if cache.add(VERSION_CACHE_KEY, 1, timeout=None):
+                version = 1
+            else:
+                version = cache.incr(VERSION_CACHE_KEY)
+            cache.set(f"{CHANGE_CACHE_KEY_PREFIX}{version}", ALL_PATHS if paths is None else paths,
+                      timeout=CHANGE_TTL_SECONDS)
+        except Exception:
+            pass
+
+    def _sync_media(self):
+        """다른 프로세스의 변경분 반영. 밀린 버전에 기록된 경로만 버림"""
+        version = _current_version()
+        with self._lock:
+            seen = self._media_version
+        if version == seen:
+            return
+        changed = None
+        if seen is not None and seen < version and version - seen <= MAX_PENDING_CHANGES:
+            keys = [f"{CHANGE_CACHE_KEY_PREFIX}{v}" for v in range(seen + 1, version + 1)]
+            try:
+                changes = cache.get_many(keys)
+            except Exception:
+                changes = {}
+            if len(changes) == len(keys) and ALL_PATHS not in changes.values():
+                changed = [path for paths in changes.values() for path in paths]
+        with self._lock:
+            if changed is None:
+                self._media.clear()
+            else:
+                for path in changed:
+                    self._media.pop(path, None)
+            self._media_version = version
+
+    def reload_static(self):
+        static_root = getattr(settings, 'STATIC_ROOT', None)
+        entries = {}
+        if static_root and os.path.isdir(static_root):
+            for root, dirs, files in os.walk(static_root):
+                for name in files:
+                    abs_path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(abs_path)
+                    except OSError:
+                        continue
+                    rel_path = os.path.relpath(abs_path, static_root).replace(os.sep, '/')
+                    entries[rel_path] = {'size': stat.st_size, 'etag': make_etag(stat.st_size, stat.st_mtime)}
+        with self._lock:
+            self._static = entries
+            self._static_loaded_at = time.monotonic()
+
+    def _static_entries(self):
+        if self._static is None or time.monotonic() - self._static_loaded_at > self.static_ttl:
+            self.reload_static()
+        return self._static
+
+    def _media_entries(self, paths):
+        """미디어 경로 조회. 메모리에 없는 경로만 색인(DB)에서 한 번에 읽음 (색인에 없으면 없는 파일)"""
+        self._sync_media()
+        with self._lock:
+            found = {path: self._media[path] for path in paths if path in self._media}
+        missing = [path for path in paths if path not in found]
+        if missing:
+            rows = {
+                row['path']: _entry_for_row(row)
+                for row in MediaIndexEntry.objects.filter(path__in=missing).values('path', 'size', 'sha256', 'mtime')
+            }
+            with self._lock:
+                if len(self._media) + len(missing) > self.max_media_entries:
+                    self._media.clear()
+                for path in missing:
+                    found[path] = self._media[path] = rows.get(path)
+        return found
+
+    def lookup(self, rel_paths):
+        """저장소 상대 경로 목록 → {경로: {'size', 'etag'} 또는 None}"""
+        rel_paths = [path for path in dict.fromkeys(rel_paths) if path]
+        static = self._static_entries()
+        media = self._media_entries(rel_paths)
+        result = {}
+        for path in rel_paths:
+            entry = media.get(path)
+            if entry is None:
+                entry = static.get(_static_path(path))
+            result[path] = entry
+        return result
+
+
+asset_index = AssetIndex()
@@ -1,18 +1,34 @@
 from datetime import datetime
+import asyncio
 import json
+import logging
 import os
+import time
 import uuid
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from dotenv import load_dotenv
 from asgiref.sync import sync_to_async
 from openai import OpenAI
 
+from . import metrics
+from .admin_jobs import PROGRESS_GROUP as ADMIN_JOB_PROGRESS_GROUP
+from .ai_cache import ai_response_cache, image_fingerprints, make_cache_key
+from .ai_circuit import CircuitOpenError, get_circuit_breaker, get_provider_chain, get_provider_timeout
+from .ai_ratelimit import ai_rate_limiter, AIRateLimitExceeded
+from .ai_scheduler import ai_scheduler, coalesce_items
+from .image_loader import ImageLoader, ImageLoadError
+from .image_preprocess import extension_for_mime
+from .query_stats import log_query_stats, track_queries
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 max_length = 2000
 max_new_tokens = 1000
 image_short_side_limit = 128
-time_limit = 3000
+default_lily_model = 'kanana-1.5-v-3b-instruct'
 
 class ChatConsumer(AsyncWebsocketConsumer):
     def __init__(self, *args, **kwargs):
@@ -20,6 +36,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         self.session_id = None
         self.user_emotion_history = []  # 감정 변화 추적
         self.conversation_context = []  # 대화 컨텍스트 저장
+        self.connected = False
     
     def _force_utf8mb4_connection(self):
         """MySQL 연결을 강제로 utf8mb4로 설정 (동기 버전)"""
@@ -45,14 +62,12 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 
                 for command in utf8mb4_commands:
                     cursor.execute(command)
-                print("✅ MySQL utf8mb4 설정 완료")
-            else:
-                print(f"ℹ️ MySQL 환경이 아님 (현재: {connection.vendor})")
-            
+                logger.debug("MySQL utf8mb4 설정 완료")
+
             cursor.close()            
             
         except Exception as e:
-            print(f"MySQL utf8mb4 설정 오류: {e}")
+            logger.warning("MySQL utf8mb4 설정 오류: %s", e)
 
     @sync_to_async
     def _force_utf8mb4_connection_async(self):
@@ -76,24 +91,24 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if user.is_authenticated:
             # 인증된 사용자일 경우에만 연결을 수락
             await self.accept()
-            print(f"✅ 인증된 사용자 '{user.username}'의 연결을 수락했습니다.")
+            self.connected = True
+            metrics.ws_connections.inc()
+            logger.debug("WebSocket 연결 수락: user=%s", user.username)
 
             # 세션 ID 생성
             self.session_id = str(uuid.uuid4())
 
             # 대화방 목록 업데이트 그룹에 참여
-            await self.channel_layer.group_add(
-                'chat_room_list',
-                self.channel_name
-            )
+            await self.join_group('chat_room_list')
+
+            # 관리자는 백그라운드 작업 진행 이벤트 그룹에도 참여
+            if user.is_staff:
+                await self.join_group(ADMIN_JOB_PROGRESS_GROUP)
 
             # URL 경로 기반 자동 조인
             try:
                 if self.path_room_id:
-                    await self.channel_layer.group_add(
-                        f'chat_room_{self.path_room_id}',
-                        self.channel_name
-                    )
+                    await self.join_group(f'chat_room_{self.path_room_id}')
                     await self.send(text_data=json.dumps({
                         'type': 'join_ack',
                         'roomId': self.path_room_id,
@@ -108,25 +123,45 @@ class ChatConsumer(AsyncWebsocketConsumer):
         else:
             # 인증되지 않은 사용자는 연결을 즉시 거부
             await self.close()
-            print("❌ 비인증 사용자의 웹소켓 연결을 거부했습니다.")
+            logger.info("비인증 사용자의 WebSocket 연결을 거부했습니다.")
 
     async def disconnect(self, close_code):        
-        # 대화방 목록 업데이트 그룹에서 나가기
-        await self.channel_layer.group_discard(
-            'chat_room_list',
-            self.channel_name
-        )
+        if self.connected:
+            self.connected = False
+            metrics.ws_connections.dec()
+        # 대화방 목록/관리자 작업/입장한 대화방 그룹에서 모두 나가기
+        for group in metrics.ws_groups.groups_of(self.channel_name):
+            await self.leave_group(group)
+
+    async def join_group(self, group):
+        await self.channel_layer.group_add(group, self.channel_name)
+        metrics.ws_groups.add(group, self.channel_name)
+
+    async def leave_group(self, group):
+        await self.channel_layer.group_discard(group, self.channel_name)
+        metrics.ws_groups.discard(group, self.channel_name)
 
     async def receive(self, text_data):        
         if not text_data:
             await self.send(text_data=json.dumps({'message': "빈 메시지는 처리할 수 없습니다."}))
             return
         try:
-            data = json.loads(text_data)
+            with metrics.timed(metrics.ws_stage_duration, stage='parse'):
+                data = json.loads(text_data)
         except json.JSONDecodeError:
             await self.send(text_data=json.dumps({'message': "잘못된 형식의 메시지입니다. JSON 형식으로 보내주세요."}))
             return
-        
+
+        # 메시지 하나를 처리하며 실행한 DB 쿼리 집계 (sync_to_async 호출 포함)
+        message_type = data.get("type") or "chat"
+        with track_queries() as stats:
+            await self.handle_message(data)
+        metrics.ws_message_db_queries.observe(stats.count, message_type=message_type)
+        metrics.ws_message_db_duration.observe(stats.elapsed, message_type=message_type)
+        if log_query_stats(stats, f'WebSocket {message_type} message'):
+            metrics.repeated_queries.inc(scope='ws', name=message_type)
+
+    async def handle_message(self, data):
         # WebRTC 시그널링 메시지 처리
         message_type = data.get("type", "")
         if message_type in ["offer", "answer", "ice_candidate", "participants_update"]:
@@ -138,10 +173,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             room_id = data.get("roomId", "")
             if room_id:
                 # 해당 방의 그룹에 참여
-                await self.channel_layer.group_add(
-                    f'chat_room_{room_id}',
-                    self.channel_name
-                )                
+                await self.join_group(f'chat_room_{room_id}')
                 # 조인 ACK 전송 (클라이언트는 이 신호로 로딩 해제)
                 try:
                     await self.send(text_data=json.dumps({
@@ -187,12 +219,12 @@ class ChatConsumer(AsyncWebsocketConsumer):
         documents = data.get("documents", [])  # 문서 정보 배열
         room_id = data.get("roomId", "")  # 대화방 ID 추가
         client_id = data.get("client_id")
+        received_at = time.perf_counter()
 
-        print(f"[DEBUG] WebSocket 메시지 수신:")
-        print(f"[DEBUG] user_message: {user_message}")
-        print(f"[DEBUG] image_urls: {image_urls}")
-        print(f"[DEBUG] documents: {documents}")
-        print(f"[DEBUG] room_id: {room_id}")
+        logger.debug(
+            "WebSocket 메시지 수신: room_id=%s, 길이=%d, 이미지=%d, 문서=%d",
+            room_id, len(user_message or ''), len(image_urls or []), len(documents or []),
+        )
         
         # 단일 이미지 URL을 배열로 변환 (호환성 유지)
         if image_url and not image_urls:
@@ -211,47 +243,30 @@ class ChatConsumer(AsyncWebsocketConsumer):
         first_image_url = image_urls[0] if image_urls else image_url
         # imageUrls를 JSON으로 저장
         image_urls_json = json.dumps(image_urls) if image_urls else None
-        user_message_obj = await self.save_user_message(user_message or '[이미지 첨부]', room_id, user_emotion, user_obj, first_image_url, image_urls_json)        
-        
-        try:
-            debug_event = {
-                'type': 'user_message',
-                'message': user_message or '[이미지 첨부]',
-                'roomId': room_id,
-                'sender': (
-                    user_message_obj.username if user_message_obj and hasattr(user_message_obj, 'sender_type') and user_message_obj.sender_type == 'user' else (
-                        user_message_obj.ai_name if user_message_obj and hasattr(user_message_obj, 'sender_type') and user_message_obj.sender_type == 'ai' else 'System'
-                    )
-                ) if user_message_obj else 'Unknown',
-                'user_id': user_message_obj.user_id if user_message_obj and hasattr(user_message_obj, 'user_id') else None,
-                'timestamp': user_message_obj.timestamp.isoformat() if user_message_obj and hasattr(user_message_obj, 'timestamp') else None,
-                'emotion': user_emotion,
-                'imageUrl': first_image_url,  # 첫 번째 이미지 URL
-                'imageUrls': image_urls  # 다중 이미지 URL 배열 추가
-            }            
-        except Exception as e:
-            print(f"[DEBUG][group_send][user_message] event 출력 오류: {e}")
-            
-        await self.channel_layer.group_send(
-            f'chat_room_{room_id}',
-            {
-                'type': 'user_message',
-                'id': user_message_obj.id,  # 메시지 ID 추가
-                'message': user_message or '[이미지 첨부]',
-                'roomId': room_id,
-                'sender': (
-                    user_message_obj.username if user_message_obj.sender_type == 'user' else (
-                        user_message_obj.ai_name if user_message_obj.sender_type == 'ai' else 'System'
-                    )
-                ),
-                'user_id': user_message_obj.user_id if hasattr(user_message_obj, 'user_id') else None,  # user_id 추가
-                'timestamp': user_message_obj.timestamp.isoformat(),
-                'emotion': user_emotion,
-                'imageUrl': first_image_url,  # 첫 번째 이미지 URL (호환성 유지)
-                'imageUrls': image_urls,  # 다중 이미지 URL 배열 추가
-                'client_id': client_id
-            }
-        )
+        with metrics.timed(metrics.ws_stage_duration, stage='save_user_message'):
+            user_message_obj = await self.save_user_message(user_message or '[이미지 첨부]', room_id, user_emotion, user_obj, first_image_url, image_urls_json)        
+
+        with metrics.timed(metrics.ws_stage_duration, stage='group_send'):
+            await self.channel_layer.group_send(
+                f'chat_room_{room_id}',
+                {
+                    'type': 'user_message',
+                    'id': user_message_obj.id,  # 메시지 ID 추가
+                    'message': user_message or '[이미지 첨부]',
+                    'roomId': room_id,
+                    'sender': (
+                        user_message_obj.username if user_message_obj.sender_type == 'user' else (
+                            user_message_obj.ai_name if user_message_obj.sender_type == 'ai' else 'System'
+                        )
+                    ),
+                    'user_id': user_message_obj.user_id if hasattr(user_message_obj, 'user_id') else None,  # user_id 추가
+                    'timestamp': user_message_obj.timestamp.isoformat(),
+                    'emotion': user_emotion,
+                    'imageUrl': first_image_url,  # 첫 번째 이미지 URL (호환성 유지)
+                    'imageUrls': image_urls,  # 다중 이미지 URL 배열 추가
+                    'client_id': client_id
+                }
+            )
 
         # NOTE: 예전에는 그룹 전송 이후 동일 메시지를 현재 소켓으로 한 번 더 에코했습니다.
         # 이로 인해 동일 메시지가 2번 수신되어 UI에 중복 표시되는 문제가 있어 주석 처리합니다.
@@ -286,32 +301,70 @@ class ChatConsumer(AsyncWebsocketConsumer):
         user = getattr(self, 'scope', {}).get('user', None)
         ai_response_enabled = True
         if user and hasattr(user, 'is_authenticated') and user.is_authenticated:
-            ai_response_enabled = await get_ai_response_enabled(user)
+            with metrics.timed(metrics.ws_stage_duration, stage='settings'):
+                ai_response_enabled = await get_ai_response_enabled(user)
         if not ai_response_enabled:
-            print('[AI 응답 OFF] 사용자 설정에 따라 AI 응답을 건너뜁니다.')
+            logger.debug("사용자 설정에 따라 AI 응답을 건너뜁니다: room_id=%s", room_id)
             return
 
-        try:            
-            # 모든 이미지 URL을 AI 응답에 전달
-            # 클라이언트에서 넘어온 AI 설정이 있으면 우선 적용하도록 전달
-            client_ai_settings = {
-                'aiProvider': data.get('aiProvider'),
-                'lilyApiUrl': data.get('lilyApiUrl'),
-                'lilyModel': data.get('lilyModel'),
-                'geminiModel': data.get('geminiModel'),
-            }
-            # None 값 제거
-            client_ai_settings = {k: v for k, v in client_ai_settings.items() if v is not None}
-
-            ai_response_result = await self.get_ai_response(
-                user_message,
-                user_emotion,
-                image_urls,
-                documents,
-                room_id=room_id,
-                session_id=self.session_id,
-                client_ai_settings=client_ai_settings if client_ai_settings else None,
-            )            
+        # 클라이언트에서 넘어온 AI 설정이 있으면 우선 적용하도록 전달
+        client_ai_settings = {
+            'aiProvider': data.get('aiProvider'),
+            'lilyApiUrl': data.get('lilyApiUrl'),
+            'lilyModel': data.get('lilyModel'),
+            'geminiModel': data.get('geminiModel'),
+        }
+        # None 값 제거
+        client_ai_settings = {k: v for k, v in client_ai_settings.items() if v is not None}
+
+        # 방 단위 스케줄러에 등록 (짧은 시간 안의 메시지는 하나의 프롬프트로 묶어 처리)
+        await ai_scheduler.submit(
+            room_id or f"session_{self.session_id}",
+            {
+                'message': user_message,
+                'emotion': user_emotion,
+                'image_url': image_url,
+                'image_urls': image_urls,
+                'documents': documents,
+                'room_id': room_id,
+                'username': user_message_obj.username,
+                'user_message_obj': user_message_obj,
+                'client_ai_settings': client_ai_settings if client_ai_settings else None,
+                'received_at': received_at,
+            },
+            self.respond_with_ai,
+        )
+
+    async def respond_with_ai(self, items, ticket):
+        """스케줄러가 묶어 준 메시지들에 대한 AI 응답 생성 및 방 전체 전송"""
+        # 여러 사람의 메시지가 묶였으면 보낸 사람 한 명의 개인 설정 대신 방 단위 설정으로 응답
+        batch = coalesce_items(items, shared=ticket.shared)
+        room_id = items[-1].get('room_id', '')
+        user_message = batch['message']
+        user_emotion = batch['emotion']
+        image_url = batch['image_url']
+        image_urls = batch['image_urls']
+        documents = batch['documents']
+        user_message_obj = batch['user_message_obj']
+        # 묶음에서 가장 먼저 받은 메시지 기준 (사용자가 기다린 시간)
+        received_at = min((item['received_at'] for item in items if item.get('received_at')), default=None)
+
+        try:
+            # 모든 이미지 URL을 AI 응답에 전달 (폴백/속도 제한 대기 포함, 제공자별 시간은 ai_provider_request_seconds)
+            with metrics.timed(metrics.ws_stage_duration, stage='ai_response'):
+                ai_response_result = await self.get_ai_response(
+                    user_message,
+                    user_emotion,
+                    image_urls,
+                    documents,
+                    room_id=room_id,
+                    session_id=self.session_id,
+                    client_ai_settings=batch['client_ai_settings'],
+                    ticket=ticket,
+                    room_level=ticket.shared,
+                )
+            # 제공자 응답 수신 이후는 저장/전송 단계이므로 새 메시지가 와도 취소하지 않음
+            ticket.commit()
             
             # AI 응답 결과에서 정보 추출
             ai_response = ai_response_result['response']
@@ -319,21 +372,22 @@ class ChatConsumer(AsyncWebsocketConsumer):
             ai_name = ai_response_result['ai_name']
             ai_type = ai_response_result['ai_type']
             
-            print(f"✅ 실제 사용된 API: {actual_provider}, AI 이름: {ai_name}")
-            
-            # AI 응답을 DB에 저장 (question_message와 image_urls를 명시적으로 전달)
-            ai_message_obj = await self.save_ai_message(
-                ai_response, 
-                room_id, 
-                ai_name=ai_name, 
-                ai_type=ai_type, 
-                question_message=user_message_obj,  # user_message_obj를 명시적으로 전달
-                image_urls_json=json.dumps(image_urls) if image_urls else None  # 이미지 URL 배열을 JSON으로 저장
-            )
+            logger.debug("AI 응답 수신: provider=%s, ai_name=%s", actual_provider, ai_name)
             
-            # FK select_related로 새로 불러오기
-            from .models import Chat
-            ai_message_obj = await sync_to_async(lambda: Chat.objects.select_related('question_message').get(id=ai_message_obj.id))()
+            with metrics.timed(metrics.ws_stage_duration, stage='ai_save'):
+                # AI 응답을 DB에 저장 (question_message와 image_urls를 명시적으로 전달)
+                ai_message_obj = await self.save_ai_message(
+                    ai_response, 
+                    room_id, 
+                    ai_name=ai_name, 
+                    ai_type=ai_type, 
+                    question_message=user_message_obj,  # user_message_obj를 명시적으로 전달
+                    image_urls_json=json.dumps(image_urls) if image_urls else None  # 이미지 URL 배열을 JSON으로 저장
+                )
+                
+                # FK select_related로 새로 불러오기
+                from .models import Chat
+                ai_message_obj = await sync_to_async(lambda: Chat.objects.select_related('question_message').get(id=ai_message_obj.id))()
 
             # 대화 컨텍스트 업데이트
             self.conversation_context.append({
@@ -345,25 +399,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
             if len(self.conversation_context) > 10:
                 self.conversation_context = self.conversation_context[-10:]
             
-            # AI 응답 전송 준비
-            print(f"📤 AI 응답 전송 준비: {ai_response[:50]}...")
-            print(f"📤 방 ID: {room_id}")
-            print(f"📤 AI 이름: {ai_name}")
-            
-            # AI 응답을 방의 모든 클라이언트에게 전송
-            response_data = {
-                'type': 'ai_message',
-                'message': ai_response,
-                'ai_name': ai_name,
-                'timestamp': ai_message_obj.timestamp.isoformat(),
-                'questioner_username': (
-                    ai_message_obj.question_message.username if ai_message_obj and ai_message_obj.question_message else None
-                ),
-                'imageUrls': image_urls if image_urls else []
-            }
-            
-            print(f"📤 AI 응답 데이터 그룹 전송 시도: {response_data}")
-            
+            if received_at is not None:
+                metrics.ai_time_to_first_byte.observe(time.perf_counter() - received_at)
+            broadcast_started = time.perf_counter()
             try:
                 # 방의 모든 클라이언트에게 AI 응답 전송
                 await self.channel_layer.group_send(
@@ -381,7 +419,6 @@ class ChatConsumer(AsyncWebsocketConsumer):
                         'imageUrls': image_urls if image_urls else []
                     }
                 )
-                print("✅ AI 메시지 그룹 전송 완료")
                 
                 # 추가: 현재 연결된 클라이언트에게도 직접 전송 (백업)
                 backup_response = {
@@ -397,10 +434,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     'imageUrls': image_urls if image_urls else []
                 }
                 await self.send(text_data=json.dumps(backup_response))
-                print(f"✅ AI 메시지 직접 전송 완료 (백업)")
+                metrics.ws_stage_duration.observe(time.perf_counter() - broadcast_started, stage='broadcast')
+                logger.debug("AI 메시지 전송 완료: room_id=%s, id=%s", room_id, ai_message_obj.id)
                 
             except Exception as send_error:
-                print(f"❌ AI 메시지 그룹 전송 실패: {send_error}")
+                logger.warning("AI 메시지 그룹 전송 실패: room_id=%s, %s", room_id, send_error)
                 # 전송 실패 시 에러 메시지로 대체
                 error_response = {
                     'type': 'ai_message',
@@ -439,11 +477,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'data': message
         }))
 
+    async def admin_job_progress(self, event):
+        """관리자 백그라운드 작업 진행 상황 전달"""
+        await self.send(text_data=json.dumps({
+            'type': 'admin_job_progress',
+            'data': event['job']
+        }))
+
     async def user_message(self, event):        
-        try:
-            debug_event = dict(event) if isinstance(event, dict) else event            
-        except Exception as e:
-            print(f"[DEBUG][self.send][user_message] event 출력 오류: {e}")
         await self.send(text_data=json.dumps({
             'type': 'user_message',
             'id': event.get('id'),  # id 필드 추가
@@ -458,12 +499,6 @@ class ChatConsumer(AsyncWebsocketConsumer):
         }))
 
     async def ai_message(self, event):        
-        print(f"📥 AI 메시지 이벤트 수신: {event}")
-        try:
-            debug_event = dict(event) if isinstance(event, dict) else event            
-        except Exception as e:
-            print(f"[DEBUG][self.send][ai_message] event 출력 오류: {e}")
-        
         # WebSocket을 통해 클라이언트로 전송
         response_data = {
             'type': 'ai_message',
@@ -475,10 +510,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'sender': event.get('ai_name', 'AI'),
             'imageUrls': event.get('imageUrls', [])  # imageUrls 배열 추가
         }
-        print(f"📤 클라이언트로 전송할 데이터: {response_data}")
-        
         await self.send(text_data=json.dumps(response_data))
-        print(f"✅ AI 메시지 클라이언트 전송 완료")
 
     async def handle_webrtc_signaling(self, data):
         """WebRTC 시그널링 메시지 처리"""
@@ -549,7 +581,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             result = Chat.save_user_message(content, room_id, emotion, user, image_url, image_urls_json)            
             return result
         except Exception as e:
-            print(f"사용자 메시지 저장 실패: {e}")
+            logger.error("사용자 메시지 저장 실패: %s", e)
             raise e
 
     @sync_to_async
@@ -563,10 +595,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 content = unicodedata.normalize('NFC', content)
             # question_message와 image_urls를 반드시 넘김
             result = Chat.save_ai_message(content, room_id, ai_name=ai_name, ai_type=ai_type, question_message=question_message, image_urls_json=image_urls_json)
-            print(f"AI 메시지 저장 성공: {result.id}, question_message: {question_message}, image_urls: {image_urls_json}")
+            logger.debug("AI 메시지 저장: id=%s, question_message=%s", result.id, getattr(question_message, 'id', None))
             return result
         except Exception as e:
-            print(f"AI 메시지 저장 실패: {e}")
+            logger.error("AI 메시지 저장 실패: %s", e)
             raise e
 
     @sync_to_async
@@ -595,7 +627,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         except Exception:
             return None
 
-    @sync_to_async
+    @database_sync_to_async
     def get_user_ai_settings(self, user):
         """사용자의 AI 설정을 가져오기"""
         from .models import UserSettings
@@ -615,8 +647,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     json_settings = json.loads(settings.ai_settings)
                     default_settings.update(json_settings)
                 except json.JSONDecodeError:
-                    print(f"🔍 JSON 파싱 오류")
-                    pass
+                    logger.warning("ai_settings JSON 파싱 오류: user=%s", user.pk)
             
             # 새로운 필드들 추가 (JSON > DB 우선 순위)
             json_has_ai_provider = "aiProvider" in default_settings and bool(default_settings["aiProvider"])
@@ -626,17 +657,17 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 default_settings["aiProvider"] = settings.ai_provider
             else:
                 if json_has_ai_provider:
-                    print(f"🔍 JSON aiProvider 우선 사용: {default_settings['aiProvider']}")
+                    logger.debug("JSON aiProvider 우선 사용: %s", default_settings['aiProvider'])
 
             if hasattr(settings, 'gemini_model') and settings.gemini_model and not json_has_gemini_model:
                 default_settings["geminiModel"] = settings.gemini_model
             else:
                 if json_has_gemini_model:
-                    print(f"🔍 JSON geminiModel 우선 사용: {default_settings['geminiModel']}")
+                    logger.debug("JSON geminiModel 우선 사용: %s", default_settings['geminiModel'])
             
             return default_settings
         except Exception as e:
-            print(f"🔍 설정 가져오기 오류: {e}")
+            logger.warning("AI 설정 가져오기 오류: %s", e)
             # 기본 설정 반환
             return {
                 "aiProvider": "gemini", 
@@ -644,7 +675,56 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 "geminiModel": "gemini-1.5-flash"
             }
 
-    async def get_ai_response(self, user_message, user_emotion="neutral", image_urls=None, documents=None, room_id=None, session_id=None, client_ai_settings=None):
+    @sync_to_async
+    def is_ai_response_cache_enabled(self, room_id):
+        """대화방의 AI 응답 캐시 사용 여부"""
+        if not room_id:
+            return False
+        from .models import ChatRoom
+        try:
+            return ChatRoom.objects.filter(id=room_id).values_list('ai_response_cache_enabled', flat=True).first() or False
+        except Exception:
+            return False
+
+    @database_sync_to_async
+    def get_room_ai_settings(self, room_id):
+        """방 단위 AI 설정 (여러 사람의 메시지를 묶은 응답용): 방의 AI 제공자 + 서버 기본값"""
+        from .models import ChatRoom
+        provider = ChatRoom.objects.filter(id=room_id).values_list('ai_provider', flat=True).first() if room_id else None
+        return {
+            "aiProvider": (provider or 'gemini').lower(),
+            "aiEnabled": True,
+            "geminiModel": "gemini-1.5-flash",
+        }
+
+    def ai_request_scope(self, room_id=None, room_level=False):
+        """속도 제한/응답 캐시 범위 키: 방 단위 응답은 방, 그 외는 사용자(비로그인은 소켓)"""
+        if room_level:
+            return f"room:{room_id or ''}"
+        user = self.scope.get('user', None)
+        if user and getattr(user, 'is_authenticated', False):
+            return f"user:{user.id}"
+        return f"channel:{self.channel_name}"
+
+    async def wait_for_ai_slot(self, provider, model, room_id=None, room_level=False):
+        """AI 제공자 속도 제한 대기 (대기 순번은 ai_queued 이벤트로 알림)"""
+        user_key = self.ai_request_scope(room_id, room_level)
+
+        async def notify_queued(position):
+            try:
+                await self.send(text_data=json.dumps({
+                    'type': 'ai_queued',
+                    'roomId': room_id,
+                    'provider': provider,
+                    'model': model,
+                    'position': position
+                }))
+            except Exception:
+                pass
+
+        await ai_rate_limiter.acquire(provider, model, user_key, on_queued=notify_queued)
+
+    async def get_ai_response(self, user_message, user_emotion="neutral", image_urls=None, documents=None, room_id=None, session_id=None, client_ai_settings=None, ticket=None, room_level=False):
         import base64
         import requests
         import os
@@ -652,35 +732,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
         from django.conf import settings
         from openai import OpenAI
 
-        @sync_to_async
-        def call_lily_api(user_message, user_emotion, image_urls=None, documents=None, room_id_param=None, session_id_param=None):
-            """Lily LLM API 호출"""
+        @sync_to_async(thread_sensitive=False)
+        def call_lily_api(user_message, user_emotion, image_urls=None, documents=None, room_id_param=None, session_id_param=None, lily_settings=None, lily_api_url=None, lily_model=None):
+            """Lily LLM API 호출 (스레드 풀에서 실행되므로 DB를 조회하지 않고 넘겨받은 설정 값만 사용)"""
             import requests
             try:
-                # 사용자 설정에서 Lily API URL 가져오기
                 user = getattr(self, 'scope', {}).get('user', None)
-                ai_settings = None
-                if user and hasattr(user, 'is_authenticated') and user.is_authenticated:
-                    # 동기적으로 AI 설정 가져오기
-                    from .models import UserSettings
-                    try:
-                        settings = UserSettings.objects.get(user=user)
-                        if settings.ai_settings:
-                            try:
-                                ai_settings = json.loads(settings.ai_settings)
-                            except json.JSONDecodeError:
-                                pass
-                    except Exception:
-                        pass
-                
-                # 환경별 기본 URL 설정
-                from django.conf import settings
-                default_lily_url = getattr(settings, 'LILY_API_URL', 'http://localhost:8001')
-                # print(f"🔧 Lily URL={default_lily_url}")
-                default_lily_model = 'kanana-1.5-v-3b-instruct'
-                
-                lily_api_url = ai_settings.get('lilyApiUrl', default_lily_url) if ai_settings else default_lily_url
-                lily_model = ai_settings.get('lilyModel', default_lily_model) if ai_settings else default_lily_model
+                ai_settings = lily_settings or None
+                # (연결, 응답) 타임아웃: 서버가 죽어 있으면 연결 단계에서 빠르게 실패
+                lily_timeout = get_provider_timeout('lily')
+                lily_model = lily_model or default_lily_model
                 
                 # print(f"🔧 Lily API 설정: URL={lily_api_url}, Model={lily_model}")
                 # print(f"🔧 환경 감지: RAILWAY_ENVIRONMENT={os.environ.get('RAILWAY_ENVIRONMENT', 'None')}")
@@ -750,7 +811,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                                 f"{lily_api_url}/api/v2/rag/generate",
                                 data=rag_data,
                                 headers=headers,
-                                timeout=time_limit
+                                timeout=lily_timeout
                             )
                             
                             if response.status_code == 200:
@@ -777,36 +838,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 elif image_urls and len(image_urls) > 0:
                     # print(f"🖼️ 다중 이미지 처리 시작: {len(image_urls)}개 이미지")
                     
-                    # 이미지 파일들을 HTTP로 가져와서 바이트로 변환
-                    image_data_list = []
-                    for i, image_url in enumerate(image_urls):
-                        try:
-                            # 상대 URL을 절대 URL로 변환
-                            if image_url.startswith('/media/'):
-                                # Django 서버의 절대 URL로 변환
-                                from django.conf import settings
-                                base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-                                absolute_url = f"{base_url}{image_url}"
-                            else:
-                                absolute_url = image_url
-                            
-                            # print(f"🌐 이미지 URL {i+1}: {absolute_url}")
-                            
-                            # HTTP 요청으로 이미지 가져오기
-                            image_response = requests.get(absolute_url, timeout=time_limit)
-                            if image_response.status_code == 200:
-                                image_bytes = image_response.content
-                                # print(f"✅ 이미지 {i+1} 다운로드 성공: {len(image_bytes)} bytes")
-                                image_data_list.append(image_bytes)
-                            else:
-                                # print(f"❌ 이미지 {i+1} 다운로드 실패: {image_response.status_code}")
-                                raise Exception(f"이미지 다운로드 실패: {image_response.status_code}")
-                        except Exception as e:
-                            # print(f"❌ 이미지 {i+1} 읽기 오류: {e}")
-                            raise e
-                        except Exception as e:
-                            # print(f"❌ 이미지 {i+1} 읽기 오류: {e}")
-                            raise e
+                    # 저장소에서 이미지들을 동시에 읽고 짧은 변 기준으로 축소 (자기 서버 HTTP 재요청 없음)
+                    image_data_list = image_loader.load_many_prepared(image_urls)
                     
                     if image_data_list:
                         # print(f"🔄 멀티모달 요청 준비 완료 ({len(image_data_list)}개 이미지 포함)")
@@ -844,8 +877,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             
                             # 파일 데이터 구성
                             files = {}
-                            for i, image_bytes in enumerate(image_data_list):
-                                files[f'image{i+1}'] = (f'image{i+1}.png', image_bytes, 'image/png')
+                            for i, (image_bytes, image_mime) in enumerate(image_data_list):
+                                files[f'image{i+1}'] = (f'image{i+1}.{extension_for_mime(image_mime)}', image_bytes, image_mime)
                             
                             # print(f"📤 요청 데이터: {data}")
                             # print(f"📁 파일 포함 여부: {bool(files)}")
@@ -861,7 +894,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                                 data=data,
                                 files=files,
                                 headers=headers,
-                                timeout=time_limit
+                                timeout=lily_timeout
                             )
                             
                             if response.status_code == 200:
@@ -882,7 +915,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             raise e
                     else:
                         # print("❌ 처리할 이미지가 없음")
-                        raise Exception("이미지 처리 실패")
+                        raise ImageLoadError("이미지 처리 실패")
                 else:
                     # 텍스트만 있는 경우
                     # print("📝 텍스트 전용 요청")
@@ -929,7 +962,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             f"{lily_api_url}/api/v2/generate",
                             data=data,
                             headers=headers,
-                            timeout=time_limit
+                            timeout=lily_timeout
                         )
                         
                         if response.status_code == 200:
@@ -953,7 +986,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 # print(f"❌ Lily API 호출 중 오류: {e}")
                 raise e
 
-        @sync_to_async
+        @sync_to_async(thread_sensitive=False)
         def call_gemini(user_message, user_emotion, image_urls=None, documents=None, gemini_model='gemini-1.5-flash'):            
             # 감정 변화 추세 분석
             emotion_trend = self.get_emotion_trend()
@@ -1005,21 +1038,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     import requests
                     import base64
                     
-                    # 이미지 파일 읽기 (HTTP로 가져오기)
-                    if first_image_url.startswith('/media/'):
-                        # Django 서버의 절대 URL로 변환
-                        from django.conf import settings
-                        base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-                        absolute_url = f"{base_url}{first_image_url}"
-                    else:
-                        absolute_url = first_image_url
-                    
-                    image_response = requests.get(absolute_url, timeout=time_limit)
-                    if image_response.status_code != 200:
-                        raise Exception(f"이미지 다운로드 실패: {image_response.status_code}")
-                    
-                    image_bytes = image_response.content
-                    image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+                    # 이미지 파일 읽기 (저장소에서 직접, 축소/재인코딩, 요청 단위 캐시)
+                    image_base64, image_mime = image_loader.load_base64_prepared(first_image_url)
                     
                     # Gemini API 호출
                     gemini_url = f"https://generativelanguage.googleapis.com/v1beta/models/{gemini_model}:generateContent"
@@ -1036,7 +1056,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                                 },
                                         {
                                             "inline_data": {
-                                                "mime_type": "image/png",
+                                                "mime_type": image_mime,
                                         "data": image_base64
                                     }
                                 }
@@ -1049,7 +1069,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     }
                     
                     # Gemini API 호출
-                    response = requests.post(gemini_url, headers=headers, json=payload, timeout=60)
+                    response = requests.post(gemini_url, headers=headers, json=payload, timeout=get_provider_timeout('gemini'))
                     
                     if response.status_code == 200:
                         result = response.json()
@@ -1098,7 +1118,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     }
                     
                     # Gemini API 호출
-                    response = requests.post(gemini_url, headers=headers, json=payload, timeout=60)
+                    response = requests.post(gemini_url, headers=headers, json=payload, timeout=get_provider_timeout('gemini'))
                     
                     if response.status_code == 200:
                         result = response.json()
@@ -1119,7 +1139,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     # print(f"❌ Gemini API 호출 중 오류: {e}")
                     raise e
 
-        @sync_to_async
+        @sync_to_async(thread_sensitive=False)
         def call_huggingface_space(user_message, user_emotion, image_urls=None, documents=None):
             """Hugging Face 스페이스 API 호출"""
             import requests
@@ -1176,7 +1196,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     f"{hf_space_url}/api/predict",
                     json=api_data,
                     headers={"Content-Type": "application/json"},
-                    timeout=120
+                    timeout=get_provider_timeout('huggingface')
                 )
                 
                 if response.status_code == 200:
@@ -1201,16 +1221,22 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 # print(f"❌ Hugging Face 스페이스 API 호출 중 오류: {e}")
                 raise e
 
-        # 사용자의 AI 설정에 따라 적절한 API 호출
+        # 사용자의 AI 설정에 따라 적절한 API 호출 (여러 사람의 메시지를 묶은 응답은 방 단위 설정)
         user = getattr(self, 'scope', {}).get('user', None)
         ai_settings = None
-        if user and hasattr(user, 'is_authenticated') and user.is_authenticated:
-            ai_settings = await self.get_user_ai_settings(user)
+        if room_level:
+            with metrics.timed(metrics.ws_stage_duration, stage='ai_settings'):
+                ai_settings = await self.get_room_ai_settings(room_id)
+        elif user and hasattr(user, 'is_authenticated') and user.is_authenticated:
+            with metrics.timed(metrics.ws_stage_duration, stage='ai_settings'):
+                ai_settings = await self.get_user_ai_settings(user)
             # print(f"🔍 사용자 AI 설정(DB): {ai_settings}")
         else:
             # print(f"🔍 사용자 인증되지 않음 (DB 설정을 사용할 수 없음)")
             pass
 
+        user_ai_settings = dict(ai_settings) if ai_settings else None
+
         # 클라이언트에서 넘어온 설정이 있으면 DB 설정보다 우선 적용
         if client_ai_settings:
             # print(f"🔧 클라이언트 AI 설정 적용: {client_ai_settings}")
@@ -1223,66 +1249,164 @@ class ChatConsumer(AsyncWebsocketConsumer):
             # print(f"🔧 병합 후 최종 AI 설정: {ai_settings}")
         
         ai_provider = ai_settings.get('aiProvider', 'gemini') if ai_settings else 'gemini'
+        # Lily 주소/모델/토큰 설정은 클라이언트 값이 아닌 저장된 사용자 설정만 사용
+        # (캐시 키/속도 제한 슬롯도 실제 호출과 같은 모델 기준)
+        lily_api_url = (user_ai_settings or {}).get('lilyApiUrl') or getattr(settings, 'LILY_API_URL', 'http://localhost:8001')
+        lily_model = (user_ai_settings or {}).get('lilyModel') or default_lily_model
         gemini_model = ai_settings.get('geminiModel', 'gemini-1.5-flash') if ai_settings else 'gemini-1.5-flash'
         # print(f"🔍 최종 결정된 제공자: {ai_provider}")
         
         # print(f"🔍 AI 제공자: {ai_provider}")
         # print(f"🔍 Gemini 모델: {gemini_model}")
-        
-        try:
-            if ai_provider == 'lily':
-                # print("🚀 Lily LLM API 호출")
-                result = await call_lily_api(user_message, user_emotion, image_urls, documents)
-                return {
-                    'response': result.get('response', ''),
-                    'provider': result.get('provider', 'lily'),
-                    'ai_name': result.get('ai_name', 'Lily LLM'),
-                    'ai_type': result.get('ai_type', 'local')
-                }
-            elif ai_provider == 'huggingface':
-                # print("🚀 Hugging Face 스페이스 API 호출")
-                result = await call_huggingface_space(user_message, user_emotion, image_urls, documents)
-                return {
-                    'response': result.get('response', ''),
-                    'provider': result.get('provider', 'huggingface'),
-                    'ai_name': result.get('ai_name', 'Kanana LLM (Hugging Face)'),
-                    'ai_type': result.get('ai_type', 'huggingface')
-                }
-            else:
-                # print("🚀 Gemini API 호출")
-                result = await call_gemini(user_message, user_emotion, image_urls, documents, gemini_model)
-                return {
-                    'response': result.get('response', ''),
-                    'provider': result.get('provider', 'gemini'),
-                    'ai_name': result.get('ai_name', 'Gemini'),
-                    'ai_type': result.get('ai_type', 'google')
-                }
-        except Exception as e:
-            # print(f"❌ {ai_provider} API 호출 실패: {e}")
-            # 실패 시 사용자에게 명확한 메시지 제공
-            if ai_provider == 'lily':
-                error_message = f"Lily LLM 서버에 연결할 수 없습니다. (오류: {str(e)[:100]})\n\n허깅페이스 스페이스 상태를 확인해주세요: https://huggingface.co/spaces/gbrabbit/lily_fast_api\n\nGemini로 전환하시겠습니까?"
-                return {
-                    'response': error_message,
-                    'provider': 'error',
-                    'ai_name': 'Lily LLM (연결 실패)',
-                    'ai_type': 'error'
-                }
-            elif ai_provider == 'huggingface':
-                error_message = f"Hugging Face 스페이스에 연결할 수 없습니다. (오류: {str(e)[:100]})\n\nGemini로 전환하시겠습니까?"
-                return {
-                    'response': error_message,
-                    'provider': 'error',
-                    'ai_name': 'Hugging Face (연결 실패)',
-                    'ai_type': 'error'
-                }
-            else:
-                # Gemini도 실패한 경우
-                error_message = f"AI 서비스에 연결할 수 없습니다. (오류: {str(e)[:100]})"
-                return {
-                    'response': error_message,
-                    'provider': 'error',
-                    'ai_name': 'AI 서비스 (연결 실패)',
-                    'ai_type': 'error'
-                }
+
+        # 폴백 제공자가 같은 이미지를 다시 읽지 않도록 요청 단위로 공유
+        image_loader = ImageLoader(
+            short_side_limit=getattr(settings, 'AI_IMAGE_SHORT_SIDE_LIMIT', image_short_side_limit)
+        )
+
+        provider_calls = {
+            'lily': lambda: call_lily_api(user_message, user_emotion, image_urls, documents,
+                                          lily_settings=user_ai_settings, lily_api_url=lily_api_url,
+                                          lily_model=lily_model),
+            'huggingface': lambda: call_huggingface_space(user_message, user_emotion, image_urls, documents),
+            'gemini': lambda: call_gemini(user_message, user_emotion, image_urls, documents, gemini_model),
+        }
+        # 응답에 ai_name/ai_type이 없을 때 사용할 기본값
+        provider_defaults = {
+            'lily': ('Lily LLM', 'local'),
+            'huggingface': ('Kanana LLM (Hugging Face)', 'huggingface'),
+            'gemini': ('Gemini', 'google'),
+        }
+        provider_models = {
+            'lily': lily_model,
+            'huggingface': 'kanana-1.5-v-3b-instruct',
+            'gemini': gemini_model,
+        }
+        if ai_provider not in provider_calls:
+            ai_provider = 'gemini'
+
+        # 응답 캐시: 방에서 켠 경우에만, 문서 첨부 요청은 제외
+        use_cache = (
+            getattr(settings, 'AI_RESPONSE_CACHE_ENABLED', True)
+            and not documents
+            and await self.is_ai_response_cache_enabled(room_id)
+        )
+        if use_cache:
+            emotion_strategy = f"{(user_emotion or 'neutral').lower()}:{self.get_emotion_trend()}"
+            image_hashes = image_fingerprints(image_urls)
+            # Lily는 사용자별 서버 주소와 user_id/room_id/session_id 기반 RAG 컨텍스트로 답하므로
+            # 같은 서버, 같은 사용자/방/세션 안에서만 재사용
+            user_scope = self.ai_request_scope(room_id, room_level)
+            provider_cache_scopes = {
+                'lily': {
+                    'endpoint': lily_api_url,
+                    'scope': f"{user_scope}|room:{room_id or ''}|session:{session_id or ''}",
+                },
+            }
+
+        # 폴백 체인(예: lily → gemini) 순서대로 시도. 서킷이 열린 제공자는 바로 건너뜀
+        last_error = None
+        for provider in get_provider_chain(ai_provider):
+            if provider not in provider_calls:
+                continue
+            cache_key = None
+            if use_cache:
+                cache_key = make_cache_key(
+                    provider, provider_models[provider], user_message, emotion_strategy, image_hashes,
+                    **provider_cache_scopes.get(provider, {}),
+                )
+                cached = ai_response_cache.get(cache_key)
+                if cached:
+                    return cached
+            # 서킷 허가를 먼저 받아, 열린 서킷으로 거절될 호출이 속도 제한 토큰을 쓰지 않도록
+            breaker = get_circuit_breaker(provider)
+            if not breaker.try_acquire():
+                last_error = CircuitOpenError(f"{provider} 서비스가 일시적으로 차단되었습니다")
+                continue
+
+            # 제공자/모델별 속도 제한: 토큰이 없으면 실패 대신 대기열에서 차례를 기다림
+            try:
+                await self.wait_for_ai_slot(provider, provider_models[provider], room_id, room_level=room_level)
+            except AIRateLimitExceeded as e:
+                breaker.release()
+                last_error = e
+                continue
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+
+            # 스케줄러가 이 묶음을 이미 새 묶음으로 대체했으면 제공자를 호출하지 않음
+            # (호출이 시작된 뒤에는 스케줄러가 취소하지 않음)
+            if ticket is not None and not ticket.start_call():
+                breaker.release()
+                raise asyncio.CancelledError()
+
+            started = time.monotonic()
+            try:
+                result = await provider_calls[provider]()
+            except asyncio.CancelledError:
+                breaker.release()
+                metrics.ai_provider_duration.observe(time.monotonic() - started, provider=provider, result='cancelled')
+                raise
+            except ImageLoadError as e:
+                # 이미지 읽기/전처리 실패는 제공자 장애가 아니므로 서킷에 집계하지 않음
+                logger.warning("%s 요청 준비 실패: %s", provider, e)
+                breaker.release()
+                metrics.ai_provider_duration.observe(time.monotonic() - started, provider=provider, result='local_error')
+                last_error = e
+                continue
+            except Exception as e:
+                logger.warning("%s API 호출 실패: %s", provider, e)
+                breaker.record_failure(e, time.monotonic() - started)
+                metrics.ai_provider_duration.observe(time.monotonic() - started, provider=provider, result='error')
+                last_error = e
+                continue
+            breaker.record_success(time.monotonic() - started)
+            metrics.ai_provider_duration.observe(time.monotonic() - started, provider=provider, result='success')
+
+            default_name, default_type = provider_defaults[provider]
+            response = {
+                'response': result.get('response', ''),
+                'provider': result.get('provider', provider),
+                'ai_name': result.get('ai_name', default_name),
+                'ai_type': result.get('ai_type', default_type)
+            }
+            if cache_key and response['response']:
+                ai_response_cache.set(cache_key, response)
+            return response
+
+        # 체인의 모든 제공자가 실패한 경우 사용자에게 명확한 메시지 제공
+        e = last_error
+        if isinstance(e, AIRateLimitExceeded):
+            return {
+                'response': f"AI 요청이 많아 잠시 후 다시 시도해주세요. ({e})",
+                'provider': 'error',
+                'ai_name': 'AI 서비스 (요청 대기 초과)',
+                'ai_type': 'error'
+            }
+        if ai_provider == 'lily':
+            error_message = f"Lily LLM 서버에 연결할 수 없습니다. (오류: {str(e)[:100]})\n\n허깅페이스 스페이스 상태를 확인해주세요: https://huggingface.co/spaces/gbrabbit/lily_fast_api\n\nGemini로 전환하시겠습니까?"
+            return {
+                'response': error_message,
+                'provider': 'error',
+                'ai_name': 'Lily LLM (연결 실패)',
+                'ai_type': 'error'
+            }
+        elif ai_provider == 'huggingface':
+            error_message = f"Hugging Face 스페이스에 연결할 수 없습니다. (오류: {str(e)[:100]})\n\nGemini로 전환하시겠습니까?"
+            return {
+                'response': error_message,
+                'provider': 'error',
+                'ai_name': 'Hugging Face (연결 실패)',
+                'ai_type': 'error'
+            }
+        else:
+            # Gemini도 실패한 경우
+            error_message = f"AI 서비스에 연결할 수 없습니다. (오류: {str(e)[:100]})"
+            return {
+                'response': error_message,
+                'provider': 'error',
+                'ai_name': 'AI 서비스 (연결 실패)',
+                'ai_type': 'error'
+            }
 
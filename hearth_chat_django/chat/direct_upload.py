@@ -0,0 +1,174 @@
+"""오브젝트 스토리지 직접 업로드 (presigned PUT)
+
+이미지 바이트가 Django(Daphne) 워커를 거치지 않도록 3단계로 업로드한다.
+
+1. upload intent: 클라이언트가 파일 이름/MIME/크기/SHA-256을 보내면 검증 후 PUT URL 발급
+   - 같은 내용의 blob이 이미 있으면 업로드 없이 바로 기존 파일 정보 반환
+2. PUT: 클라이언트가 발급받은 URL로 직접 업로드
+   - S3/MinIO(S3Boto3Storage): 버킷에 대한 presigned URL (Content-Type, 체크섬 고정)
+   - 그 외 저장소(로컬 개발/테스트): 서명 토큰을 검증하는 로컬 PUT 엔드포인트가 대신 받음
+3. complete: 업로드된 객체의 크기/매직 바이트를 확인하고 MediaBlob으로 등록
+
+업로드 정보는 DB에 저장하지 않고 서명된 토큰(django.core.signing)에 담아 주고받는다.
+"""
+import base64
+import hashlib
+import re
+import tempfile
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+
+from .image_preprocess import extension_for_mime, sniff_mime_type
+from .media_index import index_file
+from .media_store import blob_path
+from .models import MediaBlob
+
+TOKEN_SALT = 'chat.direct_upload'
+DEFAULT_INTENT_TTL_SECONDS = 900
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class DirectUploadError(Exception):
+    """업로드 요청 검증 실패 (메시지는 사용자에게 그대로 전달)"""
+
+
+def intent_ttl():
+    return int(getattr(settings, 'CHAT_UPLOAD_INTENT_TTL', DEFAULT_INTENT_TTL_SECONDS))
+
+
+def is_s3_storage(storage=None):
+    storage = storage or default_storage
+    return hasattr(storage, 'bucket') and hasattr(storage, 'bucket_name')
+
+
+def create_upload_intent(request, filename, content_type, size, sha256, allowed_mime_types, max_size):
+    """업로드 의도 검증 후 PUT 정보 반환"""
+    sha256 = (sha256 or '').lower()
+    if content_type not in allowed_mime_types:
+        raise DirectUploadError(f'허용되지 않는 MIME 타입입니다: {content_type}')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise DirectUploadError('파일 크기가 올바르지 않습니다.')
+    if size <= 0 or size > max_size:
+        raise DirectUploadError(f'파일 용량은 {max_size // (1024 * 1024)}MB 이하만 허용됩니다.')
+    if not SHA256_RE.match(sha256):
+        raise DirectUploadError('sha256 값이 올바르지 않습니다.')
+
+    existing = MediaBlob.objects.filter(sha256=sha256).first()
+    if existing is not None:
+        existing.save(update_fields=['updated_at'])
+        return {'exists': True, 'blob': existing}
+
+    key = blob_path(sha256, extension_for_mime(content_type))
+    token = signing.dumps({
+        'key': key,
+        'sha256': sha256,
+        'content_type': content_type,
+        'size': size,
+        'name': filename or '',
+    }, salt=TOKEN_SALT)
+
+    ttl = intent_ttl()
+    if is_s3_storage():
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode('ascii')
+        client = default_storage.bucket.meta.client
+        upload_url = client.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': default_storage.bucket_name,
+                'Key': default_storage._normalize_name(key) if hasattr(default_storage, '_normalize_name') else key,
+                'ContentType': content_type,
+                'ContentLength': size,
+                'ChecksumSHA256': checksum,
+            },
+            ExpiresIn=ttl,
+        )
+        headers = {'Content-Type': content_type, 'x-amz-checksum-sha256': checksum}
+    else:
+        upload_url = request.build_absolute_uri(reverse('direct_upload_put', args=[token]))
+        headers = {'Content-Type': content_type}
+
+    return {
+        'exists': False,
+        'upload': {
+            'method': 'PUT',
+            'url': upload_url,
+            'headers': headers,
+            'token': token,
+            'object_key': key,
+            'expires_in': ttl,
+        },
+    }
+
+
+def load_intent(token):
+    try:
+        return signing.loads(token, salt=TOKEN_SALT, max_age=intent_ttl())
+    except signing.SignatureExpired:
+        raise DirectUploadError('업로드 유효 시간이 지났습니다. 다시 시도해주세요.')
+    except signing.BadSignature:
+        raise DirectUploadError('유효하지 않은 업로드 토큰입니다.')
+
+
+def receive_local_put(token, stream):
+    """로컬 저장소용 PUT 수신 (S3가 없는 환경의 대체 구현)
+
+    요청 본문을 청크 단위로 임시 파일에 쓰면서 크기 한도와 SHA-256을 검증한 뒤 저장한다.
+    (본문 전체를 메모리에 올리지 않음)
+    """
+    intent = load_intent(token)
+    digest = hashlib.sha256()
+    received = 0
+    with tempfile.NamedTemporaryFile(
+        suffix='.upload', dir=getattr(settings, 'FILE_UPLOAD_TEMP_DIR', None),
+    ) as tmp:
+        while True:
+            chunk = stream.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            received += len(chunk)
+            if received > intent['size']:
+                raise DirectUploadError('신고한 파일 크기보다 큰 데이터입니다.')
+            digest.update(chunk)
+            tmp.write(chunk)
+        if digest.hexdigest() != intent['sha256']:
+            raise DirectUploadError('파일 내용이 sha256 값과 일치하지 않습니다.')
+        if not default_storage.exists(intent['key']):
+            tmp.flush()
+            tmp.seek(0)
+            default_storage.save(intent['key'], File(tmp, name=intent['key']))
+    return intent
+
+
+def complete_upload(token, allowed_mime_types):
+    """업로드 완료 콜백: 저장된 객체를 검증하고 MediaBlob으로 등록"""
+    intent = load_intent(token)
+    key = intent['key']
+    if not default_storage.exists(key):
+        raise DirectUploadError('업로드된 파일을 찾을 수 없습니다.')
+
+    size = default_storage.size(key)
+    with default_storage.open(key, 'rb') as f:
+        head = f.read(16)
+    content_type = sniff_mime_type(head)
+    if size != intent['size'] or content_type not in allowed_mime_types:
+        default_storage.delete(key)
+        raise DirectUploadError('업로드된 파일이 요청 정보와 다릅니다.')
+
+    try:
+        with transaction.atomic():
+            blob, _ = MediaBlob.objects.get_or_create(
+                sha256=intent['sha256'],
+                defaults={'path': key, 'size': size, 'content_type': content_type},
+            )
+    except IntegrityError:
+        blob = MediaBlob.objects.get(sha256=intent['sha256'])
+    index_file(key, size=size, sha256=intent['sha256'])
+    return blob, intent
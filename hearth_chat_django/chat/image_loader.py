@@ -0,0 +1,209 @@
+"""AI 요청용 이미지 로더
+
+채팅에 첨부된 이미지는 우리 서버의 미디어 저장소에 있으므로, BASE_URL로 자기 자신에게
+HTTP 요청을 보내는 대신 default_storage에서 바로 읽는다 (로컬 디스크/S3 모두 동일).
+
+- 여러 장은 스레드 풀에서 동시에 읽음
+- 한 번 읽은 바이트/base64는 로더 인스턴스(= AI 요청 1건) 동안 캐시 → 폴백 제공자 재시도 시 재사용
+- 저장소에 없는 외부 URL만 HTTP로 가져옴. 클라이언트가 보낸 URL이므로 (SSRF 방지)
+  MEDIA_URL 호스트와 AI_IMAGE_FETCH_ALLOWED_HOSTS 만 허용하고, 공인 IP가 아닌 주소/리다이렉트는 거절,
+  응답 크기는 AI_IMAGE_FETCH_MAX_BYTES 까지만 읽음
+- short_side_limit를 주면 모델 전송용으로 축소/재인코딩한 (bytes, mime_type)을 제공 (image_preprocess)
+"""
+import base64
+import ipaddress
+import logging
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlparse
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+
+from .image_preprocess import prepare_image_for_model
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+READ_CHUNK_SIZE = 64 * 1024
+# 외부 URL 다운로드 (연결, 응답) 타임아웃(초)
+HTTP_FETCH_TIMEOUT = (5, 30)
+DEFAULT_FETCH_MAX_BYTES = 10 * 1024 * 1024
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, int(getattr(settings, 'AI_IMAGE_LOADER_WORKERS', DEFAULT_MAX_WORKERS)))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-image-loader')
+        return _executor
+
+
+def storage_name_for_url(url):
+    """미디어 URL을 default_storage 파일 이름으로 변환. 우리 미디어가 아니면 None"""
+    if not url:
+        return None
+    media_url = getattr(settings, 'MEDIA_URL', '/media/') or '/media/'
+
+    # MEDIA_URL 자체가 절대 URL인 경우 (S3/CDN)
+    if media_url.startswith('http') and url.startswith(media_url):
+        return unquote(url[len(media_url):].split('?', 1)[0]) or None
+
+    path = url
+    if url.startswith('http://') or url.startswith('https://'):
+        parsed = urlparse(url)
+        base_url = getattr(settings, 'BASE_URL', '') or ''
+        own_hosts = {urlparse(base_url).netloc} if base_url else set()
+        own_hosts.update(getattr(settings, 'ALLOWED_HOSTS', []) or [])
+        if parsed.netloc not in own_hosts and parsed.hostname not in own_hosts:
+            return None
+        path = parsed.path
+
+    media_path = urlparse(media_url).path if media_url.startswith('http') else media_url
+    if not path.startswith(media_path):
+        return None
+    return unquote(path[len(media_path):].split('?', 1)[0]) or None
+
+
+class ImageLoadError(Exception):
+    """이미지 읽기/전처리 실패 (AI 제공자 장애가 아닌 로컬 오류)"""
+
+
+def allowed_fetch_hosts():
+    """HTTP로 이미지를 가져와도 되는 호스트 (절대 URL MEDIA_URL의 호스트 + 설정 목록)"""
+    hosts = {host.lower() for host in getattr(settings, 'AI_IMAGE_FETCH_ALLOWED_HOSTS', None) or [] if host}
+    media_url = getattr(settings, 'MEDIA_URL', '') or ''
+    if media_url.startswith('http'):
+        hosts.add((urlparse(media_url).hostname or '').lower())
+    hosts.discard('')
+    return hosts
+
+
+def _resolves_to_public_address(host):
+    try:
+        infos = socket.getaddrinfo(host, None)
+    except (socket.gaierror, UnicodeError):
+        return False
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split('%', 1)[0])
+        if getattr(address, 'ipv4_mapped', None):
+            address = address.ipv4_mapped
+        if not address.is_global:
+            return False
+    return bool(infos)
+
+
+def validate_fetch_url(url):
+    """외부 이미지 URL 검사. 허용 호스트가 아니거나 내부/사설 주소로 연결되면 ImageLoadError"""
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    if parsed.scheme not in ('http', 'https') or not host:
+        raise ImageLoadError(f"지원하지 않는 이미지 URL입니다: {url}")
+    if host not in allowed_fetch_hosts():
+        raise ImageLoadError(f"허용되지 않은 이미지 호스트입니다: {host}")
+    if not _resolves_to_public_address(host):
+        raise ImageLoadError(f"공인 주소가 아닌 이미지 호스트입니다: {host}")
+
+
+class ImageLoader:
+    """AI 요청 1건 동안 사용하는 이미지 로더"""
+
+    def __init__(self, storage=None, short_side_limit=None):
+        self.storage = storage or default_storage
+        self.short_side_limit = short_side_limit
+        self._bytes = {}
+        self._prepared = {}
+        self._base64 = {}
+        self._lock = threading.Lock()
+
+    def load(self, url):
+        """원본 이미지 바이트 반환 (캐시 우선)"""
+        with self._lock:
+            cached = self._bytes.get(url)
+        if cached is not None:
+            return cached
+        data = self._read(url)
+        with self._lock:
+            self._bytes[url] = data
+        return data
+
+    def load_prepared(self, url):
+        """모델 전송용 (bytes, mime_type) 반환"""
+        with self._lock:
+            cached = self._prepared.get(url)
+        if cached is not None:
+            return cached
+        data = self.load(url)
+        try:
+            prepared = prepare_image_for_model(data, self.short_side_limit)
+        except Exception as e:
+            raise ImageLoadError(f"이미지 전처리 실패: {url} ({e})") from e
+        with self._lock:
+            self._prepared[url] = prepared
+        return prepared
+
+    def load_many_prepared(self, urls):
+        """여러 이미지를 동시에 읽고 전처리해 입력 순서대로 반환"""
+        urls = list(urls or [])
+        if len(urls) <= 1:
+            return [self.load_prepared(url) for url in urls]
+        futures = [_get_executor().submit(self.load_prepared, url) for url in urls]
+        return [future.result() for future in futures]
+
+    def load_base64_prepared(self, url):
+        """모델 전송용 (base64 문자열, mime_type) 반환"""
+        with self._lock:
+            cached = self._base64.get(url)
+        if cached is not None:
+            return cached
+        data, mime_type = self.load_prepared(url)
+        encoded = (base64.b64encode(data).decode('utf-8'), mime_type)
+        with self._lock:
+            self._base64[url] = encoded
+        return encoded
+
+    def _read(self, url):
+        name = storage_name_for_url(url)
+        if name is not None:
+            try:
+                with self.storage.open(name, 'rb') as f:
+                    return b''.join(iter(lambda: f.read(READ_CHUNK_SIZE), b''))
+            except FileNotFoundError:
+                if not url.startswith('http'):
+                    raise ImageLoadError(f"이미지 파일을 찾을 수 없습니다: {name}")
+                logger.debug("저장소에 없는 이미지, HTTP로 다운로드: %s", url)
+            except (OSError, SuspiciousFileOperation) as e:
+                # SuspiciousFileOperation: '../' 등으로 저장소 밖을 가리키는 경로
+                raise ImageLoadError(f"이미지 파일을 읽을 수 없습니다: {name} ({e})") from e
+        if not url.startswith('http'):
+            raise ImageLoadError(f"지원하지 않는 이미지 URL입니다: {url}")
+        return self._fetch_http(url)
+
+    def _fetch_http(self, url):
+        import requests
+        validate_fetch_url(url)
+        max_bytes = int(getattr(settings, 'AI_IMAGE_FETCH_MAX_BYTES', DEFAULT_FETCH_MAX_BYTES))
+        try:
+            # 리다이렉트를 따라가면 검사하지 않은 호스트로 연결될 수 있으므로 허용하지 않음
+            with requests.get(url, timeout=HTTP_FETCH_TIMEOUT, stream=True, allow_redirects=False) as response:
+                if response.status_code != 200:
+                    raise ImageLoadError(f"이미지 다운로드 실패: {response.status_code}")
+                declared = response.headers.get('Content-Length', '')
+                if declared.isdigit() and int(declared) > max_bytes:
+                    raise ImageLoadError(f"이미지가 너무 큽니다: {declared} bytes")
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(READ_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ImageLoadError(f"이미지가 너무 큽니다: {max_bytes} bytes 초과")
+                    chunks.append(chunk)
+                return b''.join(chunks)
+        except requests.RequestException as e:
+            raise ImageLoadError(f"이미지 다운로드 실패: {e}") from e
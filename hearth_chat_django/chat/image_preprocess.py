@@ -0,0 +1,118 @@
+"""비전 모델 전송 전 이미지 전처리
+
+최대 4MB 원본을 그대로 base64로 보내면 업로드 대역폭과 모델 지연이 커진다.
+디코딩 → 짧은 변 기준 축소 → 효율적인 포맷으로 재인코딩하고, 실제 포맷에 맞는 MIME 타입을 돌려준다.
+같은 이미지는 내용 해시로 결과를 캐시해 다시 처리하지 않는다.
+"""
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 128
+JPEG_QUALITY = 85
+
+FORMAT_MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'WEBP': 'image/webp',
+    'GIF': 'image/gif',
+}
+MIME_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+    'image/gif': 'gif',
+}
+# 비전 모델이 그대로 받을 수 있는 포맷 (축소가 필요 없으면 재인코딩하지 않음)
+PASSTHROUGH_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+
+_cache = OrderedDict()  # (내용 해시, 짧은 변 한도) -> (bytes, mime_type)
+_cache_lock = threading.Lock()
+
+
+def sniff_mime_type(data):
+    """매직 바이트로 이미지 MIME 타입 추정"""
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+
+def extension_for_mime(mime_type):
+    return MIME_EXTENSIONS.get(mime_type, 'bin')
+
+
+def _cache_get(key):
+    with _cache_lock:
+        value = _cache.get(key)
+        if value is not None:
+            _cache.move_to_end(key)
+        return value
+
+
+def _cache_set(key, value):
+    max_entries = max(1, int(getattr(settings, 'AI_IMAGE_PREPROCESS_CACHE_SIZE', DEFAULT_CACHE_SIZE)))
+    with _cache_lock:
+        _cache[key] = value
+        _cache.move_to_end(key)
+        while len(_cache) > max_entries:
+            _cache.popitem(last=False)
+
+
+def prepare_image_for_model(data, short_side_limit):
+    """(bytes, mime_type) 반환. 짧은 변이 short_side_limit보다 크면 축소 후 재인코딩"""
+    key = (hashlib.sha256(data).hexdigest(), short_side_limit)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    result = _prepare(data, short_side_limit)
+    _cache_set(key, result)
+    return result
+
+
+def _prepare(data, short_side_limit):
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return data, sniff_mime_type(data)
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        source_format = image.format
+        image.load()
+    except Exception as e:
+        logger.warning("이미지 디코딩 실패, 원본 전송: %s", e)
+        return data, sniff_mime_type(data)
+
+    width, height = image.size
+    needs_resize = bool(short_side_limit) and min(width, height) > short_side_limit
+    if not needs_resize and source_format in PASSTHROUGH_FORMATS:
+        return data, FORMAT_MIME_TYPES[source_format]
+
+    # 휴대폰 사진의 EXIF 회전 정보를 반영한 뒤 축소
+    image = ImageOps.exif_transpose(image)
+    if needs_resize:
+        scale = short_side_limit / float(min(image.size))
+        new_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(new_size, Image.LANCZOS)
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    output = io.BytesIO()
+    if has_alpha:
+        image.convert('RGBA').save(output, format='PNG', optimize=True)
+        mime_type = 'image/png'
+    else:
+        image.convert('RGB').save(output, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+        mime_type = 'image/jpeg'
+    return output.getvalue(), mime_type
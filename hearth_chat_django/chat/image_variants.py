@@ -0,0 +1,246 @@
+"""채팅 이미지 썸네일/변환본 생성
+
+업로드 시 원본 외에 몇 가지 너비의 WebP(가능하면 AVIF도) 변환본을 만든다.
+변환은 요청 스레드가 아닌 워커 스레드 풀에서 실행한다. 업로드 응답에는 이미 만들어진 변환본만
+넣고, 생성 중이면 variants_status='pending'으로 알린다 (클라이언트는 원본 file_url을 표시).
+파일 이름은 원본 이름과 너비로 정해지므로 결정적이다.
+
+    image/chat_attach/ab/ab12...ef.jpg
+    image/chat_attach/ab/variants/ab12...ef_w320.webp
+    image/chat_attach/ab/variants/ab12...ef_w640.webp ...
+
+생성이 끝나면 ImageVariantSet 행이 만들어지고, 방 메시지 목록은 이 행을 보고 썸네일을 참조한다.
+생성 중인 원본은 캐시에 표시해 두어, 그 사이 같은 내용이 다시 올라와도 생성은 한 번만 돈다.
+"""
+import io
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+
+from .image_loader import storage_name_for_url
+from .media_index import index_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VARIANT_WIDTHS = (320, 640, 1280)
+DEFAULT_MAX_WORKERS = 2
+VARIANT_QUALITY = 80
+PENDING_KEY_PREFIX = 'chat:image_variants:pending:'
+# 워커가 죽어 표시가 남더라도 이 시간이 지나면 다시 생성할 수 있음 (정상 종료 시 워커가 바로 해제)
+PENDING_TIMEOUT = 600
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, int(getattr(settings, 'CHAT_IMAGE_VARIANT_WORKERS', DEFAULT_MAX_WORKERS)))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chat-image-variants')
+        return _executor
+
+
+def variant_widths():
+    return tuple(getattr(settings, 'CHAT_IMAGE_VARIANT_WIDTHS', DEFAULT_VARIANT_WIDTHS))
+
+
+def variant_formats():
+    """생성할 포맷 목록. AVIF는 Pillow가 지원할 때만 (pillow-avif-plugin 설치 시 포함)"""
+    from PIL import Image
+    try:
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        pass
+    Image.init()
+    formats = ['webp']
+    if 'AVIF' in Image.SAVE:
+        formats.append('avif')
+    return formats
+
+
+def media_url(name):
+    """저장소 이름 → 업로드 응답과 같은 형식의 URL"""
+    if hasattr(settings, 'MEDIA_URL') and settings.MEDIA_URL.startswith('http'):
+        return f"{settings.MEDIA_URL}{name}"
+    return f"/media/{name}"
+
+
+def variant_name(original_name, width, fmt):
+    directory, filename = os.path.split(original_name)
+    stem = os.path.splitext(filename)[0]
+    return f"{directory}/variants/{stem}_w{width}.{fmt}"
+
+
+def _srcset(variants):
+    return {
+        fmt: ", ".join(f"{url} {w}w" for w, url in widths.items())
+        for fmt, widths in variants.items()
+    }
+
+
+def _pending_key(original_name):
+    return f"{PENDING_KEY_PREFIX}{original_name}"
+
+
+def plan_variants(original_name, width, height):
+    """원본 크기로부터 만들 변환본 목록과 URL 맵 계산 (원본보다 크게 만들지 않음)"""
+    widths = sorted({min(w, width) for w in variant_widths()})
+    formats = variant_formats()
+    variants = {
+        fmt: {str(w): media_url(variant_name(original_name, w, fmt)) for w in widths}
+        for fmt in formats
+    }
+    return {
+        'width': width,
+        'height': height,
+        'thumbnail': variants['webp'][str(widths[0])],
+        'variants': variants,
+        'srcset': _srcset(variants),
+    }
+
+
+def schedule_image_variants(original_name, fileobj):
+    """업로드 직후 호출. 변환본 생성을 워커 풀에 맡기고 변환본 계획을 바로 반환
+
+    크기 확인에는 이미지 헤더만 읽고, 변환은 워커에서 저장소의 원본을 다시 열어 처리한다.
+    이미 변환본이 있는 파일(같은 내용의 재업로드)은 다시 만들지 않고 ready=True로 저장된 URL을 돌려준다.
+    생성 중인 파일은 새로 예약하지 않고 ready=False만 돌려준다.
+    이미지가 아니거나 디코딩할 수 없으면 None.
+    """
+    from .models import ImageVariantSet
+    try:
+        from PIL import Image
+        fileobj.seek(0)
+        with Image.open(fileobj) as image:
+            width, height = image.size
+    except Exception:
+        return None
+    finally:
+        try:
+            fileobj.seek(0)
+        except Exception:
+            pass
+    plan = plan_variants(original_name, width, height)
+    existing = ImageVariantSet.objects.filter(original=original_name).first()
+    if existing is None and cache.add(_pending_key(original_name), 1, timeout=PENDING_TIMEOUT):
+        # 표시를 잡는 사이 다른 워커가 생성을 끝냈을 수 있으므로 한 번 더 확인
+        existing = ImageVariantSet.objects.filter(original=original_name).first()
+        if existing is None:
+            try:
+                _get_executor().submit(_generate_variants, original_name, plan)
+            except Exception:
+                cache.delete(_pending_key(original_name))
+                raise
+        else:
+            cache.delete(_pending_key(original_name))
+    if existing is None:
+        # 이번 요청이 생성을 맡았거나, 이미 다른 요청이 생성 중
+        plan['ready'] = False
+        return plan
+    try:
+        variants = json.loads(existing.variants or '{}')
+    except (json.JSONDecodeError, TypeError):
+        variants = {}
+    plan.update(ready=True, thumbnail=existing.thumbnail, variants=variants, srcset=_srcset(variants))
+    return plan
+
+
+def upload_variant_fields(plan):
+    """업로드 응답의 썸네일 필드. 워커가 아직 만들지 않은 변환본 URL은 내보내지 않음 (404 방지)"""
+    if plan is None:
+        return {'variants_status': 'unavailable', 'thumbnail_url': None, 'srcset': {}}
+    if not plan.get('ready'):
+        return {'variants_status': 'pending', 'thumbnail_url': None, 'srcset': {}}
+    return {'variants_status': 'ready', 'thumbnail_url': plan['thumbnail'], 'srcset': plan['srcset']}
+
+
+def _generate_variants(original_name, plan):
+    from PIL import Image, ImageOps
+    from .models import ImageVariantSet
+    try:
+        with default_storage.open(original_name, 'rb') as f, Image.open(f) as source:
+            source = ImageOps.exif_transpose(source)
+            has_alpha = source.mode in ('RGBA', 'LA') or (source.mode == 'P' and 'transparency' in source.info)
+            source = source.convert('RGBA' if has_alpha else 'RGB')
+            for fmt, urls in plan['variants'].items():
+                for width in urls:
+                    width = int(width)
+                    height = max(1, round(source.height * width / source.width))
+                    resized = source if width == source.width else source.resize((width, height), Image.LANCZOS)
+                    output = io.BytesIO()
+                    resized.save(output, format=fmt.upper(), quality=VARIANT_QUALITY)
+                    name = variant_name(original_name, width, fmt)
+                    if default_storage.exists(name):
+                        default_storage.delete(name)
+                    default_storage.save(name, ContentFile(output.getvalue()))
+                    index_file(name, size=output.tell())
+
+        ImageVariantSet.objects.update_or_create(
+            original=original_name,
+            defaults={
+                'width': plan['width'],
+                'height': plan['height'],
+                'thumbnail': plan['thumbnail'],
+                'variants': json.dumps(plan['variants']),
+            }
+        )
+    except Exception:
+        logger.exception("이미지 변환본 생성 실패: %s", original_name)
+    finally:
+        cache.delete(_pending_key(original_name))
+        close_old_connections()
+
+
+def variant_map_for_urls(urls):
+    """이미지 URL 목록 → {URL: {'thumbnail', 'srcset'}} (생성 완료된 것만, 쿼리 1회)"""
+    from .models import ImageVariantSet
+    names = {}
+    for url in urls:
+        name = storage_name_for_url(url) if url else None
+        if name:
+            names.setdefault(name, []).append(url)
+    if not names:
+        return {}
+
+    result = {}
+    for variant_set in ImageVariantSet.objects.filter(original__in=list(names)):
+        try:
+            variants = json.loads(variant_set.variants or '{}')
+        except (json.JSONDecodeError, TypeError):
+            continue
+        entry = {
+            'thumbnail': variant_set.thumbnail,
+            'srcset': _srcset(variants),
+        }
+        for url in names[variant_set.original]:
+            result[url] = entry
+    return result
+
+
+def attach_image_variants(message_list):
+    """메시지 payload 목록(imageUrl/imageUrls)에 썸네일과 srcset 정보를 추가"""
+    urls = []
+    for message in message_list:
+        if message.get('imageUrl'):
+            urls.append(message['imageUrl'])
+        urls.extend(message.get('imageUrls') or [])
+    variant_map = variant_map_for_urls(urls)
+    for message in message_list:
+        image_url = message.get('imageUrl')
+        message['thumbnailUrl'] = variant_map[image_url]['thumbnail'] if image_url in variant_map else None
+        message['imageVariants'] = {
+            url: variant_map[url]
+            for url in ([image_url] if image_url else []) + list(message.get('imageUrls') or [])
+            if url in variant_map
+        }
+    return message_list
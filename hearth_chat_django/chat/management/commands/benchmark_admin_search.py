@@ -0,0 +1,107 @@
+import json
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from chat.admin_pagination import fast_count
+from chat.admin_search import install_search_indexes, search_queryset
+from chat.models import Chat
+from chat.synthetic_data import delete_synthetic_data, generate_synthetic_messages
+
+
+@contextmanager
+def _without_search_index():
+    """기준선: 검색 인덱스 없이 icontains 실행 (PostgreSQL은 트랜잭션 안에서 bitmap scan을 꺼서 trigram 인덱스 미사용)"""
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_bitmapscan = off')
+        yield
+
+
+def _admin_page(queryset):
+    """관리자 메시지 목록 첫 페이지와 같은 쿼리 (정렬된 20개 + 상한 개수)"""
+    ids = list(queryset.order_by('-timestamp', '-id').values_list('id', flat=True)[:20])
+    count, _ = fast_count(queryset.order_by())
+    return ids, count
+
+
+class Command(BaseCommand):
+    help = ('합성 메시지로 관리자 메시지 검색 응답 시간을 검색 인덱스 사용/미사용으로 비교. '
+            '벤치마크 전용 DB에서 --confirm 과 함께 실행')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='생성할 합성 메시지 수')
+        parser.add_argument('--rooms', type=int, default=100, help='합성 대화방 수')
+        parser.add_argument('--batch-size', type=int, default=10000, help='bulk_create 배치 크기')
+        parser.add_argument('--iterations', type=int, default=10, help='검색어별 반복 횟수')
+        parser.add_argument('--skip-generate', action='store_true', help='이미 생성한 합성 데이터로 측정만')
+        parser.add_argument('--cleanup', action='store_true', help='측정 후 합성 대화방/메시지 삭제')
+        parser.add_argument('--output', help='결과 JSON 파일 경로')
+        parser.add_argument('--confirm', action='store_true', help='현재 DB에 합성 데이터를 쓰는 것에 동의')
+
+    def handle(self, *args, **options):
+        if not options['confirm']:
+            raise CommandError('현재 DB의 chat_chat에 합성 메시지를 추가합니다. 벤치마크 전용 DB에서 --confirm 과 함께 실행하세요.')
+
+        report = {'vendor': connection.vendor, 'rows': options['rows']}
+        if not options['skip_generate']:
+            started = time.perf_counter()
+            generate_synthetic_messages(options['rows'], rooms=options['rooms'], batch_size=options['batch_size'])
+            report['generate_seconds'] = round(time.perf_counter() - started, 2)
+            self.stdout.write(f'합성 메시지 생성: {report["generate_seconds"]}초')
+        # SQLite FTS는 트리거가 없던 상태에서 넣은 행까지 다시 채움, 다른 DB는 없는 인덱스만 생성
+        install_search_indexes()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE chat_chat')
+
+        # 합성 메시지 내용은 'synthetic message {i}' / 'synthetic reply {i}'
+        rows = options['rows']
+        terms = {
+            'rare': f'message {rows - 2}',
+            'selective': f'reply {rows // 3 | 1}',
+            'missing': 'zqxjv',
+            'common': 'synthetic',
+        }
+
+        report['scenarios'] = {}
+        for name, term in terms.items():
+            result = {'term': term}
+            outputs = {}
+            for mode in ('icontains', 'search_index'):
+                timings = []
+                for _ in range(options['iterations']):
+                    t0 = time.perf_counter()
+                    if mode == 'icontains':
+                        with _without_search_index():
+                            outputs[mode] = _admin_page(Chat.objects.filter(content__icontains=term))
+                    else:
+                        outputs[mode] = _admin_page(search_queryset(Chat.objects.all(), term))
+                    timings.append((time.perf_counter() - t0) * 1000)
+                timings.sort()
+                result[mode] = {
+                    'p50_ms': round(statistics.median(timings), 2),
+                    'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+                }
+            if outputs['icontains'] != outputs['search_index']:
+                raise CommandError(f'검색 결과가 다릅니다: {name} ({term})')
+            result['matches'] = outputs['search_index'][1]
+            result['speedup'] = round(result['icontains']['p50_ms'] / max(result['search_index']['p50_ms'], 0.001), 1)
+            report['scenarios'][name] = result
+            self.stdout.write(
+                f'  {name} ({term!r}, {result["matches"]}건): icontains p50 {result["icontains"]["p50_ms"]}ms, '
+                f'검색 인덱스 p50 {result["search_index"]["p50_ms"]}ms (x{result["speedup"]})'
+            )
+
+        if options['cleanup']:
+            deleted = delete_synthetic_data()
+            self.stdout.write(f'합성 메시지 {deleted:,}개 삭제')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS('관리자 검색 벤치마크 완료'))
@@ -0,0 +1,97 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from chat import analytics
+from chat.admin_stats import refresh_admin_stats
+from chat.models import HourlyTrafficStat
+from chat.synthetic_data import delete_synthetic_data, generate_synthetic_messages
+
+
+class Command(BaseCommand):
+    help = ('합성 메시지(기본 1천만 건)로 분석 API 응답 시간 측정. '
+            '벤치마크 전용 DB에서 --confirm 과 함께 실행')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000, help='생성할 합성 메시지 수')
+        parser.add_argument('--rooms', type=int, default=200, help='합성 대화방 수')
+        parser.add_argument('--days', type=int, default=90, help='메시지를 퍼뜨릴 기간 (일)')
+        parser.add_argument('--batch-size', type=int, default=10000, help='bulk_create 배치 크기')
+        parser.add_argument('--iterations', type=int, default=20, help='시나리오별 반복 횟수')
+        parser.add_argument('--budget-ms', type=float, default=1000.0, help='p95가 이 값을 넘으면 실패')
+        parser.add_argument('--skip-generate', action='store_true', help='이미 생성한 합성 데이터로 측정만')
+        parser.add_argument('--cleanup', action='store_true', help='측정 후 합성 대화방/메시지 삭제')
+        parser.add_argument('--output', help='결과 JSON 파일 경로')
+        parser.add_argument('--confirm', action='store_true', help='현재 DB에 합성 데이터를 쓰는 것에 동의')
+
+    def handle(self, *args, **options):
+        if not options['confirm']:
+            raise CommandError('현재 DB의 chat_chat에 합성 메시지를 추가합니다. 벤치마크 전용 DB에서 --confirm 과 함께 실행하세요.')
+
+        report = {'rows': options['rows'], 'rooms': options['rooms'], 'days': options['days']}
+        if not options['skip_generate']:
+            started = time.perf_counter()
+            step = max(options['rows'] // 10, options['batch_size'])
+
+            def progress(created):
+                if created % step < options['batch_size'] or created == options['rows']:
+                    self.stdout.write(f'  {created:,}/{options["rows"]:,}')
+
+            generate_synthetic_messages(options['rows'], rooms=options['rooms'], days=options['days'],
+                                        batch_size=options['batch_size'], progress=progress)
+            report['generate_seconds'] = round(time.perf_counter() - started, 2)
+            self.stdout.write(f'합성 메시지 생성: {report["generate_seconds"]}초')
+
+        started = time.perf_counter()
+        # 방금 만든 행까지 모두 집계 (동시 쓰기가 없는 벤치마크 DB 전제)
+        refresh_admin_stats(cutoff=timezone.now() + timedelta(seconds=1))
+        report['rollup_seconds'] = round(time.perf_counter() - started, 2)
+        report['hourly_rollup_rows'] = HourlyTrafficStat.objects.count()
+        self.stdout.write(f'집계: {report["rollup_seconds"]}초 (시간별 집계 행 {report["hourly_rollup_rows"]:,}개)')
+
+        now = timezone.now()
+        busiest_room = HourlyTrafficStat.objects.order_by('-count').values_list('room_id', flat=True).first() or 0
+        scenarios = [
+            ('hour_24h', now - timedelta(hours=24), now, 'hour', [], {}),
+            ('hour_7d_by_sender', now - timedelta(days=7), now, 'hour', ['sender_type'], {}),
+            ('hour_31d_room_by_ai', now - timedelta(days=31), now, 'hour', ['ai_name'], {'room_id': busiest_room}),
+            ('day_90d_by_room', now - timedelta(days=90), now, 'day', ['room'], {}),
+            ('day_90d_by_ai_emotion', now - timedelta(days=90), now, 'day', ['ai_name', 'ai_type', 'emotion'], {}),
+        ]
+
+        report['scenarios'] = {}
+        failed = []
+        for name, start, end, granularity, group_by, filters in scenarios:
+            timings = []
+            for _ in range(options['iterations']):
+                t0 = time.perf_counter()
+                result = analytics.message_traffic(start, end, granularity, group_by, filters)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            report['scenarios'][name] = {
+                'p50_ms': round(statistics.median(timings), 2),
+                'p95_ms': round(p95, 2),
+                'max_ms': round(timings[-1], 2),
+                'buckets': len(result['series']),
+                'total': result['total'],
+            }
+            self.stdout.write(f'  {name}: p50 {report["scenarios"][name]["p50_ms"]}ms, p95 {report["scenarios"][name]["p95_ms"]}ms')
+            if p95 > options['budget_ms']:
+                failed.append(name)
+
+        if options['cleanup']:
+            deleted = delete_synthetic_data()
+            self.stdout.write(f'합성 메시지 {deleted:,}개 삭제 (집계 테이블의 합성 분량은 남아 있음)')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+        if failed:
+            raise CommandError(f'응답 시간 기준({options["budget_ms"]}ms) 초과: {", ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS('모든 시나리오가 응답 시간 기준 이내'))
@@ -0,0 +1,190 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chat.admin_stats import refresh_admin_stats
+from chat.models import Chat, ChatRoom, ChatRoomParticipant
+from chat.query_stats import track_queries
+from chat.synthetic_data import (
+    SYNTHETIC_ROOM_PREFIX, SYNTHETIC_USER_PREFIX, delete_synthetic_data, generate_synthetic_dataset,
+)
+
+
+def _benchmark_targets(room_ids):
+    """시나리오에 쓸 방/사용자/메시지 (합성 메시지가 가장 많은 방 기준)"""
+    busiest = (
+        Chat.objects.filter(room_id__in=room_ids).values('room_id')
+        .annotate(n=Count('id')).order_by('-n').first()
+    )
+    if not busiest:
+        raise CommandError('합성 메시지가 없습니다. --sizes 로 생성하거나 generate_synthetic_data 를 먼저 실행하세요.')
+    room_id, count = busiest['room_id'], busiest['n']
+    member_id = ChatRoomParticipant.objects.filter(room_id=room_id).order_by('-is_owner', 'id') \
+        .values_list('user_id', flat=True).first()
+    middle = Chat.objects.filter(room_id=room_id).order_by('timestamp').values_list('id', flat=True)[count // 2]
+    staff, _ = User.objects.get_or_create(
+        username=f'{SYNTHETIC_USER_PREFIX}staff', defaults={'is_staff': True, 'email': 'staff@synthetic.invalid'},
+    )
+    return {
+        'room_id': room_id,
+        'room_messages': count,
+        'member': User.objects.get(id=member_id),
+        'staff': staff,
+        'middle_message_id': middle,
+        'rare_term': Chat.objects.filter(room_id=room_id).values_list('content', flat=True)[count // 3].split(' ', 1)[1],
+    }
+
+
+def _scenarios(targets):
+    room_id = targets['room_id']
+    member, staff = targets['member'], targets['staff']
+    last_offset = max(targets['room_messages'] - 20, 0)
+    return [
+        ('messages_first_page', member, f'/api/chat/messages/messages/?room={room_id}&offset=0&limit=20'),
+        ('messages_last_page', member, f'/api/chat/messages/messages/?room={room_id}&offset={last_offset}&limit=20'),
+        ('messages_recent', member, f'/api/chat/messages/recent/?room={room_id}'),
+        ('messages_search_rare', member, f'/api/chat/messages/search/?q={quote(targets["rare_term"])}&limit=50'),
+        ('messages_search_common', member, '/api/chat/messages/search/?q=synthetic&limit=50'),
+        ('messages_offset', member,
+         f'/api/chat/messages/offset/?room={room_id}&messageId={targets["middle_message_id"]}'),
+        ('rooms_list', member, '/api/chat/rooms/'),
+        ('notifications_unread', member, '/api/chat/notifications/unread/'),
+        ('admin_stats', staff, '/api/admin/stats/'),
+    ]
+
+
+def _measure(client, path, iterations):
+    client.get(path)  # 워밍업 (캐시/연결)
+    timings = []
+    queries = 0
+    status = None
+    for _ in range(iterations):
+        with track_queries() as stats:
+            t0 = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - t0) * 1000)
+        queries = max(queries, stats.count)
+        status = response.status_code
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        'queries': queries,
+        'status': status,
+    }
+
+
+def compare_to_baseline(report, baseline, max_regression=None):
+    """[(크기/시나리오, 설명, 회귀 여부)] — p95가 max_regression% 넘게 느려졌거나 쿼리 수가 늘면 회귀"""
+    rows = []
+    for size, result in report['sizes'].items():
+        base_scenarios = (baseline.get('sizes', {}).get(size) or {}).get('scenarios', {})
+        for name, current in result['scenarios'].items():
+            base = base_scenarios.get(name)
+            if not base:
+                continue
+            change = (current['p95_ms'] - base['p95_ms']) / max(base['p95_ms'], 0.001) * 100
+            slower = max_regression is not None and change > max_regression
+            more_queries = current['queries'] > base['queries']
+            rows.append((
+                f'{size}/{name}',
+                f'p95 {base["p95_ms"]}ms → {current["p95_ms"]}ms ({change:+.1f}%), '
+                f'쿼리 {base["queries"]} → {current["queries"]}',
+                slower or more_queries,
+            ))
+    return rows
+
+
+class Command(BaseCommand):
+    help = ('합성 데이터 크기별 REST API 응답 시간/쿼리 수 측정 (메시지 목록/최근/검색/offset, 대화방 목록, '
+            '안 읽은 알림, 관리자 통계). 벤치마크 전용 DB에서 --confirm 과 함께 실행')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100000,1000000',
+                            help='측정할 합성 메시지 수 목록 (쉼표 구분, 작은 것부터 늘려 가며 생성)')
+        parser.add_argument('--users', type=int, default=1000, help='합성 사용자 수')
+        parser.add_argument('--rooms', type=int, default=200, help='합성 대화방 수')
+        parser.add_argument('--batch-size', type=int, default=10000, help='bulk_create 배치 크기')
+        parser.add_argument('--iterations', type=int, default=10, help='시나리오별 반복 횟수')
+        parser.add_argument('--skip-generate', action='store_true', help='생성 없이 현재 합성 데이터로 한 번만 측정')
+        parser.add_argument('--cleanup', action='store_true', help='측정 후 합성 데이터 삭제')
+        parser.add_argument('--output', help='결과 JSON 파일 경로 (다음 실행의 --baseline 으로 사용)')
+        parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+        parser.add_argument('--max-regression', type=float, default=None,
+                            help='기준 대비 p95가 이 비율(%%) 넘게 느려지거나 쿼리 수가 늘면 실패')
+        parser.add_argument('--confirm', action='store_true', help='현재 DB에 합성 데이터를 쓰는 것에 동의')
+
+    def handle(self, *args, **options):
+        if not options['confirm']:
+            raise CommandError('현재 DB에 합성 데이터를 추가합니다. 벤치마크 전용 DB에서 --confirm 과 함께 실행하세요.')
+        try:
+            sizes = sorted({int(size) for size in options['sizes'].split(',') if size.strip()})
+        except ValueError:
+            raise CommandError('--sizes 는 쉼표로 구분한 정수 목록이어야 합니다.')
+
+        def synthetic_room_ids():
+            return list(ChatRoom.objects.filter(name__startswith=SYNTHETIC_ROOM_PREFIX).values_list('id', flat=True))
+
+        existing = Chat.objects.filter(room_id__in=synthetic_room_ids()).count()
+        if options['skip_generate']:
+            sizes = [existing]
+
+        client = APIClient(HTTP_HOST='localhost')
+        report = {'sizes': {}}
+        for size in sizes:
+            result = {}
+            if size > existing:
+                started = time.perf_counter()
+                summary = generate_synthetic_dataset(
+                    users=options['users'], rooms=options['rooms'], messages=size - existing,
+                    batch_size=options['batch_size'], seed=0,
+                )
+                existing = size
+                result['generate_seconds'] = round(time.perf_counter() - started, 2)
+                result['generated'] = summary
+                self.stdout.write(f'합성 메시지 {size:,}개까지 생성: {result["generate_seconds"]}초')
+            # 관리자 통계 집계 테이블도 현재 데이터 기준으로 (측정 중 대시보드가 백그라운드 집계를 시작하지 않도록)
+            refresh_admin_stats(cutoff=timezone.now() + timedelta(seconds=1))
+
+            targets = _benchmark_targets(synthetic_room_ids())
+            result['room_messages'] = targets['room_messages']
+            result['scenarios'] = {}
+            self.stdout.write(f'[{size:,}건] 방 {targets["room_id"]} (메시지 {targets["room_messages"]:,}개)')
+            for name, user, path in _scenarios(targets):
+                client.force_authenticate(user)
+                measured = _measure(client, path, options['iterations'])
+                result['scenarios'][name] = measured
+                self.stdout.write(
+                    f'  {name}: p50 {measured["p50_ms"]}ms, p95 {measured["p95_ms"]}ms, '
+                    f'쿼리 {measured["queries"]}개' + ('' if measured['status'] == 200 else f' (HTTP {measured["status"]})')
+                )
+            client.force_authenticate(None)
+            report['sizes'][str(size)] = result
+
+        if options['cleanup']:
+            deleted = delete_synthetic_data()
+            self.stdout.write(f'합성 메시지 {deleted:,}개와 합성 사용자/대화방 삭제')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = []
+            for name, description, regressed in compare_to_baseline(report, baseline, options['max_regression']):
+                self.stdout.write(f'  {"✗" if regressed else " "} {name}: {description}')
+                if regressed:
+                    regressions.append(name)
+            if regressions and options['max_regression'] is not None:
+                raise CommandError(f'기준 대비 회귀: {", ".join(regressions)}')
+        self.stdout.write(self.style.SUCCESS('REST API 벤치마크 완료'))
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.synthetic_data import delete_synthetic_data, generate_synthetic_dataset
+
+
+class Command(BaseCommand):
+    help = ('벤치마크용 합성 데이터 생성 (사용자, 모든 타입의 대화방/참여자, 메시지, 반응, 고정 메시지, 즐겨찾기, 읽음 표시). '
+            '벤치마크 전용 DB에서 --confirm 과 함께 실행')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='합성 사용자 수')
+        parser.add_argument('--rooms', type=int, default=200, help='합성 대화방 수 (ROOM_TYPE_CHOICES를 돌아가며 사용)')
+        parser.add_argument('--messages', type=int, default=1_000_000, help='생성할 합성 메시지 수')
+        parser.add_argument('--days', type=int, default=90, help='메시지를 퍼뜨릴 기간 (일)')
+        parser.add_argument('--reaction-rate', type=float, default=0.05, help='반응이 달리는 메시지 비율')
+        parser.add_argument('--favorite-rate', type=float, default=0.002, help='즐겨찾기되는 메시지 비율')
+        parser.add_argument('--pins-per-room', type=int, default=3, help='방마다 고정할 최근 메시지 수')
+        parser.add_argument('--favorites-per-user', type=int, default=5, help='사용자마다 즐겨찾기할 방 수')
+        parser.add_argument('--read-rate', type=float, default=0.5, help='즐겨찾기 방 중 최신 메시지를 읽음 처리할 비율')
+        parser.add_argument('--batch-size', type=int, default=10000, help='bulk_create 배치 크기')
+        parser.add_argument('--seed', type=int, default=0, help='난수 시드 (같은 시드면 같은 사용자/대화방 재사용)')
+        parser.add_argument('--delete', action='store_true', help='생성 대신 합성 사용자/대화방/메시지 삭제')
+        parser.add_argument('--confirm', action='store_true', help='현재 DB에 합성 데이터를 쓰는 것에 동의')
+
+    def handle(self, *args, **options):
+        if not options['confirm']:
+            raise CommandError('현재 DB에 합성 데이터를 쓰거나 지웁니다. 벤치마크 전용 DB에서 --confirm 과 함께 실행하세요.')
+
+        if options['delete']:
+            deleted = delete_synthetic_data()
+            self.stdout.write(self.style.SUCCESS(f'합성 메시지 {deleted:,}개와 합성 사용자/대화방 삭제'))
+            return
+
+        total = options['messages']
+        step = max(total // 10, options['batch_size'])
+
+        def progress(created):
+            if created % step < options['batch_size'] or created == total:
+                self.stdout.write(f'  메시지 {created:,}/{total:,}')
+
+        started = time.perf_counter()
+        summary = generate_synthetic_dataset(
+            users=options['users'],
+            rooms=options['rooms'],
+            messages=total,
+            days=options['days'],
+            reaction_rate=options['reaction_rate'],
+            favorite_rate=options['favorite_rate'],
+            pins_per_room=options['pins_per_room'],
+            favorites_per_user=options['favorites_per_user'],
+            read_rate=options['read_rate'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            progress=progress,
+        )
+        for name, count in summary.items():
+            self.stdout.write(f'  {name}: {count:,}')
+        self.stdout.write(self.style.SUCCESS(f'합성 데이터 생성 완료 ({time.perf_counter() - started:.1f}초)'))
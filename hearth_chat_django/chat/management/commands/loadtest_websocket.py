@@ -0,0 +1,119 @@
+import asyncio
+import json
+import logging
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.models import UserSettings
+from chat.synthetic_data import delete_synthetic_data, synthetic_rooms
+from chat.ws_loadtest import LoadTest, compare_reports, make_channel_layer
+
+LOADTEST_USER_PREFIX = '__loadtest__'
+
+
+def _loadtest_users(count, ai_enabled):
+    """부하 테스트 사용자 count명을 만들거나 재사용 (AI 응답 설정도 맞춤)"""
+    names = [f'{LOADTEST_USER_PREFIX}{i}' for i in range(count)]
+    existing = set(User.objects.filter(username__in=names).values_list('username', flat=True))
+    User.objects.bulk_create([
+        User(username=name, email=f'{name}@loadtest.invalid', password=make_password(None))
+        for name in names if name not in existing
+    ], batch_size=1000)
+    users = {user.username: user for user in User.objects.filter(username__in=names)}
+    users = [users[name] for name in names]
+
+    with_settings = set(UserSettings.objects.filter(user__in=users).values_list('user_id', flat=True))
+    UserSettings.objects.bulk_create([
+        UserSettings(user=user, ai_response_enabled=ai_enabled) for user in users if user.id not in with_settings
+    ], batch_size=1000)
+    UserSettings.objects.filter(user__in=users).update(ai_response_enabled=ai_enabled)
+    return users
+
+
+class Command(BaseCommand):
+    help = ('WebSocket 채팅 경로 부하 테스트 (프로세스 안 ASGI 앱 + 가짜 AI 제공자). '
+            '합성 사용자/대화방/메시지를 만들므로 벤치마크 전용 DB에서 --confirm 과 함께 실행')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000, help='동시 WebSocket 연결 수')
+        parser.add_argument('--rooms', type=int, default=50, help='연결을 나눠 넣을 대화방 수')
+        parser.add_argument('--messages', type=int, default=5, help='연결마다 보낼 메시지 수')
+        parser.add_argument('--interval', type=float, default=1.0, help='연결마다 메시지 전송 간격 (초)')
+        parser.add_argument('--ai-latency', type=float, default=0.5, help='가짜 AI 제공자 응답 지연 (초)')
+        parser.add_argument('--ai-jitter', type=float, default=0.0, help='AI 지연 무작위 편차 (±초)')
+        parser.add_argument('--no-ai', action='store_true', help='AI 응답 끔 (사용자 메시지 전달만 측정)')
+        parser.add_argument('--redis', help='Redis 채널 레이어 URL (없으면 InMemoryChannelLayer)')
+        parser.add_argument('--capacity', type=int, default=1000, help='채널 레이어 채널별 대기열 크기')
+        parser.add_argument('--connect-concurrency', type=int, default=200, help='동시에 진행할 연결 수')
+        parser.add_argument('--drain-timeout', type=float, default=60.0, help='전송 후 전달/AI 응답 완료 대기 (초)')
+        parser.add_argument('--output', help='결과 JSON 파일 경로')
+        parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+        parser.add_argument('--max-regression', type=float, default=None,
+                            help='기준 대비 이 비율(%%) 넘게 나빠진 지표가 있으면 실패')
+        parser.add_argument('--cleanup', action='store_true', help='측정 후 부하 테스트 사용자와 합성 대화방/메시지 삭제')
+        parser.add_argument('--confirm', action='store_true', help='현재 DB에 합성 데이터를 쓰는 것에 동의')
+
+    def handle(self, *args, **options):
+        if not options['confirm']:
+            raise CommandError('현재 DB에 부하 테스트 사용자/대화방/메시지를 추가합니다. 벤치마크 전용 DB에서 --confirm 과 함께 실행하세요.')
+        if options['clients'] < 1 or options['rooms'] < 1:
+            raise CommandError('--clients, --rooms 는 1 이상이어야 합니다.')
+        if options['verbosity'] < 2:
+            # 메시지마다 남는 chat 로그가 측정에 섞이지 않도록
+            logging.getLogger('chat').setLevel(logging.WARNING)
+
+        users = _loadtest_users(options['clients'], ai_enabled=not options['no_ai'])
+        room_ids = [room.id for room in synthetic_rooms(options['rooms'], seed='ws')]
+        load_test = LoadTest(
+            users, room_ids,
+            messages=options['messages'],
+            interval=options['interval'],
+            ai_latency=options['ai_latency'],
+            ai_jitter=options['ai_jitter'],
+            connect_concurrency=options['connect_concurrency'],
+            drain_timeout=options['drain_timeout'],
+            layer=make_channel_layer(options['redis'], options['capacity']),
+            progress=self.stdout.write,
+        )
+        report = asyncio.run(load_test.run())
+        report['config'] = {
+            key: options[key] for key in ('messages', 'interval', 'ai_latency', 'ai_jitter', 'no_ai', 'capacity')
+        }
+        report['config']['channel_layer'] = 'redis' if options['redis'] else 'in_memory'
+
+        latency = report['delivery_latency_ms']
+        self.stdout.write(
+            f'전달 지연 p50 {latency["p50"]}ms, p95 {latency["p95"]}ms, p99 {latency["p99"]}ms '
+            f'(손실 {report["deliveries"]["lost"]:,}건)'
+        )
+        self.stdout.write(
+            f'처리량 {report["throughput"]["messages_per_second"]} msg/s, '
+            f'전달 {report["throughput"]["deliveries_per_second"]}/s, AI 응답 {report["ai_replies"]:,}건'
+        )
+        self.stdout.write(f'연결당 메모리 {report["memory"]["rss_per_connection_kb"]}KB')
+        for stage, values in report['server_stages'].items():
+            self.stdout.write(f'  {stage}: 평균 {values["mean_ms"]}ms ({values["count"]:,}회)')
+
+        if options['cleanup']:
+            deleted = delete_synthetic_data()
+            User.objects.filter(username__startswith=LOADTEST_USER_PREFIX).delete()
+            self.stdout.write(f'합성 메시지 {deleted:,}개와 부하 테스트 사용자 삭제')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = []
+            for name, base, current, change in compare_reports(report, baseline):
+                self.stdout.write(f'  {name}: {base} → {current} ({change:+.1f}% 악화)' if change > 0
+                                  else f'  {name}: {base} → {current} ({-change:.1f}% 개선)')
+                if options['max_regression'] is not None and change > options['max_regression']:
+                    regressions.append(name)
+            if regressions:
+                raise CommandError(f'기준 대비 {options["max_regression"]}% 넘게 나빠진 지표: {", ".join(regressions)}')
+        self.stdout.write(self.style.SUCCESS('WebSocket 부하 테스트 완료'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from chat.media_store import DEFAULT_GRACE_HOURS, purge_unreferenced_blobs
+
+
+class Command(BaseCommand):
+    help = '어떤 메시지도 참조하지 않는 업로드 blob(원본/변환본) 삭제'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=DEFAULT_GRACE_HOURS,
+                            help=f'마지막 업로드/참조 후 이 시간이 지난 blob만 삭제 (기본 {DEFAULT_GRACE_HOURS}시간)')
+        parser.add_argument('--dry-run', action='store_true', help='삭제하지 않고 대상 수만 출력')
+
+    def handle(self, *args, **options):
+        count = purge_unreferenced_blobs(grace_hours=options['grace_hours'], dry_run=options['dry_run'])
+        verb = '삭제 대상' if options['dry_run'] else '삭제됨'
+        self.stdout.write(self.style.SUCCESS(f'참조 없는 blob {count}개 {verb}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from chat.media_index import rebuild_media_index
+
+
+class Command(BaseCommand):
+    help = '미디어 저장소 전체를 훑어 미디어 색인(MediaIndexEntry) 재구성'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hash', action='store_true', help='해시가 없는 파일의 SHA-256도 계산 (느림)')
+
+    def handle(self, *args, **options):
+        written, removed = rebuild_media_index(with_hash=options['hash'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'미디어 색인 {written}개 추가/갱신, {removed}개 삭제'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from chat.admin_search import drop_search_indexes, install_search_indexes
+
+
+class Command(BaseCommand):
+    help = ('관리자 검색 인덱스(PostgreSQL pg_trgm, MySQL ngram FULLTEXT, SQLite FTS5 trigram) 생성/재생성. '
+            'SQLite에서 테이블을 다시 만드는 마이그레이션 뒤에도 실행')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drop', action='store_true', help='기존 검색 인덱스를 지우고 다시 만듦')
+
+    def handle(self, *args, **options):
+        if options['drop']:
+            drop_search_indexes()
+        installed = install_search_indexes(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'검색 인덱스 {installed}개 테이블 준비 완료'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from chat.admin_stats import refresh_admin_stats
+
+
+class Command(BaseCommand):
+    help = '관리자 통계 일별 집계 테이블을 마지막 집계 위치부터 증분 갱신 (cron 등으로 주기 실행)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='한 번에 집계할 ID 범위 크기')
+        parser.add_argument('--max-batches', type=int, default=None, help='집계 대상별 최대 배치 수 (기본: 끝까지)')
+
+    def handle(self, *args, **options):
+        result = refresh_admin_stats(batch_size=options['batch_size'], max_batches=options['max_batches'])
+        for name, batches in result.items():
+            self.stdout.write(f'  {name}: {batches}개 배치')
+        self.stdout.write(self.style.SUCCESS('관리자 통계 집계 완료'))
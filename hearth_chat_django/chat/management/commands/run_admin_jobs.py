@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from chat.admin_jobs import resume_stale_jobs
+
+
+class Command(BaseCommand):
+    help = '중단된 관리자 백그라운드 작업(대량 삭제 등)을 기록된 단계부터 이어서 실행 (서버 재시작 후 / cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-seconds', type=float, default=None,
+                            help='이 시간 이상 갱신되지 않은 대기/실행 중 작업을 재개 (기본: ADMIN_JOB_STALE_SECONDS)')
+
+    def handle(self, *args, **options):
+        # 명령 프로세스가 끝나면 워커 스레드도 끝나므로 현재 프로세스에서 순서대로 실행
+        resumed = resume_stale_jobs(stale_seconds=options['stale_seconds'], run_inline=True)
+        for job_id in resumed:
+            self.stdout.write(f'  작업 #{job_id} 재개')
+        self.stdout.write(self.style.SUCCESS(f'관리자 작업 {len(resumed)}개 처리 완료'))
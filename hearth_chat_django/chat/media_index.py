@@ -0,0 +1,146 @@
+"""미디어 파일 색인
+
+list_media_files는 요청마다 MEDIA_ROOT 전체를 os.walk로 훑었고, file_exists는 호출마다
+파일 시스템을 두 번 조회했다. 저장소의 파일 목록을 MediaIndexEntry 테이블(경로, 크기, 해시, 수정 시각)에
+유지하고 두 API는 이 테이블을 조회한다.
+
+- 배포 전에 저장된 파일 중 DB에 경로가 있는 것(MediaBlob, MediaFile)은 마이그레이션(0028_backfill_media_index)이 채우고,
+  저장소에만 있는 파일은 배포 후 `python manage.py rebuild_media_index` 로 채움
+- file_exists/에셋 배치 조회는 이 색인만 보고 저장소는 조회하지 않음 (chat/asset_index.py)
+
+- 업로드/삭제 시점에 index_file() / unindex_paths() 로 갱신
+  (blob 저장, 변환본 생성, 직접 업로드 완료, 관리자 미디어 업로드/삭제)
+- 저장소를 직접 건드린 경우 `python manage.py rebuild_media_index` 로 전체 재구성
+- 갱신 시 메모리 에셋 색인(chat/asset_index.py)에 바뀐 경로를 알림
+"""
+import hashlib
+import logging
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .asset_index import asset_index
+from .models import MediaIndexEntry
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 500
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def normalize_path(path):
+    """요청 경로 → 저장소 상대 경로 ('/media/' 접두어와 앞쪽 '/' 제거)"""
+    path = (path or '').strip().replace('\\', '/').lstrip('/')
+    if path.startswith('media/'):
+        path = path[len('media/'):]
+    return path
+
+
+def _modified_time(storage, path):
+    try:
+        mtime = storage.get_modified_time(path)
+    except (NotImplementedError, OSError, AttributeError):
+        return None
+    if mtime is not None and timezone.is_naive(mtime):
+        mtime = timezone.make_aware(mtime)
+    return mtime
+
+
+def hash_storage_file(storage, path):
+    digest = hashlib.sha256()
+    with storage.open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def index_file(path, size=None, sha256='', storage=None):
+    """저장된 파일 1개를 색인에 추가/갱신. 색인 실패는 업로드를 막지 않음"""
+    storage = storage or default_storage
+    try:
+        if size is None:
+            size = storage.size(path)
+        MediaIndexEntry.objects.update_or_create(
+            path=path,
+            defaults={'size': size, 'sha256': sha256 or '', 'mtime': _modified_time(storage, path) or timezone.now()},
+        )
+        asset_index.invalidate([path])
+    except Exception as e:
+        logger.warning("미디어 색인 갱신 실패: %s (%s)", path, e)
+
+
+def unindex_paths(paths):
+    paths = [path for path in paths if path]
+    if paths:
+        MediaIndexEntry.objects.filter(path__in=paths).delete()
+        asset_index.invalidate(paths)
+
+
+def walk_storage(storage=None, directory=''):
+    """저장소의 모든 파일 경로를 순회 (로컬/원격 저장소 공통, listdir 기반)"""
+    storage = storage or default_storage
+    try:
+        dirs, files = storage.listdir(directory)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for name in files:
+        yield f"{directory}/{name}" if directory else name
+    for name in dirs:
+        yield from walk_storage(storage, f"{directory}/{name}" if directory else name)
+
+
+def rebuild_media_index(storage=None, with_hash=False, stdout=None):
+    """저장소 전체를 훑어 색인 재구성. (추가/갱신 수, 삭제 수) 반환
+
+    크기와 수정 시각이 색인과 같으면 건너뛰고(해시도 재계산하지 않음), 변경분은 배치 단위로 기록한다.
+    """
+    storage = storage or default_storage
+    known = {
+        entry.path: entry
+        for entry in MediaIndexEntry.objects.only('path', 'size', 'sha256', 'mtime').iterator()
+    }
+    seen = set()
+    to_create, to_update = [], []
+    written = 0
+
+    def flush():
+        nonlocal written
+        with transaction.atomic():
+            MediaIndexEntry.objects.bulk_create(to_create, batch_size=REBUILD_BATCH_SIZE, ignore_conflicts=True)
+            MediaIndexEntry.objects.bulk_update(to_update, ['size', 'sha256', 'mtime'], batch_size=REBUILD_BATCH_SIZE)
+        written += len(to_create) + len(to_update)
+        to_create.clear()
+        to_update.clear()
+        if stdout is not None:
+            stdout.write(f"  {len(seen)}개 확인, {written}개 기록")
+
+    for path in walk_storage(storage):
+        seen.add(path)
+        try:
+            size = storage.size(path)
+        except OSError:
+            continue
+        mtime = _modified_time(storage, path)
+        entry = known.get(path)
+        unchanged = entry is not None and entry.size == size and entry.mtime == mtime
+        if unchanged and (entry.sha256 or not with_hash):
+            continue
+        sha256 = entry.sha256 if unchanged else ''
+        if with_hash and not sha256:
+            sha256 = hash_storage_file(storage, path)
+        if entry is None:
+            to_create.append(MediaIndexEntry(path=path, size=size, sha256=sha256, mtime=mtime))
+        else:
+            entry.size, entry.sha256, entry.mtime = size, sha256, mtime
+            to_update.append(entry)
+        if len(to_create) + len(to_update) >= REBUILD_BATCH_SIZE:
+            flush()
+    flush()
+
+    stale = [path for path in known if path not in seen]
+    for start in range(0, len(stale), REBUILD_BATCH_SIZE):
+        unindex_paths(stale[start:start + REBUILD_BATCH_SIZE])
+    asset_index.invalidate()
+    return written, len(stale)
+
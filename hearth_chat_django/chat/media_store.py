@@ -0,0 +1,170 @@
+"""내용 해시 기반 업로드 저장소
+
+채팅 첨부 이미지를 `image/chat_attach/{file.name}` 대신 내용의 SHA-256으로 저장한다.
+
+    image/chat_attach/ab/ab12...ef.jpg
+
+- 같은 파일을 다시 올리면 쓰기를 건너뛰고 기존 blob을 그대로 사용
+- 파일명 충돌로 저장소가 이름을 바꾸는 일이 없음
+- MediaBlob.ref_count = 이 파일을 참조하는 메시지 수. 메시지 저장 시 증가, 삭제 시 감소
+- 참조가 0이고 유예 시간이 지난 blob만 purge_unreferenced_blobs()로 실제 삭제
+  (업로드 직후 아직 메시지로 보내지 않은 파일을 지우지 않도록)
+"""
+import hashlib
+import json
+import logging
+import re
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from .image_loader import storage_name_for_url
+from .media_index import index_file, unindex_paths
+from .models import ImageVariantSet, MediaBlob
+
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = 'image/chat_attach'
+BLOB_NAME_RE = re.compile(r'^image/chat_attach/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z0-9]+$')
+DEFAULT_GRACE_HOURS = 24
+
+
+def blob_path(sha256, ext):
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}.{ext}"
+
+
+def hash_file(file):
+    """업로드 파일을 청크 단위로 읽으며 SHA-256 계산 (전체를 메모리에 올리지 않음)"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in file.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return digest.hexdigest(), size
+
+
+def store_uploaded_file(file, ext, content_type=''):
+    """업로드 파일을 blob으로 저장. (MediaBlob, 새로 저장했는지) 반환"""
+    sha256, size = hash_file(file)
+    existing = MediaBlob.objects.filter(sha256=sha256).first()
+    if existing is not None:
+        # 갱신 시각을 올려 정리 작업이 방금 다시 올라온 blob을 지우지 않도록 함
+        existing.save(update_fields=['updated_at'])
+        return existing, False
+
+    path = blob_path(sha256, ext)
+    if not default_storage.exists(path):
+        saved = default_storage.save(path, file)
+        if saved != path:
+            # 동시에 같은 파일을 저장하던 요청이 먼저 쓴 경우: 중복본 제거
+            default_storage.delete(saved)
+    try:
+        with transaction.atomic():
+            blob = MediaBlob.objects.create(sha256=sha256, path=path, size=size, content_type=content_type or '')
+        index_file(path, size=size, sha256=sha256)
+        return blob, True
+    except IntegrityError:
+        return MediaBlob.objects.get(sha256=sha256), False
+
+
+def content_hash_for_url(url):
+    """blob URL이면 내용 해시, 아니면 None"""
+    name = storage_name_for_url(url)
+    match = BLOB_NAME_RE.match(name or '')
+    return match.group(1) if match else None
+
+
+def message_media_urls(attach_image, image_urls_json):
+    """메시지 1건이 참조하는 이미지 URL 집합"""
+    urls = set()
+    if attach_image:
+        urls.add(attach_image)
+    if image_urls_json:
+        try:
+            parsed = json.loads(image_urls_json) if isinstance(image_urls_json, str) else image_urls_json
+        except (json.JSONDecodeError, TypeError):
+            parsed = []
+        urls.update(url for url in parsed or [] if isinstance(url, str))
+    return urls
+
+
+def _blob_counts(url_sets):
+    """메시지별 URL 집합 목록 → {blob 경로: 참조 메시지 수}"""
+    counts = Counter()
+    for urls in url_sets:
+        paths = {storage_name_for_url(url) for url in urls}
+        counts.update(path for path in paths if path and BLOB_NAME_RE.match(path))
+    return counts
+
+
+def acquire_message_media(attach_image=None, image_urls_json=None):
+    """메시지 저장 후 호출: 참조하는 blob의 ref_count 증가"""
+    for path, count in _blob_counts([message_media_urls(attach_image, image_urls_json)]).items():
+        MediaBlob.objects.filter(path=path).update(ref_count=F('ref_count') + count)
+
+
+def release_chat_media(chat_queryset):
+    """메시지 삭제 전에 호출: 참조하던 blob의 ref_count 감소 (파일 삭제는 정리 작업에서)"""
+    rows = chat_queryset.filter(
+        Q(attach_image__isnull=False) | Q(imageUrls__isnull=False)
+    ).values_list('attach_image', 'imageUrls')
+    counts = _blob_counts(message_media_urls(attach_image, image_urls) for attach_image, image_urls in rows.iterator())
+    for path, count in counts.items():
+        MediaBlob.objects.filter(path=path).update(ref_count=Case(
+            When(ref_count__gte=count, then=F('ref_count') - count),
+            default=Value(0),
+        ))
+    return sum(counts.values())
+
+
+def purge_unreferenced_blobs(grace_hours=DEFAULT_GRACE_HOURS, dry_run=False):
+    """참조 0인 blob 중 유예 시간이 지난 것의 파일/변환본/행 삭제. 삭제한 blob 수 반환"""
+    cutoff = timezone.now() - timedelta(hours=grace_hours)
+    purged = 0
+    for blob in MediaBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).iterator():
+        if dry_run:
+            purged += 1
+            continue
+        with transaction.atomic():
+            # 삭제 직전에 다시 참조되었거나 재업로드되었으면 건너뜀
+            locked = MediaBlob.objects.select_for_update().filter(
+                pk=blob.pk, ref_count=0, updated_at__lt=cutoff
+            ).first()
+            if locked is None:
+                continue
+            _delete_blob_files(locked.path)
+            locked.delete()
+        purged += 1
+    return purged
+
+
+def _delete_blob_files(path):
+    try:
+        default_storage.delete(path)
+    except Exception as e:
+        logger.warning("blob 파일 삭제 실패: %s (%s)", path, e)
+    unindex_paths([path])
+    variant_set = ImageVariantSet.objects.filter(original=path).first()
+    if variant_set is None:
+        return
+    deleted_names = []
+    try:
+        variants = json.loads(variant_set.variants or '{}')
+    except (json.JSONDecodeError, TypeError):
+        variants = {}
+    for urls in variants.values():
+        for url in urls.values():
+            name = storage_name_for_url(url)
+            if name:
+                try:
+                    default_storage.delete(name)
+                except Exception as e:
+                    logger.warning("변환본 파일 삭제 실패: %s (%s)", name, e)
+                deleted_names.append(name)
+    unindex_paths(deleted_names)
+    variant_set.delete()
@@ -0,0 +1,343 @@
+"""프로세스 메모리 메트릭 + Prometheus 텍스트 내보내기
+
+캐시에 통계를 읽고-더하고-쓰는 방식은 동시 요청에서 증가분이 사라지고 요청마다 캐시 왕복이 생긴다.
+여기서는 메트릭마다 락으로 보호한 메모리 카운터를 두고 /metrics 요청 때만 텍스트로 만든다.
+
+    Counter    단조 증가 (…_total)
+    Gauge      증감 (진행 중 요청 수 등)
+    Histogram  고정 버킷 누적 분포 (…_bucket / …_sum / …_count)
+
+레이블 조합은 라벨 값 튜플로 구분한다. 경로 라벨에는 URL 패턴(예: api/chat/rooms/<pk>/)을 써서 개수를 제한한다.
+값은 워커 프로세스별이므로 프로세스가 여럿이면 Prometheus에서 인스턴스별로 수집해 합친다.
+
+- 요청 메트릭: chat/middleware.py PerformanceMonitoringMiddleware
+- WebSocket 단계별 시간/연결 수/그룹 크기: chat/consumers.py ChatConsumer
+- 수집 시점에 읽는 값(AI 응답 캐시 통계 등): register_collector()
+"""
+import bisect
+import hmac
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+AI_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 60.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = ''
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_items(items))
+        return lines
+
+    def _render_items(self, items):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in items]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """버킷 경계별 개수를 따로 세고 내보낼 때 누적"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [버킷별 개수..., +Inf 개수], 합계, 개수
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self, **labels):
+        """{'count', 'sum'} (테스트/디버그용)"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return {'count': state[2], 'sum': state[1]} if state else {'count': 0, 'sum': 0.0}
+
+    def _render_items(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector):
+        """collector() → [(이름, 타입, 설명, {라벨: 값} 또는 None, 값)] 을 수집 때마다 호출"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            seen = set()
+            for name, kind, documentation, labels, value in collector():
+                if name not in seen:
+                    lines.append(f'# HELP {name} {documentation}')
+                    lines.append(f'# TYPE {name} {kind}')
+                    seen.add(name)
+                labels = labels or {}
+                lines.append(f'{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP 요청 수', ('method', 'route', 'status'))
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'HTTP 요청 처리 시간 (미들웨어 안쪽 전체)', ('method', 'route'))
+http_request_db_duration = registry.histogram(
+    'http_request_db_seconds', 'HTTP 요청 하나에서 DB 쿼리 실행에 쓴 시간 합계', ('method', 'route'))
+http_requests_in_flight = registry.gauge(
+    'http_requests_in_flight', '처리 중인 HTTP 요청 수')
+http_request_db_queries = registry.histogram(
+    'http_request_db_queries', 'HTTP 요청 하나에서 실행한 DB 쿼리 수', ('method', 'route'), buckets=QUERY_COUNT_BUCKETS)
+ws_message_db_queries = registry.histogram(
+    'ws_message_db_queries', 'WebSocket 메시지 하나를 처리하며 실행한 DB 쿼리 수', ('message_type',), buckets=QUERY_COUNT_BUCKETS)
+ws_message_db_duration = registry.histogram(
+    'ws_message_db_seconds', 'WebSocket 메시지 하나를 처리하며 DB 쿼리 실행에 쓴 시간 합계', ('message_type',))
+repeated_queries = registry.counter(
+    'db_repeated_query_suspects_total', '같은 SQL이 반복 실행된(N+1 의심) 요청/메시지 수', ('scope', 'name'))
+http_cache_requests = registry.counter(
+    'http_cache_requests_total', '응답 캐시 조회 결과 (뷰가 request.META["cache_hit"] 를 설정한 요청)', ('route', 'result'))
+
+ws_stage_duration = registry.histogram(
+    'ws_stage_duration_seconds', 'WebSocket 채팅 메시지 처리 단계별 시간', ('stage',))
+ws_connections = registry.gauge(
+    'ws_connections', '이 프로세스에 연결된 WebSocket 수')
+ai_provider_duration = registry.histogram(
+    'ai_provider_request_seconds', 'AI 제공자 호출 시간 (응답 전체를 받을 때까지)', ('provider', 'result'),
+    buckets=AI_LATENCY_BUCKETS)
+ai_time_to_first_byte = registry.histogram(
+    'ws_ai_time_to_first_byte_seconds', '사용자 메시지 수신부터 AI 응답을 방에 처음 보내기까지 (묶음 대기/큐 포함)',
+    buckets=AI_LATENCY_BUCKETS)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """블록 실행 시간을 histogram에 기록 (예외가 나도 기록)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+class GroupMembership:
+    """이 프로세스 소켓들의 채널 그룹 가입 현황
+
+    채널 레이어는 그룹 크기를 알려 주지 않으므로 컨슈머가 group_add/group_discard 할 때 같이 기록한다.
+    대화방 그룹(chat_room_<id>)은 방마다 라벨을 만들지 않고 방 수/최대/합계로만 내보낸다.
+    """
+
+    ROOM_PREFIX = 'chat_room_'
+
+    def __init__(self):
+        self._groups = {}  # 그룹 → {채널 이름}
+        self._lock = threading.Lock()
+
+    def add(self, group, channel):
+        with self._lock:
+            self._groups.setdefault(group, set()).add(channel)
+
+    def discard(self, group, channel):
+        with self._lock:
+            members = self._groups.get(group)
+            if members is not None:
+                members.discard(channel)
+                if not members:
+                    del self._groups[group]
+
+    def groups_of(self, channel):
+        with self._lock:
+            return [group for group, members in self._groups.items() if channel in members]
+
+    def sizes(self):
+        with self._lock:
+            return {group: len(members) for group, members in self._groups.items()}
+
+    def clear(self):
+        with self._lock:
+            self._groups.clear()
+
+
+ws_groups = GroupMembership()
+
+
+def _ws_collector():
+    from .ai_scheduler import ai_scheduler
+
+    sizes = ws_groups.sizes()
+    rooms = [size for group, size in sizes.items()
+             if group.startswith(GroupMembership.ROOM_PREFIX) and group != 'chat_room_list']
+    samples = [
+        ('ws_group_members', 'gauge', '채널 그룹 가입 소켓 수 (대화방 그룹 제외)', {'group': group}, size)
+        for group, size in sorted(sizes.items())
+        if not group.startswith(GroupMembership.ROOM_PREFIX) or group == 'chat_room_list'
+    ]
+    queued, in_flight = ai_scheduler.task_counts()
+    samples += [
+        ('ws_room_groups', 'gauge', '소켓이 하나 이상 들어 있는 대화방 그룹 수', None, len(rooms)),
+        ('ws_room_group_members_max', 'gauge', '가장 큰 대화방 그룹의 소켓 수', None, max(rooms, default=0)),
+        ('ws_room_group_members_total', 'gauge', '대화방 그룹 가입 수 합계', None, sum(rooms)),
+        ('ai_pending_tasks', 'gauge', '방별 스케줄러의 AI 작업 수', {'state': 'queued'}, queued),
+        ('ai_pending_tasks', 'gauge', '방별 스케줄러의 AI 작업 수', {'state': 'in_flight'}, in_flight),
+    ]
+    return samples
+
+
+def _ai_cache_collector():
+    from .ai_cache import ai_response_cache
+
+    stats = ai_response_cache.stats()
+    return [
+        ('ai_response_cache_lookups_total', 'counter', 'AI 응답 캐시 조회 수', {'result': 'hit'}, stats['hits']),
+        ('ai_response_cache_lookups_total', 'counter', 'AI 응답 캐시 조회 수', {'result': 'miss'}, stats['misses']),
+        ('ai_response_cache_evictions_total', 'counter', 'AI 응답 캐시에서 밀려난 항목 수', None, stats['evictions']),
+        ('ai_response_cache_entries', 'gauge', 'AI 응답 캐시 항목 수', None, stats['entries']),
+    ]
+
+
+registry.register_collector(_ai_cache_collector)
+registry.register_collector(_ws_collector)
+
+
+def _client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def metrics_view(request):
+    """Prometheus 수집 엔드포인트
+
+    `Authorization: Bearer <METRICS_AUTH_TOKEN>` 또는 관리자 세션 필요.
+    METRICS_ALLOW_LOCALHOST를 켠 경우에만 로컬 요청(127.0.0.1, ::1)도 허용
+    (같은 호스트의 리버스 프록시 뒤에서는 모든 외부 요청이 로컬 주소로 보이므로 기본값은 꺼짐)
+    """
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    allowed = (
+        bool(token) and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode())
+        or getattr(request.user, 'is_staff', False)
+        or getattr(settings, 'METRICS_ALLOW_LOCALHOST', False) and _client_ip(request) in ('127.0.0.1', '::1')
+    )
+    if not allowed:
+        return HttpResponseForbidden('metrics token or staff session required')
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -1,64 +1,90 @@
 import time
 import logging
-from django.utils.deprecation import MiddlewareMixin
-from django.core.cache import cache
+
+from . import metrics
+from .query_stats import log_query_stats, track_queries
 
 logger = logging.getLogger(__name__)
 
-class PerformanceMonitoringMiddleware(MiddlewareMixin):
-    """API 성능 모니터링 미들웨어"""
-    
-    def process_request(self, request):
-        request.start_time = time.time()
-    
-    def process_response(self, request, response):
-        if hasattr(request, 'start_time'):
-            duration = time.time() - request.start_time
-            
-            # 느린 요청 로깅 (1초 이상)
-            if duration > 1.0:
-                logger.warning(
-                    f'Slow request: {request.method} {request.path} '
-                    f'took {duration:.2f}s'
-                )
-            
-            # 응답 헤더에 처리 시간 추가
-            response['X-Response-Time'] = f'{duration:.3f}s'
-            
-            # 캐시 히트율 모니터링
-            if 'cache_hit' in request.META:
-                cache_key = f"api_stats_{request.path}"
-                stats = cache.get(cache_key, {'hits': 0, 'misses': 0, 'total_time': 0})
-                if request.META['cache_hit']:
-                    stats['hits'] += 1
-                else:
-                    stats['misses'] += 1
-                stats['total_time'] += duration
-                cache.set(cache_key, stats, 3600)  # 1시간간 저장
-        
+SLOW_REQUEST_SECONDS = 1.0
+
+
+def _route(request):
+    """메트릭 라벨용 경로: 실제 경로 대신 URL 패턴 (매칭 안 되면 unmatched)"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.route or match.view_name or 'unknown'
+
+
+class PerformanceMonitoringMiddleware:
+    """API 성능 모니터링 미들웨어
+
+    경로별 요청 수/처리 시간/DB 시간/쿼리 수 히스토그램, 처리 중 요청 수, 응답 캐시 히트를 chat/metrics.py 에 기록
+    (/metrics 에서 Prometheus 형식으로 조회). 1초 이상 걸린 요청과 같은 SQL이 반복된(N+1 의심) 요청은 경고 로그.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics.http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            with track_queries() as stats:
+                request.query_stats = stats
+                response = self.get_response(request)
+        finally:
+            metrics.http_requests_in_flight.dec()
+        duration = time.perf_counter() - start
+
+        route = _route(request)
+        metrics.http_requests.inc(method=request.method, route=route, status=response.status_code)
+        metrics.http_request_duration.observe(duration, method=request.method, route=route)
+        metrics.http_request_db_duration.observe(stats.elapsed, method=request.method, route=route)
+        metrics.http_request_db_queries.observe(stats.count, method=request.method, route=route)
+        if log_query_stats(stats, f'{request.method} {request.path}'):
+            metrics.repeated_queries.inc(scope='http', name=route)
+        if 'cache_hit' in request.META:
+            metrics.http_cache_requests.inc(route=route, result='hit' if request.META['cache_hit'] else 'miss')
+
+        # 느린 요청 로깅 (1초 이상)
+        if duration > SLOW_REQUEST_SECONDS:
+            logger.warning(
+                f'Slow request: {request.method} {request.path} '
+                f'took {duration:.2f}s (db {stats.elapsed:.2f}s, {stats.count} queries)'
+            )
+
+        # 응답 헤더에 처리 시간 / 쿼리 수 추가
+        response['X-Response-Time'] = f'{duration:.3f}s'
+        response['X-Query-Count'] = str(stats.count)
         return response
 
-class QueryCountMiddleware(MiddlewareMixin):
-    """데이터베이스 쿼리 수 모니터링 미들웨어"""
-    
-    def process_request(self, request):
-        from django.db import connection
-        connection.queries_log = True
-        request.queries_start = len(connection.queries)
-    
-    def process_response(self, request, response):
-        from django.db import connection
-        if hasattr(request, 'queries_start'):
-            query_count = len(connection.queries) - request.queries_start
-            
-            # 과도한 쿼리 수 로깅 (50개 이상)
-            if query_count > 50:
-                logger.warning(
-                    f'High query count: {request.method} {request.path} '
-                    f'executed {query_count} queries'
-                )
-            
-            # 응답 헤더에 쿼리 수 추가
-            response['X-Query-Count'] = str(query_count)
-        
-        return response 
\ No newline at end of file
+class QueryCountMiddleware:
+    """데이터베이스 쿼리 수 모니터링 미들웨어 (PerformanceMonitoringMiddleware 없이 단독으로 쓸 때)
+
+    DEBUG 쿼리 로그 대신 chat/query_stats.py 계측을 사용하므로 운영 환경에서도 동작한다.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # PerformanceMonitoringMiddleware가 이미 집계 중이면 그대로 둠
+        if getattr(request, 'query_stats', None) is not None:
+            return self.get_response(request)
+        with track_queries() as stats:
+            request.query_stats = stats
+            response = self.get_response(request)
+
+        # 과도한 쿼리 수 로깅 (50개 이상)
+        if stats.count > 50:
+            logger.warning(
+                f'High query count: {request.method} {request.path} '
+                f'executed {stats.count} queries'
+            )
+        log_query_stats(stats, f'{request.method} {request.path}')
+
+        # 응답 헤더에 쿼리 수 추가
+        response['X-Query-Count'] = str(stats.count)
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chat", "0018_chatroom_is_video_call_chatroom_video_call_status_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatroom",
+            name="ai_response_cache_enabled",
+            field=models.BooleanField(default=False, verbose_name="AI 응답 캐시 사용"),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0019_chatroom_ai_response_cache_enabled'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariantSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original', models.CharField(max_length=500, unique=True, verbose_name='원본 저장 경로')),
+                ('width', models.PositiveIntegerField(verbose_name='원본 너비')),
+                ('height', models.PositiveIntegerField(verbose_name='원본 높이')),
+                ('thumbnail', models.CharField(max_length=500, verbose_name='썸네일 URL')),
+                ('variants', models.TextField(verbose_name='포맷/너비별 변환본 URL (JSON)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')),
+            ],
+            options={
+                'verbose_name': '이미지 변환본',
+                'verbose_name_plural': '이미지 변환본들',
+                'db_table': 'chat_imagevariantset',
+            },
+        ),
+    ]
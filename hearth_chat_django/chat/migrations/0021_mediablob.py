@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0020_imagevariantset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='내용 해시 (SHA-256)')),
+                ('path', models.CharField(max_length=500, unique=True, verbose_name='저장 경로')),
+                ('size', models.PositiveBigIntegerField(verbose_name='파일 크기')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='MIME 타입')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='참조 메시지 수')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='수정 시간')),
+            ],
+            options={
+                'verbose_name': '미디어 blob',
+                'verbose_name_plural': '미디어 blob들',
+                'db_table': 'chat_mediablob',
+                'indexes': [models.Index(fields=['ref_count', 'updated_at'], name='chat_mediab_ref_cou_55507f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-19 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0021_mediablob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500, unique=True, verbose_name='저장 경로')),
+                ('size', models.PositiveBigIntegerField(verbose_name='파일 크기')),
+                ('sha256', models.CharField(blank=True, db_index=True, max_length=64, verbose_name='내용 해시 (SHA-256)')),
+                ('mtime', models.DateTimeField(blank=True, null=True, verbose_name='파일 수정 시각')),
+                ('indexed_at', models.DateTimeField(auto_now=True, verbose_name='색인 시각')),
+            ],
+            options={
+                'verbose_name': '미디어 색인',
+                'verbose_name_plural': '미디어 색인들',
+                'db_table': 'chat_mediaindex',
+                'indexes': [models.Index(fields=['mtime'], name='chat_mediai_mtime_4bc1a8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.0.1 on 2026-10-19 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0022_mediaindexentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUserStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='날짜')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='새 유저 수')),
+            ],
+            options={
+                'verbose_name': '일별 가입 통계',
+                'verbose_name_plural': '일별 가입 통계들',
+                'db_table': 'chat_daily_user_stat',
+            },
+        ),
+        migrations.CreateModel(
+            name='StatsWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='집계 대상')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='마지막으로 집계한 ID')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='집계 시각')),
+            ],
+            options={
+                'verbose_name': '통계 집계 위치',
+                'verbose_name_plural': '통계 집계 위치들',
+                'db_table': 'chat_stats_watermark',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyMessageStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='날짜')),
+                ('room_type', models.CharField(blank=True, max_length=10, verbose_name='대화방 타입')),
+                ('sender_type', models.CharField(max_length=10, verbose_name='발신자 타입')),
+                ('count', models.PositiveBigIntegerField(default=0, verbose_name='메시지 수')),
+            ],
+            options={
+                'verbose_name': '일별 메시지 통계',
+                'verbose_name_plural': '일별 메시지 통계들',
+                'db_table': 'chat_daily_message_stat',
+                'unique_together': {('date', 'room_type', 'sender_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRoomStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='날짜')),
+                ('room_type', models.CharField(max_length=10, verbose_name='대화방 타입')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='새 대화방 수')),
+            ],
+            options={
+                'verbose_name': '일별 대화방 통계',
+                'verbose_name_plural': '일별 대화방 통계들',
+                'db_table': 'chat_daily_room_stat',
+                'unique_together': {('date', 'room_type')},
+            },
+        ),
+    ]
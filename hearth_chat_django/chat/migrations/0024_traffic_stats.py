@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-19 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0023_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTrafficStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_id', models.BigIntegerField(default=0, verbose_name='대화방 ID')),
+                ('sender_type', models.CharField(max_length=10, verbose_name='발신자 타입')),
+                ('ai_name', models.CharField(blank=True, max_length=50, verbose_name='AI 이름')),
+                ('ai_type', models.CharField(blank=True, max_length=50, verbose_name='AI 타입')),
+                ('emotion', models.CharField(blank=True, max_length=20, verbose_name='감정 상태')),
+                ('count', models.PositiveBigIntegerField(default=0, verbose_name='메시지 수')),
+                ('date', models.DateField(verbose_name='날짜')),
+            ],
+            options={
+                'verbose_name': '일별 메시지 트래픽',
+                'verbose_name_plural': '일별 메시지 트래픽들',
+                'db_table': 'chat_daily_traffic_stat',
+                'indexes': [models.Index(fields=['room_id', 'date'], name='chat_daily__room_id_eb9040_idx')],
+                'unique_together': {('date', 'room_id', 'sender_type', 'ai_name', 'ai_type', 'emotion')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyTrafficStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_id', models.BigIntegerField(default=0, verbose_name='대화방 ID')),
+                ('sender_type', models.CharField(max_length=10, verbose_name='발신자 타입')),
+                ('ai_name', models.CharField(blank=True, max_length=50, verbose_name='AI 이름')),
+                ('ai_type', models.CharField(blank=True, max_length=50, verbose_name='AI 타입')),
+                ('emotion', models.CharField(blank=True, max_length=20, verbose_name='감정 상태')),
+                ('count', models.PositiveBigIntegerField(default=0, verbose_name='메시지 수')),
+                ('hour', models.DateTimeField(verbose_name='시간 (정시)')),
+            ],
+            options={
+                'verbose_name': '시간별 메시지 트래픽',
+                'verbose_name_plural': '시간별 메시지 트래픽들',
+                'db_table': 'chat_hourly_traffic_stat',
+                'indexes': [models.Index(fields=['room_id', 'hour'], name='chat_hourly_room_id_62a455_idx')],
+                'unique_together': {('hour', 'room_id', 'sender_type', 'ai_name', 'ai_type', 'emotion')},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-19 19:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0024_traffic_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_type', models.CharField(max_length=30, verbose_name='작업 종류')),
+                ('params', models.TextField(default='{}', verbose_name='작업 인자 (JSON)')),
+                ('state', models.TextField(default='{}', verbose_name='진행 위치 (JSON)')),
+                ('status', models.CharField(choices=[('pending', '대기'), ('running', '실행 중'), ('completed', '완료'), ('failed', '실패')], default='pending', max_length=10, verbose_name='상태')),
+                ('total', models.PositiveBigIntegerField(default=0, verbose_name='전체 처리 예상 수')),
+                ('processed', models.PositiveBigIntegerField(default=0, verbose_name='처리한 수')),
+                ('error', models.TextField(blank=True, verbose_name='오류')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='마지막 진행 시간')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='종료 시간')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='요청자')),
+            ],
+            options={
+                'verbose_name': '관리자 작업',
+                'verbose_name_plural': '관리자 작업들',
+                'db_table': 'chat_admin_job',
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='chat_admin__status_13ab4e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-19 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0025_adminjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['timestamp', 'id'], name='chat_chat_timesta_e1c3ac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['user_id', 'timestamp'], name='chat_chat_user_id_eb715b_idx'),
+        ),
+    ]
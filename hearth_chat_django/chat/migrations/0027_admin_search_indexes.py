@@ -0,0 +1,101 @@
+"""관리자 목록 부분 문자열 검색 인덱스 (chat/admin_search.py 참고)
+
+마이그레이션은 적용 시점의 동작이 고정되어야 하므로 런타임 모듈을 가져오지 않고 DB별 SQL을 그대로 둔다.
+인덱스 생성이 실패하면(pg_trgm 확장 권한 없음, ngram 파서/FTS5 trigram 미지원 등) 마이그레이션도 실패한다.
+"""
+from django.db import migrations
+
+# 테이블 → 검색 컬럼
+SEARCH_COLUMNS = {
+    'chat_chat': ('content',),
+    'chat_chatroom': ('name',),
+    'auth_user': ('username', 'email'),
+}
+
+
+class VendorRunSQL(migrations.RunSQL):
+    """지정한 DB에서만 실행하는 RunSQL"""
+
+    def __init__(self, vendor, sql, reverse_sql=None, **kwargs):
+        super().__init__(sql, reverse_sql, **kwargs)
+        self.vendor = vendor
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        kwargs['vendor'] = self.vendor
+        return name, args, kwargs
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f'Raw SQL operation ({self.vendor})'
+
+
+def _postgresql():
+    sql = ['CREATE EXTENSION IF NOT EXISTS pg_trgm']
+    reverse_sql = []
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            index = f'{table}_{column}_search'
+            sql.append(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} USING gin (UPPER("{column}"::text) gin_trgm_ops)')
+            reverse_sql.append(f'DROP INDEX CONCURRENTLY IF EXISTS {index}')
+    return VendorRunSQL('postgresql', sql, reverse_sql)
+
+
+def _mysql():
+    sql, reverse_sql = [], []
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            index = f'{table}_{column}_search'
+            sql.append(f'ALTER TABLE `{table}` ADD FULLTEXT INDEX {index} (`{column}`) WITH PARSER ngram')
+            reverse_sql.append(f'ALTER TABLE `{table}` DROP INDEX {index}')
+    return VendorRunSQL('mysql', sql, reverse_sql)
+
+
+def _sqlite():
+    sql, reverse_sql = [], []
+    for table, columns in SEARCH_COLUMNS.items():
+        fts = f'{table}_search'
+        cols = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        sql += [
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', tokenize='trigram')",
+            f"INSERT INTO {fts}({fts}) VALUES('rebuild')",
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        ]
+        reverse_sql += [
+            f'DROP TRIGGER IF EXISTS {fts}_ai',
+            f'DROP TRIGGER IF EXISTS {fts}_ad',
+            f'DROP TRIGGER IF EXISTS {fts}_au',
+            f'DROP TABLE IF EXISTS {fts}',
+        ]
+    return VendorRunSQL('sqlite', sql, reverse_sql)
+
+
+class Migration(migrations.Migration):
+    # PostgreSQL CREATE INDEX CONCURRENTLY 는 트랜잭션 밖에서만 실행 가능
+    atomic = False
+
+    dependencies = [
+        ('chat', '0026_admin_list_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        _postgresql(),
+        _mysql(),
+        _sqlite(),
+    ]
@@ -0,0 +1,56 @@
+"""DB에 이미 기록된 미디어 파일을 MediaIndexEntry에 채움
+
+0022에서 만든 색인은 이후 업로드만 기록하므로, 배포 전에 저장된 파일은 list_media_files/file_exists에서
+보이지 않는다. migrate 단계에서는 저장소를 훑지 않고 DB에 경로가 남아 있는 파일(MediaBlob, MediaFile)만 채운다.
+그 밖에 저장소에만 있는 파일은 배포 후 `python manage.py rebuild_media_index` 로 채운다.
+(런타임 모듈(chat.media_index)이 바뀌어도 이 마이그레이션의 동작이 달라지지 않도록 코드를 그대로 둠)
+"""
+from django.core.files.storage import default_storage
+from django.db import migrations
+from django.utils import timezone
+
+BATCH_SIZE = 500
+
+
+def _media_file_entries(MediaFile, MediaIndexEntry, db_alias):
+    """MediaFile 행의 파일 (크기는 행 단위로 저장소에서 읽고, 없어진 파일은 건너뜀)"""
+    names = MediaFile.objects.using(db_alias).exclude(file='').values_list('file', flat=True)
+    for name in names.iterator():
+        try:
+            size = default_storage.size(name)
+        except (OSError, NotImplementedError):
+            continue
+        yield MediaIndexEntry(path=name, size=size, mtime=timezone.now())
+
+
+def backfill_media_index(apps, schema_editor):
+    MediaBlob = apps.get_model('chat', 'MediaBlob')
+    MediaFile = apps.get_model('chat', 'MediaFile')
+    MediaIndexEntry = apps.get_model('chat', 'MediaIndexEntry')
+    db_alias = schema_editor.connection.alias
+
+    blobs = MediaBlob.objects.using(db_alias).values_list('path', 'size', 'sha256', 'created_at')
+    entries = (
+        MediaIndexEntry(path=path, size=size, sha256=sha256, mtime=created_at)
+        for path, size, sha256, created_at in blobs.iterator()
+    )
+    batch = []
+    for source in (entries, _media_file_entries(MediaFile, MediaIndexEntry, db_alias)):
+        for entry in source:
+            batch.append(entry)
+            if len(batch) >= BATCH_SIZE:
+                MediaIndexEntry.objects.using(db_alias).bulk_create(batch, ignore_conflicts=True)
+                batch = []
+    if batch:
+        MediaIndexEntry.objects.using(db_alias).bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0027_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_media_index, migrations.RunPython.noop),
+    ]
@@ -25,6 +25,8 @@ class ChatRoom(models.Model):
     
     # AI 응답 활성화 여부
     ai_response_enabled = models.BooleanField(default=False, verbose_name='AI 응답 활성화')
+    # 같은 질문에 대한 AI 응답 재사용 여부 (공개 방 FAQ 등)
+    ai_response_cache_enabled = models.BooleanField(default=False, verbose_name='AI 응답 캐시 사용')
     
     # 대화방 참여자들
     participants = models.ManyToManyField(User, through='ChatRoomParticipant', verbose_name='참여자들')
@@ -200,6 +202,9 @@ class Chat(models.Model):
         indexes = [
             models.Index(fields=['room', 'timestamp']),
             models.Index(fields=['sender_type', 'timestamp']),
+            # 관리자 메시지 목록 정렬/커서 페이지네이션, 유저별 필터
+            models.Index(fields=['timestamp', 'id']),
+            models.Index(fields=['user_id', 'timestamp']),
             models.Index(fields=['username']),
             # models.Index(fields=['content']),
             models.Index(fields=['created_at']),
@@ -234,7 +239,7 @@ class Chat(models.Model):
         # 이미지 URL이 있으면 message_type을 'image'로 설정
         message_type = 'image' if image_url else 'text'
         
-        return cls.objects.create(
+        message = cls.objects.create(
             room=room,
             sender_type='user',
             username=username,
@@ -249,6 +254,10 @@ class Chat(models.Model):
             imageUrls=image_urls_json,  # 다중 이미지 URL 배열 (JSON)
             # questioner_username=question_message.username if question_message else None,
         )
+        # 첨부 파일(blob) 참조 수 증가
+        from .media_store import acquire_message_media
+        acquire_message_media(image_url, image_urls_json)
+        return message
     
     @classmethod
     def save_ai_message(cls, content, session_id=None, ai_name='Gemini', ai_type='google', question_message=None, image_urls_json=None):
@@ -265,7 +274,7 @@ class Chat(models.Model):
             room = ChatRoom.objects.filter(room_type='ai').first()
             if not room:
                 room = ChatRoom.create_ai_chat_room(User.objects.first(), 'GEMINI')
-        return cls.objects.create(
+        message = cls.objects.create(
             room=room,
             sender_type='ai',
             username=None,
@@ -278,6 +287,9 @@ class Chat(models.Model):
             question_message=question_message,
             imageUrls=image_urls_json  # 이미지 URL 배열 추가
         )
+        from .media_store import acquire_message_media
+        acquire_message_media(None, image_urls_json)
+        return message
     
     @classmethod
     def get_recent_messages(cls, room, limit=20, offset=0):
@@ -458,7 +470,207 @@ class MediaFile(models.Model):
         return self.name
 
     def delete(self, *args, **kwargs):
+        from .media_index import unindex_paths
+        name = self.file.name
         # 먼저 파일을 삭제
         self.file.delete(save=False)
         # 그 다음 DB 레코드 삭제
         super().delete(*args, **kwargs)
+        unindex_paths([name])
+
+
+# 채팅 이미지 썸네일/변환본 (chat/image_variants.py 에서 생성)
+class ImageVariantSet(models.Model):
+    original = models.CharField(max_length=500, unique=True, verbose_name='원본 저장 경로')
+    width = models.PositiveIntegerField(verbose_name='원본 너비')
+    height = models.PositiveIntegerField(verbose_name='원본 높이')
+    thumbnail = models.CharField(max_length=500, verbose_name='썸네일 URL')
+    variants = models.TextField(verbose_name='포맷/너비별 변환본 URL (JSON)')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')
+
+    class Meta:
+        verbose_name = '이미지 변환본'
+        verbose_name_plural = '이미지 변환본들'
+        db_table = 'chat_imagevariantset'
+
+    def __str__(self):
+        return self.original
+
+
+# 내용 해시 기반 업로드 파일 (chat/media_store.py)
+class MediaBlob(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name='내용 해시 (SHA-256)')
+    path = models.CharField(max_length=500, unique=True, verbose_name='저장 경로')
+    size = models.PositiveBigIntegerField(verbose_name='파일 크기')
+    content_type = models.CharField(max_length=100, blank=True, verbose_name='MIME 타입')
+    ref_count = models.PositiveIntegerField(default=0, verbose_name='참조 메시지 수')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='수정 시간')
+
+    class Meta:
+        verbose_name = '미디어 blob'
+        verbose_name_plural = '미디어 blob들'
+        db_table = 'chat_mediablob'
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return self.path
+
+
+# 미디어 파일 색인 (chat/media_index.py). list_media_files/file_exists가 파일 시스템 대신 조회
+class MediaIndexEntry(models.Model):
+    path = models.CharField(max_length=500, unique=True, verbose_name='저장 경로')
+    size = models.PositiveBigIntegerField(verbose_name='파일 크기')
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True, verbose_name='내용 해시 (SHA-256)')
+    mtime = models.DateTimeField(null=True, blank=True, verbose_name='파일 수정 시각')
+    indexed_at = models.DateTimeField(auto_now=True, verbose_name='색인 시각')
+
+    class Meta:
+        verbose_name = '미디어 색인'
+        verbose_name_plural = '미디어 색인들'
+        db_table = 'chat_mediaindex'
+        indexes = [
+            models.Index(fields=['mtime']),
+        ]
+
+    def __str__(self):
+        return self.path
+
+
+# 관리자 통계 일별 집계 (chat/admin_stats.py 에서 증분 갱신)
+class DailyMessageStat(models.Model):
+    date = models.DateField(verbose_name='날짜')
+    room_type = models.CharField(max_length=10, blank=True, verbose_name='대화방 타입')
+    sender_type = models.CharField(max_length=10, verbose_name='발신자 타입')
+    count = models.PositiveBigIntegerField(default=0, verbose_name='메시지 수')
+
+    class Meta:
+        verbose_name = '일별 메시지 통계'
+        verbose_name_plural = '일별 메시지 통계들'
+        db_table = 'chat_daily_message_stat'
+        unique_together = ('date', 'room_type', 'sender_type')
+
+    def __str__(self):
+        return f"{self.date} {self.room_type}/{self.sender_type}: {self.count}"
+
+
+class DailyRoomStat(models.Model):
+    date = models.DateField(verbose_name='날짜')
+    room_type = models.CharField(max_length=10, verbose_name='대화방 타입')
+    count = models.PositiveIntegerField(default=0, verbose_name='새 대화방 수')
+
+    class Meta:
+        verbose_name = '일별 대화방 통계'
+        verbose_name_plural = '일별 대화방 통계들'
+        db_table = 'chat_daily_room_stat'
+        unique_together = ('date', 'room_type')
+
+    def __str__(self):
+        return f"{self.date} {self.room_type}: {self.count}"
+
+
+class DailyUserStat(models.Model):
+    date = models.DateField(unique=True, verbose_name='날짜')
+    count = models.PositiveIntegerField(default=0, verbose_name='새 유저 수')
+
+    class Meta:
+        verbose_name = '일별 가입 통계'
+        verbose_name_plural = '일별 가입 통계들'
+        db_table = 'chat_daily_user_stat'
+
+    def __str__(self):
+        return f"{self.date}: {self.count}"
+
+
+class StatsWatermark(models.Model):
+    name = models.CharField(max_length=50, unique=True, verbose_name='집계 대상')
+    last_id = models.BigIntegerField(default=0, verbose_name='마지막으로 집계한 ID')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='집계 시각')
+
+    class Meta:
+        verbose_name = '통계 집계 위치'
+        verbose_name_plural = '통계 집계 위치들'
+        db_table = 'chat_stats_watermark'
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
+
+
+
+# 메시지 트래픽 분석용 집계 (chat/analytics.py). 같은 차원을 시간별/일별로 따로 유지
+class TrafficStatBase(models.Model):
+    room_id = models.BigIntegerField(default=0, verbose_name='대화방 ID')  # 0: 방 없음. 방 삭제 후에도 이력 유지
+    sender_type = models.CharField(max_length=10, verbose_name='발신자 타입')
+    ai_name = models.CharField(max_length=50, blank=True, verbose_name='AI 이름')
+    ai_type = models.CharField(max_length=50, blank=True, verbose_name='AI 타입')
+    emotion = models.CharField(max_length=20, blank=True, verbose_name='감정 상태')
+    count = models.PositiveBigIntegerField(default=0, verbose_name='메시지 수')
+
+    class Meta:
+        abstract = True
+
+
+class HourlyTrafficStat(TrafficStatBase):
+    hour = models.DateTimeField(verbose_name='시간 (정시)')
+
+    class Meta:
+        verbose_name = '시간별 메시지 트래픽'
+        verbose_name_plural = '시간별 메시지 트래픽들'
+        db_table = 'chat_hourly_traffic_stat'
+        unique_together = ('hour', 'room_id', 'sender_type', 'ai_name', 'ai_type', 'emotion')
+        indexes = [
+            models.Index(fields=['room_id', 'hour']),
+        ]
+
+    def __str__(self):
+        return f"{self.hour} room={self.room_id} {self.sender_type}: {self.count}"
+
+
+class DailyTrafficStat(TrafficStatBase):
+    date = models.DateField(verbose_name='날짜')
+
+    class Meta:
+        verbose_name = '일별 메시지 트래픽'
+        verbose_name_plural = '일별 메시지 트래픽들'
+        db_table = 'chat_daily_traffic_stat'
+        unique_together = ('date', 'room_id', 'sender_type', 'ai_name', 'ai_type', 'emotion')
+        indexes = [
+            models.Index(fields=['room_id', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} room={self.room_id} {self.sender_type}: {self.count}"
+
+
+# 관리자 백그라운드 작업 (chat/admin_jobs.py). 배치마다 진행 상황을 기록해 중단 후 이어서 실행
+class AdminJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', '대기'),
+        ('running', '실행 중'),
+        ('completed', '완료'),
+        ('failed', '실패'),
+    ]
+    job_type = models.CharField(max_length=30, verbose_name='작업 종류')
+    params = models.TextField(default='{}', verbose_name='작업 인자 (JSON)')
+    state = models.TextField(default='{}', verbose_name='진행 위치 (JSON)')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name='상태')
+    total = models.PositiveBigIntegerField(default=0, verbose_name='전체 처리 예상 수')
+    processed = models.PositiveBigIntegerField(default=0, verbose_name='처리한 수')
+    error = models.TextField(blank=True, verbose_name='오류')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name='요청자')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='마지막 진행 시간')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='종료 시간')
+
+    class Meta:
+        verbose_name = '관리자 작업'
+        verbose_name_plural = '관리자 작업들'
+        db_table = 'chat_admin_job'
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.job_type}#{self.pk} ({self.status})"
@@ -0,0 +1,69 @@
+"""배치 단위 삭제 도우미
+
+`ChatRoom.delete()` / `User.delete()` 는 Django 삭제 수집기가 연결된 Chat, 반응, 고정, 즐겨찾기 행을
+전부 메모리에 읽은 뒤 지운다. 큰 방이면 요청이 시간 초과되고 테이블 잠금이 길어진다.
+
+여기의 함수는 한 번 호출에 최대 batch_size 행만 처리하고 처리한 행 수를 돌려준다 (0이면 끝).
+같은 호출을 반복하면 남은 행을 계속 지우므로 중간에 멈춰도 다시 호출하면 이어진다.
+
+- 다른 테이블이 참조하지 않는 말단 테이블(반응, 고정, 읽음, 즐겨찾기 등)은 수집 없이 DELETE 한 번
+  (해당 모델에 삭제 시그널이 없어서 Django가 fast delete로 처리)
+- 메시지는 배치의 ID를 먼저 고른 뒤 말단 의존 행을 지우고 메시지 자체를 삭제
+- 탈퇴한 사용자의 메시지는 삭제 대신 작성자 정보만 지울 수도 있음 (anonymize_messages_chunk)
+- 삭제하는 행이 관리자 통계에 이미 집계됐으면 같은 트랜잭션에서 집계 테이블에서도 뺌 (chat/admin_stats.py)
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from .admin_stats import subtract_deleted_rows
+from .media_store import release_chat_media
+from .models import Chat, MessageFavorite, MessageReaction, MessageReply, NotificationRead, PinnedMessage
+
+DEFAULT_BATCH_SIZE = 1000
+DELETED_USERNAME = '탈퇴한 사용자'
+
+
+def delete_message_dependents(message_ids):
+    """메시지를 참조하는 말단 행 삭제 + 이 메시지를 질문으로 가리키는 AI 응답의 연결 해제"""
+    MessageReaction.objects.filter(message_id__in=message_ids).delete()
+    MessageReply.objects.filter(Q(original_message_id__in=message_ids) | Q(reply_message_id__in=message_ids)).delete()
+    PinnedMessage.objects.filter(message_id__in=message_ids).delete()
+    NotificationRead.objects.filter(message_id__in=message_ids).delete()
+    MessageFavorite.objects.filter(message_id__in=message_ids).delete()
+    Chat.objects.filter(question_message_id__in=message_ids).update(question_message=None)
+
+
+def delete_messages_chunk(queryset, batch_size=DEFAULT_BATCH_SIZE):
+    """queryset(Chat)에서 최대 batch_size개 메시지와 의존 행 삭제. 삭제한 메시지 수 반환"""
+    ids = list(queryset.order_by().values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    with transaction.atomic():
+        release_chat_media(Chat.objects.filter(id__in=ids))
+        delete_message_dependents(ids)
+        subtract_deleted_rows(Chat.objects.filter(id__in=ids))
+        Chat.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def delete_rows_chunk(queryset, batch_size=DEFAULT_BATCH_SIZE):
+    """말단 테이블 queryset에서 최대 batch_size행 삭제. 삭제한 행 수 반환"""
+    ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    with transaction.atomic():
+        subtract_deleted_rows(queryset.model.objects.filter(pk__in=ids))
+        queryset.model.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def anonymize_messages_chunk(queryset, batch_size=DEFAULT_BATCH_SIZE):
+    """queryset(Chat)에서 최대 batch_size개 메시지의 작성자 정보 제거 (user_id=NULL). 처리한 메시지 수 반환
+
+    user_id로 고른 queryset이면 처리한 행이 다음 조회에서 빠지므로 반복 호출로 끝까지 진행된다.
+    """
+    ids = list(queryset.order_by().values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    Chat.objects.filter(id__in=ids).update(user_id=None, username=DELETED_USERNAME)
+    return len(ids)
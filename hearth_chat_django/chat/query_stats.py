@@ -0,0 +1,113 @@
+"""요청/WebSocket 메시지 단위 DB 쿼리 계측
+
+`connection.queries`는 DEBUG일 때만 쌓이고 켜 두면 모든 SQL 문자열을 메모리에 남긴다. 대신 모든 DB 연결에
+execute_wrapper 하나를 붙여 두고, 현재 컨텍스트(contextvars)에 QueryStats가 있을 때만 다음을 센다.
+
+- 쿼리 수, DB 실행 시간 합계
+- 같은 SQL 템플릿(파라미터 제외)이 반복 실행된 횟수 → QUERY_STATS_DUPLICATE_THRESHOLD 이상이면 N+1 의심
+  SQL 문자열 대신 해시만 보관하고, QUERY_STATS_SAMPLE_RATE 비율로 뽑힌 요청만 SQL 문자열을 남긴다.
+
+contextvars는 sync_to_async 스레드로도 전달되므로 WebSocket 컨슈머의 DB 작업도 해당 메시지로 집계된다.
+track_queries()를 겹쳐 쓰면 안쪽 블록의 쿼리는 바깥 QueryStats에도 더해진다 (벤치마크 → 미들웨어).
+
+    with track_queries() as stats:
+        ...
+    stats.count, stats.elapsed, stats.duplicates()
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DUPLICATE_THRESHOLD = 5
+DEFAULT_SAMPLE_RATE = 0.0
+
+_current = contextvars.ContextVar('chat_query_stats', default=None)
+
+
+class QueryStats:
+    def __init__(self, sample=False, parent=None):
+        self.parent = parent
+        self.count = 0
+        self.elapsed = 0.0
+        self.sample = sample
+        self._patterns = {}  # hash(sql) → 실행 횟수
+        self._sql = {}  # hash(sql) → sql (sample일 때만)
+        self._lock = threading.Lock()
+
+    def record(self, sql, elapsed):
+        key = hash(sql)
+        with self._lock:
+            self.count += 1
+            self.elapsed += elapsed
+            self._patterns[key] = self._patterns.get(key, 0) + 1
+            if self.sample and key not in self._sql:
+                self._sql[key] = sql
+        if self.parent is not None:
+            self.parent.record(sql, elapsed)
+
+    def duplicates(self, threshold=None):
+        """임계값 이상 반복된 SQL 템플릿 [(실행 횟수, SQL 또는 None)] (많은 순)"""
+        if threshold is None:
+            threshold = int(getattr(settings, 'QUERY_STATS_DUPLICATE_THRESHOLD', DEFAULT_DUPLICATE_THRESHOLD))
+        with self._lock:
+            repeated = [(n, self._sql.get(key)) for key, n in self._patterns.items() if n >= threshold]
+        return sorted(repeated, key=lambda item: item[0], reverse=True)
+
+
+def _instrument(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - start)
+
+
+def install(conn):
+    """연결에 계측 래퍼 추가 (이미 있으면 무시)"""
+    if _instrument not in conn.execute_wrappers:
+        conn.execute_wrappers.append(_instrument)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    install(connection)
+
+
+connection_created.connect(_on_connection_created, dispatch_uid='chat.query_stats')
+
+
+@contextmanager
+def track_queries():
+    """블록 안(및 여기서 시작한 sync_to_async 호출)의 쿼리를 새 QueryStats에 집계"""
+    # 시그널 연결 전에 열린 연결 대비 (현재 스레드의 기본 연결)
+    install(connection)
+    rate = float(getattr(settings, 'QUERY_STATS_SAMPLE_RATE', DEFAULT_SAMPLE_RATE))
+    stats = QueryStats(sample=rate > 0 and random.random() < rate, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def log_query_stats(stats, description):
+    """N+1 의심 패턴 경고 로그. 반복 패턴 수 반환"""
+    repeated = stats.duplicates()
+    if repeated:
+        worst, sql = repeated[0]
+        logger.warning(
+            'Repeated queries (possible N+1): %s ran %d queries, %d pattern(s) repeated, worst x%d%s',
+            description, stats.count, len(repeated), worst, f': {sql[:500]}' if sql else '',
+        )
+    return len(repeated)
@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_migrate, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserSettings
+from .models import UserSettings, MediaFile
+from .admin_search import restore_sqlite_search_triggers
+from .media_index import index_file
 
 @receiver(post_save, sender=User)
 def create_user_settings(sender, instance, created, **kwargs):
@@ -18,4 +20,16 @@ def save_user_settings(sender, instance, **kwargs):
     except UserSettings.DoesNotExist:
         # UserSettings가 없는 경우 생성
         UserSettings.objects.create(user=instance)
-        print(f"[SIGNAL] UserSettings created for existing user: {instance.username}") 
\ No newline at end of file
+        print(f"[SIGNAL] UserSettings created for existing user: {instance.username}")
+
+@receiver(post_save, sender=MediaFile)
+def index_media_file(sender, instance, **kwargs):
+    """관리자 미디어 업로드 파일을 미디어 색인에 반영"""
+    if instance.file and instance.file.name:
+        index_file(instance.file.name)
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using='default', **kwargs):
+    """테이블을 다시 만든 마이그레이션 뒤 SQLite 검색 트리거 복구 (chat 앱 기준 한 번만)"""
+    if sender.label == 'chat':
+        restore_sqlite_search_triggers(using)
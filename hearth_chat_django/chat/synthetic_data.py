@@ -0,0 +1,263 @@
+"""벤치마크용 합성 데이터 생성
+
+실제 트래픽과 비슷한 모양(방 여러 개, 사용자/AI 메시지 교대, AI 제공자/감정 분포)의 메시지를
+전송 시각 순서대로 bulk_create 한다. 합성 대화방 이름은 SYNTHETIC_ROOM_PREFIX, 합성 사용자 이름은
+SYNTHETIC_USER_PREFIX 로 시작하므로 delete_synthetic_data()로 다시 지울 수 있다.
+
+generate_synthetic_dataset()은 사용자/모든 방 타입의 대화방/참여자/메시지에 더해 반응, 고정 메시지,
+방·메시지 즐겨찾기, 알림 읽음 표시까지 만든다 (관리 명령: generate_synthetic_data, benchmark_api).
+
+운영 DB가 아닌 벤치마크 전용 DB에서 실행할 것 (통계 집계 테이블에도 합성 메시지가 더해진다).
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .admin_stats import subtract_deleted_rows
+from .models import (
+    Chat, ChatRoom, ChatRoomParticipant, MessageFavorite, MessageReaction, NotificationRead, PinnedMessage,
+)
+
+SYNTHETIC_ROOM_PREFIX = '__synthetic__'
+SYNTHETIC_USER_PREFIX = '__synthetic_user__'
+ROOM_TYPES = tuple(value for value, _ in ChatRoom.ROOM_TYPE_CHOICES)
+AI_PROVIDERS = (('gemini', 'google'), ('lily', 'lily'), ('huggingface', 'huggingface'), ('chatgpt', 'openai'))
+EMOTIONS = ('neutral', 'happy', 'sad', 'angry', 'surprised', 'fearful', '')
+REACTION_EMOJIS = ('👍', '❤️', '😂', '😮', '😢', '🙏')
+DELETE_BATCH_SIZE = 10000
+PUBLIC_ROOM_MEMBERS = 20
+
+
+def synthetic_rooms(count, seed=0):
+    """합성 대화방 count개를 만들거나 기존 것을 재사용 (ROOM_TYPE_CHOICES를 돌아가며 사용)"""
+    rooms = []
+    for i in range(count):
+        room_type = ROOM_TYPES[i % len(ROOM_TYPES)]
+        room, _ = ChatRoom.objects.get_or_create(
+            name=f'{SYNTHETIC_ROOM_PREFIX}{seed}_{i}',
+            defaults={
+                'room_type': room_type,
+                'is_public': room_type == 'public' or i % 2 == 0,
+                'is_voice_call': room_type == 'voice',
+                'is_video_call': room_type == 'video_call',
+                'ai_provider': 'GEMINI' if room_type == 'ai' else None,
+            },
+        )
+        rooms.append(room)
+    return rooms
+
+
+def synthetic_users(count, seed=0, days=90):
+    """합성 사용자 count명을 만들거나 기존 것을 재사용 (가입/최근 로그인 시각을 days일 안에 분포)"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    names = [f'{SYNTHETIC_USER_PREFIX}{seed}_{i}' for i in range(count)]
+    existing = set(User.objects.filter(username__in=names).values_list('username', flat=True))
+    password = make_password(None)
+    new_users = []
+    for name in names:
+        joined = now - timedelta(days=rng.uniform(0, days))
+        if name not in existing:
+            new_users.append(User(
+                username=name, email=f'{name}@synthetic.invalid', password=password,
+                date_joined=joined, last_login=joined + (now - joined) * rng.random(),
+            ))
+    User.objects.bulk_create(new_users, batch_size=1000)
+    by_name = {user.username: user for user in User.objects.filter(username__in=names)}
+    return [by_name[name] for name in names]
+
+
+def add_synthetic_participants(rooms, users, seed=0):
+    """방 타입에 맞는 인원으로 참여자 추가 (첫 참여자가 방장). {방 ID: [(사용자 ID, 이름)]} 반환"""
+    rng = random.Random(seed)
+    members = {}
+    participants = []
+    for room in rooms:
+        if room.room_type == 'ai':
+            size = 1
+        elif room.room_type in ('user', 'voice', 'video_call'):
+            size = 2
+        elif room.room_type == 'group':
+            size = rng.randint(3, max(3, room.max_members))
+        else:
+            size = PUBLIC_ROOM_MEMBERS
+        picked = rng.sample(users, min(size, len(users)))
+        members[room.id] = [(user.id, user.username) for user in picked]
+        participants.extend(
+            ChatRoomParticipant(room=room, user=user, is_owner=index == 0) for index, user in enumerate(picked)
+        )
+    ChatRoomParticipant.objects.bulk_create(participants, batch_size=1000, ignore_conflicts=True)
+    return members
+
+
+def generate_synthetic_messages(total, rooms=100, days=90, batch_size=10000, seed=0, end=None, progress=None,
+                                room_list=None, members=None):
+    """최근 days일 동안 고르게 퍼진 합성 메시지 total개 생성. 생성한 수 반환
+
+    room_list가 주어지면 rooms 대신 그 방들에, members({방 ID: [(사용자 ID, 이름)]})가 주어지면
+    사용자 메시지를 해당 방 참여자 이름으로 만든다. progress(생성 수)가 주어지면 배치마다 호출한다.
+    """
+    rng = random.Random(seed)
+    room_objs = room_list or synthetic_rooms(rooms, seed)
+    end = end or timezone.now()
+    start = end - timedelta(days=days)
+    step = (end - start) / max(total, 1)
+
+    created = 0
+    while created < total:
+        batch = []
+        for i in range(created, min(created + batch_size, total)):
+            room = room_objs[rng.randrange(len(room_objs))]
+            timestamp = start + step * i
+            if i % 2 == 0:
+                room_members = members.get(room.id) if members else None
+                if room_members:
+                    user_id, username = room_members[rng.randrange(len(room_members))]
+                else:
+                    user_id, username = rng.randrange(1, 1000), f'synthetic_user_{rng.randrange(1000)}'
+                batch.append(Chat(
+                    room=room, sender_type='user', message_type='text',
+                    username=username, user_id=user_id,
+                    content=f'synthetic message {i}', timestamp=timestamp,
+                    emotion=rng.choice(EMOTIONS) or None,
+                ))
+            else:
+                ai_name, ai_type = rng.choice(AI_PROVIDERS)
+                batch.append(Chat(
+                    room=room, sender_type='ai', message_type='text',
+                    ai_name=ai_name, ai_type=ai_type,
+                    content=f'synthetic reply {i}', timestamp=timestamp,
+                ))
+        with transaction.atomic():
+            Chat.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+        if progress is not None:
+            progress(created)
+    return created
+
+
+def generate_synthetic_interactions(users, room_ids, after_id=0, reaction_rate=0.05, favorite_rate=0.002,
+                                    batch_size=10000, seed=0):
+    """room_ids 방에서 ID가 after_id보다 큰 메시지에 반응/메시지 즐겨찾기 추가
+
+    메시지 ID를 키셋 순서로 배치 단위로 읽으므로 bulk_create가 PK를 돌려주지 않는 DB(MySQL)에서도 동작한다.
+    {'reactions', 'message_favorites', 'last_id'} 반환
+    """
+    rng = random.Random(seed)
+    result = {'reactions': 0, 'message_favorites': 0, 'last_id': after_id}
+    while True:
+        ids = list(
+            Chat.objects.filter(room_id__in=room_ids, id__gt=result['last_id'])
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return result
+        result['last_id'] = ids[-1]
+        reactions = []
+        favorites = []
+        for message_id in ids:
+            if rng.random() < reaction_rate:
+                for user in rng.sample(users, min(rng.randint(1, 3), len(users))):
+                    reactions.append(MessageReaction(message_id=message_id, user=user, emoji=rng.choice(REACTION_EMOJIS)))
+            if rng.random() < favorite_rate:
+                favorites.append(MessageFavorite(message_id=message_id, user=rng.choice(users)))
+        with transaction.atomic():
+            MessageReaction.objects.bulk_create(reactions, batch_size=batch_size, ignore_conflicts=True)
+            MessageFavorite.objects.bulk_create(favorites, batch_size=batch_size, ignore_conflicts=True)
+        result['reactions'] += len(reactions)
+        result['message_favorites'] += len(favorites)
+
+
+def pin_synthetic_messages(rooms, members, per_room=3):
+    """방마다 최근 메시지 per_room개를 방장 이름으로 고정. 고정한 수 반환"""
+    pins = []
+    for room in rooms:
+        if not members.get(room.id):
+            continue
+        owner_id = members[room.id][0][0]
+        for message_id in Chat.objects.filter(room=room).order_by('-id').values_list('id', flat=True)[:per_room]:
+            pins.append(PinnedMessage(room=room, message_id=message_id, pinned_by_id=owner_id))
+    PinnedMessage.objects.bulk_create(pins, batch_size=1000, ignore_conflicts=True)
+    return len(pins)
+
+
+def favorite_synthetic_rooms(users, rooms, members, per_user=5, read_rate=0.5, seed=0):
+    """사용자마다 참여 중이거나 공개인 방 per_user개를 즐겨찾기하고, read_rate 비율은 최신 메시지를 읽음 처리
+
+    {'room_favorites', 'notification_reads'} 반환
+    """
+    rng = random.Random(seed)
+    joined = {}
+    for room_id, room_members in members.items():
+        for user_id, _ in room_members:
+            joined.setdefault(user_id, []).append(room_id)
+    public_ids = [room.id for room in rooms if room.is_public]
+    latest = dict(
+        Chat.objects.filter(room_id__in=[room.id for room in rooms])
+        .values('room_id').annotate(latest=Max('id')).values_list('room_id', 'latest')
+    )
+
+    Favorite = ChatRoom.favorite_users.through
+    favorites = []
+    reads = []
+    for user in users:
+        candidates = list(dict.fromkeys(joined.get(user.id, []) + public_ids))
+        for room_id in rng.sample(candidates, min(per_user, len(candidates))):
+            favorites.append(Favorite(chatroom_id=room_id, user_id=user.id))
+            if latest.get(room_id) and rng.random() < read_rate:
+                reads.append(NotificationRead(user=user, room_id=room_id, message_id=latest[room_id]))
+    Favorite.objects.bulk_create(favorites, batch_size=1000, ignore_conflicts=True)
+    NotificationRead.objects.bulk_create(reads, batch_size=1000, ignore_conflicts=True)
+    return {'room_favorites': len(favorites), 'notification_reads': len(reads)}
+
+
+def generate_synthetic_dataset(users=1000, rooms=200, messages=1_000_000, days=90, reaction_rate=0.05,
+                               favorite_rate=0.002, pins_per_room=3, favorites_per_user=5, read_rate=0.5,
+                               batch_size=10000, seed=0, progress=None):
+    """사용자 → 대화방/참여자 → 메시지 → 반응/즐겨찾기 → 고정 메시지 → 방 즐겨찾기/읽음 순서로 생성. 생성 수 요약 반환"""
+    user_objs = synthetic_users(users, seed, days)
+    room_objs = synthetic_rooms(rooms, seed)
+    members = add_synthetic_participants(room_objs, user_objs, seed)
+    room_ids = [room.id for room in room_objs]
+    after_id = Chat.objects.filter(room_id__in=room_ids).aggregate(last=Max('id'))['last'] or 0
+
+    summary = {'users': len(user_objs), 'rooms': len(room_objs)}
+    summary['messages'] = generate_synthetic_messages(
+        messages, days=days, batch_size=batch_size, seed=seed, progress=progress,
+        room_list=room_objs, members=members,
+    )
+    interactions = generate_synthetic_interactions(
+        user_objs, room_ids, after_id=after_id, reaction_rate=reaction_rate, favorite_rate=favorite_rate,
+        batch_size=batch_size, seed=seed,
+    )
+    summary['reactions'] = interactions['reactions']
+    summary['message_favorites'] = interactions['message_favorites']
+    summary['pins'] = pin_synthetic_messages(room_objs, members, pins_per_room)
+    summary.update(favorite_synthetic_rooms(user_objs, room_objs, members, favorites_per_user, read_rate, seed))
+    return summary
+
+
+def delete_synthetic_data():
+    """합성 대화방/메시지/사용자 삭제. 삭제한 메시지 수 반환 (메시지는 배치 단위로 먼저 삭제)"""
+    room_ids = list(ChatRoom.objects.filter(name__startswith=SYNTHETIC_ROOM_PREFIX).values_list('id', flat=True))
+    deleted = 0
+    while True:
+        ids = list(Chat.objects.filter(room_id__in=room_ids).order_by().values_list('id', flat=True)[:DELETE_BATCH_SIZE])
+        if not ids:
+            break
+        with transaction.atomic():
+            subtract_deleted_rows(Chat.objects.filter(id__in=ids))
+            deleted += Chat.objects.filter(id__in=ids).delete()[1].get('chat.Chat', 0)
+    with transaction.atomic():
+        subtract_deleted_rows(ChatRoom.objects.filter(id__in=room_ids))
+        ChatRoom.objects.filter(id__in=room_ids).delete()
+    users = User.objects.filter(username__startswith=SYNTHETIC_USER_PREFIX)
+    with transaction.atomic():
+        subtract_deleted_rows(users)
+        users.delete()
+    return deleted
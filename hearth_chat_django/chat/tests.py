@@ -1,3 +1,1214 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import admin_jobs, admin_search, admin_stats, ai_circuit, analytics, image_preprocess
+from .admin_pagination import EstimatedCountPaginator, fast_count
+from .ai_cache import AIResponseCache, image_fingerprints, make_cache_key, normalize_prompt
+from .ai_circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, get_circuit_breaker, reset_circuit_breakers
+from .ai_ratelimit import AIRateLimiter, AIRateLimitExceeded, InMemoryTokenBucket
+from .ai_scheduler import RoomAIScheduler, coalesce_items
+from .direct_upload import TOKEN_SALT, DirectUploadError, receive_local_put
+from .image_loader import ImageLoader, ImageLoadError, validate_fetch_url
+from .image_variants import plan_variants, schedule_image_variants, upload_variant_fields
+from .asset_index import AssetIndex, asset_index
+from .media_index import index_file
+from .purge import delete_messages_chunk
+from .media_store import blob_path, purge_unreferenced_blobs, release_chat_media, store_uploaded_file
+from .upload_handlers import ChatImageUploadHandler
+from .models import (
+    AdminJob, Chat, ChatRoom, ChatRoomParticipant, DailyMessageStat, DailyTrafficStat, DailyUserStat,
+    HourlyTrafficStat, ImageVariantSet, MediaBlob, MediaIndexEntry, StatsWatermark,
+)
+
+
+class _Recorder:
+    """스케줄러 핸들러 대역: 호출된 묶음을 기록하고, gate가 열릴 때까지 제공자 호출 전/후에서 대기"""
+
+    def __init__(self, start_call=True):
+        self.calls = []
+        self.shared = []
+        self.cancelled = []
+        self.start_call = start_call
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def handle(self, items, ticket):
+        self.calls.append([item['message'] for item in items])
+        self.shared.append(ticket.shared)
+        try:
+            if self.start_call and not ticket.start_call():
+                raise asyncio.CancelledError()
+            await self.gate.wait()
+        except asyncio.CancelledError:
+            self.cancelled.append([item['message'] for item in items])
+            raise
+
+
+async def _drain(scheduler, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while scheduler.pending_count() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+class RoomAISchedulerTests(SimpleTestCase):
+    def make_scheduler(self, **kwargs):
+        options = {'debounce_seconds': 0.02, 'max_in_flight': 1, 'max_batch': 10, 'max_defer_seconds': 5}
+        options.update(kwargs)
+        return RoomAIScheduler(**options)
+
+    async def test_debounced_messages_from_same_sender_are_batched(self):
+        scheduler = self.make_scheduler()
+        sender = _Recorder()
+        for text in ('a', 'b', 'c'):
+            await scheduler.submit('room', {'message': text}, sender.handle)
+        await _drain(scheduler)
+        self.assertEqual(sender.calls, [['a', 'b', 'c']])
+
+    async def test_max_batch_flushes_without_waiting_for_debounce(self):
+        scheduler = self.make_scheduler(debounce_seconds=10, max_batch=2)
+        sender = _Recorder()
+        await scheduler.submit('room', {'message': 'a'}, sender.handle)
+        await scheduler.submit('room', {'message': 'b'}, sender.handle)
+        await _drain(scheduler)
+        self.assertEqual(sender.calls, [['a', 'b']])
+
+    async def test_messages_from_several_senders_make_one_provider_call(self):
+        scheduler = self.make_scheduler()
+        alice, bob, carol = _Recorder(), _Recorder(), _Recorder()
+        await scheduler.submit('room', {'message': 'a1'}, alice.handle)
+        await scheduler.submit('room', {'message': 'b1'}, bob.handle)
+        await scheduler.submit('room', {'message': 'a2'}, alice.handle)
+        await scheduler.submit('room', {'message': 'c1'}, carol.handle)
+        await _drain(scheduler)
+        self.assertEqual(alice.calls + bob.calls, [])
+        self.assertEqual(carol.calls, [['a1', 'b1', 'a2', 'c1']])
+        self.assertEqual(carol.shared, [True])
+
+    async def test_other_senders_pending_call_is_superseded_into_shared_batch(self):
+        scheduler = self.make_scheduler()
+        alice, bob = _Recorder(start_call=False), _Recorder()
+        alice.gate.clear()
+        await scheduler.submit('room', {'message': 'a1'}, alice.handle)
+        await asyncio.sleep(0.05)
+        await scheduler.submit('room', {'message': 'b1'}, bob.handle)
+        await _drain(scheduler)
+        self.assertEqual(alice.cancelled, [['a1']])
+        self.assertEqual(bob.calls, [['a1', 'b1']])
+        self.assertEqual(bob.shared, [True])
+
+    async def test_other_senders_started_call_is_waited_for_not_cancelled(self):
+        scheduler = self.make_scheduler()
+        alice, bob = _Recorder(), _Recorder()
+        alice.gate.clear()
+        await scheduler.submit('room', {'message': 'a1'}, alice.handle)
+        await asyncio.sleep(0.05)
+        await scheduler.submit('room', {'message': 'b1'}, bob.handle)
+        await asyncio.sleep(0.05)
+        self.assertEqual(bob.calls, [])
+        alice.gate.set()
+        await _drain(scheduler)
+        self.assertEqual(alice.cancelled, [])
+        self.assertEqual(alice.shared, [False])
+        self.assertEqual(bob.calls, [['b1']])
+
+    async def test_not_yet_started_call_is_superseded_by_new_batch(self):
+        scheduler = self.make_scheduler()
+        sender = _Recorder(start_call=False)
+        sender.gate.clear()
+        await scheduler.submit('room', {'message': 'a'}, sender.handle)
+        await asyncio.sleep(0.05)
+        await scheduler.submit('room', {'message': 'b'}, sender.handle)
+        await asyncio.sleep(0.05)
+        sender.gate.set()
+        await _drain(scheduler)
+        self.assertEqual(sender.cancelled, [['a']])
+        self.assertEqual(sender.calls, [['a'], ['a', 'b']])
+
+    async def test_started_provider_call_is_not_cancelled(self):
+        scheduler = self.make_scheduler()
+        sender = _Recorder()
+        sender.gate.clear()
+        await scheduler.submit('room', {'message': 'a'}, sender.handle)
+        await asyncio.sleep(0.05)
+        await scheduler.submit('room', {'message': 'b'}, sender.handle)
+        await asyncio.sleep(0.05)
+        sender.gate.set()
+        await _drain(scheduler)
+        self.assertEqual(sender.cancelled, [])
+        self.assertEqual(sender.calls, [['a'], ['b']])
+
+    async def test_ticket_cancelled_before_dispatch_refuses_start(self):
+        scheduler = self.make_scheduler()
+        tickets = []
+
+        async def handler(items, ticket):
+            tickets.append(ticket)
+            await asyncio.sleep(10)
+
+        await scheduler.submit('room', {'message': 'a'}, handler)
+        await asyncio.sleep(0.05)
+        tickets[0].cancel()
+        self.assertTrue(tickets[0].cancelled)
+        self.assertFalse(tickets[0].start_call())
+        await _drain(scheduler)
+
+    async def test_continuous_messages_are_flushed_within_max_defer(self):
+        scheduler = self.make_scheduler(debounce_seconds=0.2, max_defer_seconds=0.1)
+        sender = _Recorder()
+        for text in ('a', 'b', 'c', 'd', 'e'):
+            await scheduler.submit('room', {'message': text}, sender.handle)
+            await asyncio.sleep(0.04)
+        await _drain(scheduler)
+        self.assertGreater(len(sender.calls), 1)
+        self.assertEqual(sender.calls[0][0], 'a')
+        self.assertEqual(sum(sender.calls, []), ['a', 'b', 'c', 'd', 'e'])
+
+    async def test_superseding_stops_after_max_defer(self):
+        scheduler = self.make_scheduler(debounce_seconds=0.01, max_defer_seconds=0.05)
+        sender = _Recorder(start_call=False)
+        sender.gate.clear()
+        await scheduler.submit('room', {'message': 'a'}, sender.handle)
+        await asyncio.sleep(0.1)
+        await scheduler.submit('room', {'message': 'b'}, sender.handle)
+        await asyncio.sleep(0.05)
+        sender.gate.set()
+        await _drain(scheduler)
+        self.assertEqual(sender.cancelled, [])
+        self.assertEqual(sender.calls, [['a'], ['b']])
+
+    async def test_idle_room_state_is_released(self):
+        scheduler = self.make_scheduler()
+        sender = _Recorder()
+        await scheduler.submit('room', {'message': 'a'}, sender.handle)
+        await _drain(scheduler)
+        await asyncio.sleep(0.01)
+        self.assertEqual(scheduler._rooms, {})
+        self.assertEqual(scheduler.task_counts(), (0, 0))
+
+
+class CoalesceItemsTests(SimpleTestCase):
+    def test_single_item_keeps_message(self):
+        batch = coalesce_items([{'message': 'hello', 'emotion': 'happy', 'username': 'kim'}])
+        self.assertEqual(batch['message'], 'hello')
+        self.assertEqual(batch['emotion'], 'happy')
+
+    def test_multiple_items_are_joined_with_speaker_and_images_deduplicated(self):
+        batch = coalesce_items([
+            {'message': 'first', 'username': 'kim', 'image_urls': ['/media/a.png']},
+            {'message': '', 'username': 'kim', 'image_urls': ['/media/a.png', '/media/b.png']},
+            {'message': 'last', 'username': 'kim', 'documents': [{'document_id': 1}]},
+        ])
+        self.assertEqual(batch['message'], 'kim: first\nkim: [이미지 첨부]\nkim: last')
+        self.assertEqual(batch['image_urls'], ['/media/a.png', '/media/b.png'])
+        self.assertEqual(batch['image_url'], '/media/a.png')
+        self.assertEqual(batch['documents'], [{'document_id': 1}])
+
+    def test_shared_batch_ignores_one_senders_client_settings(self):
+        items = [
+            {'message': 'hi', 'username': 'kim', 'client_ai_settings': {'aiProvider': 'lily'}},
+            {'message': 'yo', 'username': 'lee', 'client_ai_settings': {'aiProvider': 'gemini'}},
+        ]
+        self.assertEqual(coalesce_items(items)['client_ai_settings'], {'aiProvider': 'gemini'})
+        self.assertIsNone(coalesce_items(items, shared=True)['client_ai_settings'])
+
+
+class InMemoryTokenBucketTests(SimpleTestCase):
+    async def test_burst_then_wait_for_refill(self):
+        bucket = InMemoryTokenBucket()
+        self.assertEqual(await bucket.take('gemini', 1.0, 2), 0.0)
+        self.assertEqual(await bucket.take('gemini', 1.0, 2), 0.0)
+        wait = await bucket.take('gemini', 1.0, 2)
+        self.assertGreater(wait, 0.9)
+        self.assertLessEqual(wait, 1.0)
+
+    async def test_tokens_refill_over_time(self):
+        bucket = InMemoryTokenBucket()
+        with mock.patch('chat.ai_ratelimit.time.monotonic', return_value=100.0):
+            await bucket.take('lily', 0.5, 1)
+            self.assertGreater(await bucket.take('lily', 0.5, 1), 0)
+        with mock.patch('chat.ai_ratelimit.time.monotonic', return_value=102.5):
+            self.assertEqual(await bucket.take('lily', 0.5, 1), 0.0)
+
+    async def test_keys_are_independent(self):
+        bucket = InMemoryTokenBucket()
+        await bucket.take('gemini:a', 1.0, 1)
+        self.assertEqual(await bucket.take('gemini:b', 1.0, 1), 0.0)
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    AI_RATE_LIMITS={'test': {'rate_per_minute': 600, 'burst': 1}, 'test:slow': {'rate_per_minute': 1, 'burst': 1}},
+)
+class AIRateLimiterTests(SimpleTestCase):
+    def test_model_specific_limits_take_precedence(self):
+        limiter = AIRateLimiter()
+        self.assertEqual(limiter.get_limits('test', 'slow'), (1 / 60.0, 1.0))
+        self.assertEqual(limiter.get_limits('test', 'other'), (10.0, 1.0))
+        self.assertEqual(limiter.get_limits('unknown'), (0.5, 5.0))
+
+    async def test_queued_requests_are_served_round_robin_per_user(self):
+        limiter = AIRateLimiter()
+        await limiter.acquire('test', None, 'user:1')
+        order = []
+
+        async def request(user_key, label):
+            await limiter.acquire('test', None, user_key)
+            order.append(label)
+
+        await asyncio.gather(
+            request('user:1', 'a1'), request('user:1', 'a2'), request('user:1', 'a3'), request('user:2', 'b1'),
+        )
+        self.assertEqual(order, ['a1', 'b1', 'a2', 'a3'])
+        self.assertEqual(limiter.queue_length(), 0)
+
+    async def test_queue_position_is_reported(self):
+        limiter = AIRateLimiter()
+        await limiter.acquire('test', None, 'user:1')
+        positions = []
+
+        async def on_queued(position):
+            positions.append(position)
+
+        await limiter.acquire('test', None, 'user:2', on_queued=on_queued)
+        await asyncio.sleep(0)
+        self.assertEqual(positions, [1])
+
+    async def test_wait_beyond_timeout_raises(self):
+        limiter = AIRateLimiter()
+        await limiter.acquire('test', 'slow', 'user:1')
+        with self.assertRaises(AIRateLimitExceeded):
+            await limiter.acquire('test', 'slow', 'user:2', timeout=0.05)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def tearDown(self):
+        reset_circuit_breakers()
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker('lily', failure_threshold=2, recovery_timeout=30)
+        self.assertTrue(breaker.try_acquire())
+        breaker.record_failure('timeout')
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure('timeout')
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.try_acquire())
+        self.assertFalse(breaker.available())
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker('lily', failure_threshold=2)
+        breaker.record_failure('timeout')
+        breaker.record_success(0.1)
+        breaker.record_failure('timeout')
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_half_open_allows_single_probe_and_closes_on_success(self):
+        breaker = CircuitBreaker('lily', failure_threshold=1, recovery_timeout=30)
+        breaker.record_failure('down')
+        with mock.patch('chat.ai_circuit.time.monotonic', return_value=time.monotonic() + 31):
+            self.assertEqual(breaker.state, HALF_OPEN)
+            self.assertTrue(breaker.try_acquire())
+            self.assertFalse(breaker.try_acquire())
+            breaker.record_success(0.2)
+            self.assertEqual(breaker.state, CLOSED)
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker('lily', failure_threshold=3, recovery_timeout=30)
+        for _ in range(3):
+            breaker.record_failure('down')
+        with mock.patch('chat.ai_circuit.time.monotonic', return_value=time.monotonic() + 31):
+            self.assertTrue(breaker.try_acquire())
+            breaker.record_failure('still down')
+            self.assertEqual(breaker.state, OPEN)
+
+    def test_released_probe_can_be_retried(self):
+        breaker = CircuitBreaker('lily', failure_threshold=1, recovery_timeout=30)
+        breaker.record_failure('down')
+        with mock.patch('chat.ai_circuit.time.monotonic', return_value=time.monotonic() + 31):
+            self.assertTrue(breaker.try_acquire())
+            breaker.release()
+            self.assertTrue(breaker.try_acquire())
+
+    def test_slow_success_counts_as_failure(self):
+        breaker = CircuitBreaker('lily', failure_threshold=1, slow_call_seconds=5)
+        breaker.record_success(6)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_settings_changes_apply_to_existing_breaker(self):
+        with override_settings(AI_CIRCUIT_BREAKER={'failure_threshold': 5}):
+            breaker = get_circuit_breaker('gemini')
+            self.assertEqual(breaker.failure_threshold, 5)
+        breaker.record_failure('timeout')
+        with override_settings(AI_CIRCUIT_BREAKER={'failure_threshold': 2, 'gemini': {'recovery_timeout': 7}}):
+            same = get_circuit_breaker('gemini')
+            self.assertIs(same, breaker)
+            self.assertEqual((same.failure_threshold, same.recovery_timeout), (2, 7.0))
+            self.assertEqual(same.snapshot()['consecutive_failures'], 1)
+
+    @override_settings(AI_CIRCUIT_BREAKER={}, AI_PROVIDER_TIMEOUTS={})
+    def test_lily_fails_fast_by_default(self):
+        self.assertLessEqual(ai_circuit.get_provider_timeout('lily')[1], 60)
+        self.assertEqual(ai_circuit._breaker_settings('lily')['slow_call_seconds'], 30)
+        self.assertIsNone(ai_circuit._breaker_settings('gemini')['slow_call_seconds'])
+        with override_settings(AI_CIRCUIT_BREAKER={'lily': {'slow_call_seconds': None}}):
+            self.assertIsNone(ai_circuit._breaker_settings('lily')['slow_call_seconds'])
+
+    def test_provider_chain_uses_fallbacks(self):
+        with override_settings(AI_PROVIDER_FALLBACKS={'lily': ['huggingface', 'gemini', 'lily']}):
+            self.assertEqual(ai_circuit.get_provider_chain('lily'), ['lily', 'huggingface', 'gemini'])
+        self.assertEqual(ai_circuit.get_provider_chain('gemini'), ['gemini'])
+
+
+class AIResponseCacheTests(SimpleTestCase):
+    def test_prompt_normalization_ignores_case_and_whitespace(self):
+        self.assertEqual(normalize_prompt('  Hello\n  World '), 'hello world')
+        self.assertEqual(
+            make_cache_key('gemini', 'flash', 'Hello  World', 'neutral:stable'),
+            make_cache_key('gemini', 'flash', 'hello world', 'neutral:stable'),
+        )
+
+    def test_key_separates_model_emotion_and_images(self):
+        base = make_cache_key('gemini', 'flash', 'hi', 'neutral:stable')
+        self.assertNotEqual(base, make_cache_key('gemini', 'pro', 'hi', 'neutral:stable'))
+        self.assertNotEqual(base, make_cache_key('gemini', 'flash', 'hi', 'sad:declining'))
+        self.assertNotEqual(base, make_cache_key('gemini', 'flash', 'hi', 'neutral:stable', ['abc']))
+
+    def test_key_separates_endpoint_and_scope(self):
+        args = ('lily', 'kanana', 'hi', 'neutral:stable', [])
+        key = make_cache_key(*args, endpoint='http://lily-a', scope='user:1|room:1|session:s')
+        self.assertNotEqual(key, make_cache_key(*args, endpoint='http://lily-b', scope='user:1|room:1|session:s'))
+        self.assertNotEqual(key, make_cache_key(*args, endpoint='http://lily-a', scope='user:2|room:1|session:s'))
+        self.assertNotEqual(key, make_cache_key(*args, endpoint='http://lily-a', scope='user:1|room:2|session:s'))
+
+    @override_settings(MEDIA_URL='/media/')
+    def test_image_fingerprints_use_content_hash_for_blobs(self):
+        digest = 'a' * 64
+        fingerprints = image_fingerprints([f'/media/image/chat_attach/aa/{digest}.webp', '/media/other.png'])
+        self.assertIn(digest, fingerprints)
+        self.assertEqual(fingerprints, sorted(fingerprints))
+        self.assertEqual(image_fingerprints(['/b.png', '/a.png']), image_fingerprints(['/a.png', '/b.png']))
+
+    def test_expired_entries_are_dropped(self):
+        cache = AIResponseCache(ttl_seconds=10, max_entries=10)
+        with mock.patch('chat.ai_cache.time.monotonic', return_value=100.0):
+            cache.set('k', {'response': 'cached'})
+            self.assertEqual(cache.get('k'), {'response': 'cached'})
+        with mock.patch('chat.ai_cache.time.monotonic', return_value=111.0):
+            self.assertIsNone(cache.get('k'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = AIResponseCache(ttl_seconds=60, max_entries=2)
+        cache.set('a', {'response': 'a'})
+        cache.set('b', {'response': 'b'})
+        cache.get('a')
+        cache.set('c', {'response': 'c'})
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_cached_value_is_copied(self):
+        cache = AIResponseCache(ttl_seconds=60, max_entries=2)
+        value = {'response': 'original'}
+        cache.set('k', value)
+        value['response'] = 'changed'
+        cache.get('k')['response'] = 'mutated'
+        self.assertEqual(cache.get('k'), {'response': 'original'})
+
+
+def _resolve_to(address):
+    return mock.patch('chat.image_loader.socket.getaddrinfo', return_value=[(2, 1, 6, '', (address, 0))])
+
+
+@override_settings(MEDIA_URL='https://cdn.example.com/media/', AI_IMAGE_FETCH_ALLOWED_HOSTS=['img.example.org'],
+                   AI_IMAGE_FETCH_MAX_BYTES=8)
+class ImageFetchValidationTests(SimpleTestCase):
+    def test_only_media_and_configured_hosts_are_fetched(self):
+        with _resolve_to('93.184.216.34'):
+            validate_fetch_url('https://cdn.example.com/media/a.png')
+            validate_fetch_url('http://img.example.org/a.png')
+            with self.assertRaises(ImageLoadError):
+                validate_fetch_url('https://attacker.example.net/a.png')
+            with self.assertRaises(ImageLoadError):
+                validate_fetch_url('file:///etc/passwd')
+
+    def test_private_and_metadata_addresses_are_rejected(self):
+        for address in ('127.0.0.1', '10.1.2.3', '169.254.169.254', '::1', '::ffff:192.168.0.1'):
+            with self.subTest(address=address), _resolve_to(address):
+                with self.assertRaises(ImageLoadError):
+                    validate_fetch_url('https://img.example.org/a.png')
+
+    def test_redirects_are_not_followed_and_size_is_capped(self):
+        response = mock.MagicMock(status_code=200, headers={})
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [b'12345', b'67890']
+        with _resolve_to('93.184.216.34'), mock.patch('requests.get', return_value=response) as get:
+            with self.assertRaises(ImageLoadError):
+                ImageLoader().load('https://img.example.org/big.png')
+        self.assertIs(get.call_args.kwargs['allow_redirects'], False)
+        self.assertIs(get.call_args.kwargs['stream'], True)
+
+        response.status_code = 302
+        with _resolve_to('93.184.216.34'), mock.patch('requests.get', return_value=response):
+            with self.assertRaises(ImageLoadError):
+                ImageLoader().load('https://img.example.org/redirect.png')
+
+    def test_path_outside_storage_is_a_load_error(self):
+        with self.assertRaises(ImageLoadError):
+            ImageLoader().load('/media/../../etc/passwd')
+
+
+def _image_bytes(size, mode='RGB', fmt='JPEG'):
+    from PIL import Image
+
+    color = (200, 80, 40, 128) if mode == 'RGBA' else (200, 80, 40)
+    output = io.BytesIO()
+    Image.new(mode, size, color).save(output, format=fmt)
+    return output.getvalue()
+
+
+@override_settings(AI_IMAGE_SHORT_SIDE_LIMIT=128, AI_IMAGE_PREPROCESS_CACHE_SIZE=2)
+class ImagePreprocessTests(SimpleTestCase):
+    def setUp(self):
+        image_preprocess._cache.clear()
+        self.addCleanup(image_preprocess._cache.clear)
+
+    def decode(self, data):
+        from PIL import Image
+
+        return Image.open(io.BytesIO(data))
+
+    def test_short_side_is_downscaled_to_the_configured_limit(self):
+        storage = mock.Mock()
+        storage.open.return_value = io.BytesIO(_image_bytes((400, 200)))
+        loader = ImageLoader(storage=storage, short_side_limit=settings.AI_IMAGE_SHORT_SIDE_LIMIT)
+        data, mime_type = loader.load_prepared('/media/photo.jpg')
+        self.assertEqual(mime_type, 'image/jpeg')
+        self.assertEqual(self.decode(data).size, (256, 128))
+
+    def test_small_supported_image_is_sent_unchanged(self):
+        original = _image_bytes((100, 60), fmt='PNG')
+        self.assertEqual(image_preprocess.prepare_image_for_model(original, 128), (original, 'image/png'))
+
+    def test_output_format_keeps_alpha_as_png_and_photos_as_jpeg(self):
+        data, mime_type = image_preprocess.prepare_image_for_model(_image_bytes((300, 300), 'RGBA', 'PNG'), 128)
+        self.assertEqual(mime_type, 'image/png')
+        self.assertEqual(self.decode(data).mode, 'RGBA')
+
+        data, mime_type = image_preprocess.prepare_image_for_model(_image_bytes((300, 300), 'RGB', 'PNG'), 128)
+        self.assertEqual(mime_type, 'image/jpeg')
+        self.assertEqual(self.decode(data).format, 'JPEG')
+
+    def test_results_are_cached_by_content_with_lru_eviction(self):
+        first, second, third = (_image_bytes((300 + i, 300)) for i in range(3))
+        with mock.patch.object(image_preprocess, '_prepare', wraps=image_preprocess._prepare) as prepare:
+            image_preprocess.prepare_image_for_model(first, 128)
+            image_preprocess.prepare_image_for_model(bytes(first), 128)
+            self.assertEqual(prepare.call_count, 1)
+            image_preprocess.prepare_image_for_model(first, 64)
+            self.assertEqual(prepare.call_count, 2)
+
+            image_preprocess.prepare_image_for_model(second, 128)
+            image_preprocess.prepare_image_for_model(first, 128)   # 최근 사용으로 갱신
+            image_preprocess.prepare_image_for_model(third, 128)   # 가장 오래된 second가 밀려남
+            prepare.reset_mock()
+            image_preprocess.prepare_image_for_model(first, 128)
+            self.assertEqual(prepare.call_count, 0)
+            image_preprocess.prepare_image_for_model(second, 128)
+            self.assertEqual(prepare.call_count, 1)
+
+class ChatImageUploadHandlerTests(SimpleTestCase):
+    max_size = 4096
+
+    def upload(self, *files):
+        request = RequestFactory().post('/api/chat/upload_multiple_images/', {'files': list(files)})
+        request.upload_handlers = [ChatImageUploadHandler(
+            request, max_size=self.max_size, allowed_mime_types=['image/jpeg', 'image/png', 'image/webp'],
+        )]
+        return request, request.FILES.getlist('files')
+
+    def test_spoofed_extension_or_content_type_is_rejected_by_magic_bytes(self):
+        script = b'<?php system($_GET["c"]); ?>' * 4
+        request, files = self.upload(
+            SimpleUploadedFile('photo.png', script, 'image/png'),
+            SimpleUploadedFile('tiny.jpg', b'GIF89a', 'image/jpeg'),
+            SimpleUploadedFile('photo.txt', _image_bytes((20, 20), fmt='PNG'), 'text/plain'),
+        )
+        self.assertEqual(request.upload_rejections, [(0, 'photo.png', 'type'), (1, 'tiny.jpg', 'type')])
+        self.assertEqual([f.name for f in files], ['photo.txt'])
+        self.assertEqual(files[0].sniffed_content_type, 'image/png')
+        self.assertEqual(files[0].upload_index, 2)
+
+    def test_size_cap_stops_streaming_the_file(self):
+        big = _image_bytes((20, 20), fmt='PNG') + b'\0' * (self.max_size * 4)
+        original = TemporaryFileUploadHandler.receive_data_chunk
+        with mock.patch.object(TemporaryFileUploadHandler, 'receive_data_chunk', autospec=True,
+                               side_effect=original) as write_chunk, \
+                mock.patch.object(ChatImageUploadHandler, 'chunk_size', 1024):
+            request, files = self.upload(SimpleUploadedFile('big.png', big, 'image/png'))
+        self.assertEqual(files, [])
+        self.assertEqual(request.upload_rejections, [(0, 'big.png', 'size')])
+        written = sum(len(call.args[1]) for call in write_chunk.call_args_list)
+        self.assertLessEqual(written, self.max_size)
+
+    def test_valid_upload_is_streamed_to_a_temp_file(self):
+        data = _image_bytes((20, 20))
+        request, files = self.upload(SimpleUploadedFile('photo.jpg', data, 'application/octet-stream'))
+        self.assertEqual(request.upload_rejections, [])
+        upload = files[0]
+        self.addCleanup(upload.close)
+        self.assertIsInstance(upload, TemporaryUploadedFile)
+        self.assertEqual(upload.sniffed_content_type, 'image/jpeg')
+        with open(upload.temporary_file_path(), 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+@override_settings(MEDIA_URL='/media/')
+class MultiUploadTests(SimpleTestCase):
+    def fake_store(self, file, ext, content_type):
+        # 앞쪽 파일이 늦게 끝나도록 해서 완료 순서와 요청 순서를 다르게 만듦
+        time.sleep(0.02 * (5 - file.upload_index))
+        if file.name == 'broken.png':
+            raise OSError('disk full')
+        digest = hashlib.sha256(file.read()).hexdigest()
+        return mock.Mock(path=f'image/chat_attach/{digest}.{ext}', sha256=digest), True
+
+    def test_results_follow_request_order_when_one_file_fails(self):
+        files = [
+            SimpleUploadedFile('a.png', _image_bytes((10, 10), fmt='PNG'), 'image/png'),
+            SimpleUploadedFile('spoof.png', b'not really an image', 'image/png'),
+            SimpleUploadedFile('broken.png', _image_bytes((11, 11), fmt='PNG'), 'image/png'),
+            SimpleUploadedFile('c.jpg', _image_bytes((12, 12)), 'image/jpeg'),
+            SimpleUploadedFile('d.png', _image_bytes((13, 13), fmt='PNG'), 'image/png'),
+        ]
+        with mock.patch('chat.views.store_uploaded_file', side_effect=self.fake_store), \
+                mock.patch('chat.views.schedule_image_variants', return_value=None):
+            response = self.client.post('/api/chat/upload_multiple_images/', {'files': files})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['status'], 'partial_success')
+        self.assertEqual([f['original_name'] for f in body['uploaded_files']], ['a.png', 'c.jpg', 'd.png'])
+        self.assertEqual(len({f['file_url'] for f in body['uploaded_files']}), 3)
+        self.assertEqual(len(body['errors']), 2)
+        self.assertTrue(body['errors'][0].startswith('파일 2: 허용되지 않는 파일 형식'))
+        self.assertTrue(body['errors'][1].startswith('파일 3: 업로드 중 오류'))
+
+@override_settings(MEDIA_URL='/media/', CHAT_IMAGE_VARIANT_WIDTHS=(320, 640, 1280))
+class ImageVariantPlanTests(SimpleTestCase):
+    def test_variants_are_not_upscaled(self):
+        with mock.patch('chat.image_variants.variant_formats', return_value=['webp']):
+            plan = plan_variants('image/chat_attach/ab/abcd.jpg', 500, 400)
+        self.assertEqual(list(plan['variants']['webp']), ['320', '500'])
+        self.assertEqual(plan['thumbnail'], '/media/image/chat_attach/ab/variants/abcd_w320.webp')
+        self.assertEqual(
+            plan['srcset']['webp'],
+            '/media/image/chat_attach/ab/variants/abcd_w320.webp 320w, '
+            '/media/image/chat_attach/ab/variants/abcd_w500.webp 500w',
+        )
+
+    def test_pending_variants_are_not_advertised(self):
+        with mock.patch('chat.image_variants.variant_formats', return_value=['webp']):
+            plan = plan_variants('image/chat_attach/ab/abcd.jpg', 2000, 1000)
+        self.assertEqual(upload_variant_fields(dict(plan, ready=False)),
+                         {'variants_status': 'pending', 'thumbnail_url': None, 'srcset': {}})
+        ready = upload_variant_fields(dict(plan, ready=True))
+        self.assertEqual(ready['variants_status'], 'ready')
+        self.assertEqual(ready['thumbnail_url'], plan['thumbnail'])
+        self.assertEqual(upload_variant_fields(None)['variants_status'], 'unavailable')
+
+
+@override_settings(MEDIA_URL='/media/')
+class ImageVariantSchedulingTests(TestCase):
+    original = 'image/chat_attach/ab/abcd.png'
+
+    def setUp(self):
+        cache.delete(f'chat:image_variants:pending:{self.original}')
+        patcher = mock.patch('chat.image_variants._get_executor')
+        self.executor = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        formats = mock.patch('chat.image_variants.variant_formats', return_value=['webp'])
+        formats.start()
+        self.addCleanup(formats.stop)
+
+    def schedule(self):
+        return schedule_image_variants(self.original, io.BytesIO(_image_bytes((800, 600), fmt='PNG')))
+
+    def test_reupload_while_pending_does_not_schedule_again(self):
+        self.assertFalse(self.schedule()['ready'])
+        self.assertFalse(self.schedule()['ready'])
+        self.assertEqual(self.executor.submit.call_count, 1)
+
+    def test_claim_is_released_when_generation_finishes(self):
+        self.schedule()
+        generate, name, plan = self.executor.submit.call_args.args
+        with mock.patch('chat.image_variants.default_storage') as storage:
+            storage.open.side_effect = OSError('gone')
+            generate(name, plan)   # 실패해도 표시는 해제
+        self.schedule()
+        self.assertEqual(self.executor.submit.call_count, 2)
+
+        ImageVariantSet.objects.create(original=self.original, width=800, height=600,
+                                       thumbnail=plan['thumbnail'], variants=json.dumps(plan['variants']))
+        cache.delete(f'chat:image_variants:pending:{self.original}')
+        self.assertTrue(self.schedule()['ready'])
+        self.assertEqual(self.executor.submit.call_count, 2)
+
+class MediaStoreTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create(username='media-owner')
+        self.room = ChatRoom.objects.create(name='media-room', room_type='ai')
+
+    def upload(self, data=b'same image bytes'):
+        return store_uploaded_file(SimpleUploadedFile('photo.png', data, 'image/png'), 'png', 'image/png')
+
+    def send(self, blob, extra_urls=()):
+        url = f'/media/{blob.path}'
+        urls = [url, *extra_urls]
+        return Chat.save_user_message('photo', self.room.id, user=self.user, image_url=url,
+                                      image_urls_json=json.dumps(urls))
+
+    def test_same_content_is_stored_once(self):
+        first, created = self.upload()
+        second, created_again = self.upload()
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(first.path, blob_path(first.sha256, 'png'))
+        self.assertTrue(default_storage.exists(first.path))
+        self.assertEqual(MediaBlob.objects.count(), 1)
+
+    def test_messages_count_each_blob_once(self):
+        blob, _ = self.upload()
+        self.send(blob, extra_urls=[f'/media/{blob.path}', '/media/not-a-blob.png'])
+        self.send(blob)
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 2)
+
+    def test_release_decrements_without_going_negative(self):
+        blob, _ = self.upload()
+        message = self.send(blob)
+        self.assertEqual(release_chat_media(Chat.objects.filter(id=message.id)), 1)
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+        release_chat_media(Chat.objects.filter(id=message.id))
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+
+    def test_purge_deletes_only_unreferenced_blobs_past_grace(self):
+        old_unreferenced, _ = self.upload(b'old unreferenced')
+        recent_unreferenced, _ = self.upload(b'recent unreferenced')
+        old_referenced, _ = self.upload(b'old referenced')
+        self.send(old_referenced)
+        old = timezone.now() - timedelta(hours=48)
+        MediaBlob.objects.filter(pk__in=[old_unreferenced.pk, old_referenced.pk]).update(updated_at=old)
+
+        self.assertEqual(purge_unreferenced_blobs(grace_hours=24, dry_run=True), 1)
+        self.assertTrue(default_storage.exists(old_unreferenced.path))
+
+        self.assertEqual(purge_unreferenced_blobs(grace_hours=24), 1)
+        self.assertFalse(MediaBlob.objects.filter(pk=old_unreferenced.pk).exists())
+        self.assertFalse(default_storage.exists(old_unreferenced.path))
+        self.assertTrue(default_storage.exists(recent_unreferenced.path))
+        self.assertTrue(default_storage.exists(old_referenced.path))
+
+    def test_reupload_protects_blob_from_purge(self):
+        blob, _ = self.upload()
+        MediaBlob.objects.filter(pk=blob.pk).update(updated_at=timezone.now() - timedelta(hours=48))
+        self.upload()
+        self.assertEqual(purge_unreferenced_blobs(grace_hours=24), 0)
+        self.assertTrue(MediaBlob.objects.filter(pk=blob.pk).exists())
+
+    def test_local_put_streams_body_and_verifies_hash(self):
+        data = b'direct upload bytes' * 1000
+        sha256 = hashlib.sha256(data).hexdigest()
+        key = blob_path(sha256, 'png')
+
+        def token(**overrides):
+            intent = {'key': key, 'sha256': sha256, 'content_type': 'image/png', 'size': len(data), 'name': 'a.png'}
+            intent.update(overrides)
+            return signing.dumps(intent, salt=TOKEN_SALT)
+
+        with self.assertRaises(DirectUploadError):
+            receive_local_put(token(size=len(data) - 1), io.BytesIO(data))
+        with self.assertRaises(DirectUploadError):
+            receive_local_put(token(sha256='0' * 64), io.BytesIO(data))
+        self.assertFalse(default_storage.exists(key))
+
+        receive_local_put(token(), io.BytesIO(data))
+        with default_storage.open(key, 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+
+class MediaIndexTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        MediaIndexEntry.objects.all().delete()
+        asset_index.invalidate()
+
+    def test_file_exists_answers_from_the_index_without_touching_storage(self):
+        default_storage.save('legacy/old.png', ContentFile(b'legacy'))
+        MediaIndexEntry.objects.all().delete()
+        with mock.patch.object(default_storage, 'exists', side_effect=AssertionError('storage lookup')):
+            response = self.client.get('/api/chat/file_exists/', {'path': '/media/legacy/old.png'})
+            self.assertEqual(response.json(), {'exists': False})
+
+            index_file('legacy/old.png')
+            response = self.client.get('/api/chat/file_exists/', {'path': '/media/legacy/old.png'})
+            self.assertEqual(response.json(), {'exists': True})
+
+    def test_other_processes_drop_only_the_changed_paths(self):
+        other = AssetIndex()   # 다른 프로세스의 메모리 색인
+        MediaIndexEntry.objects.create(path='image/kept.png', size=1)
+        self.assertIsNone(other.lookup(['image/new.png', 'image/kept.png'])['image/new.png'])
+
+        MediaIndexEntry.objects.create(path='image/new.png', size=2)
+        index_file('image/new.png', size=2)
+        with self.assertNumQueries(0):
+            self.assertEqual(other.lookup(['image/kept.png'])['image/kept.png']['size'], 1)
+        self.assertEqual(other.lookup(['image/new.png'])['image/new.png']['size'], 2)
+
+        asset_index.invalidate()
+        with self.assertNumQueries(1):
+            other.lookup(['image/kept.png'])
+
+    def test_backfill_migration_indexes_only_files_recorded_in_the_db(self):
+        import importlib
+        from django.apps import apps
+        from .models import MediaFile
+
+        backfill = importlib.import_module('chat.migrations.0028_backfill_media_index').backfill_media_index
+        MediaBlob.objects.create(sha256='a' * 64, path='image/blob/aa.png', size=3)
+        media_file = MediaFile.objects.create(name='doc', file=ContentFile(b'doc', name='doc.txt'))
+        default_storage.save('legacy/only-in-storage.png', ContentFile(b'legacy'))
+        MediaIndexEntry.objects.all().delete()
+
+        with mock.patch.object(default_storage, 'listdir', side_effect=AssertionError('storage walk')):
+            backfill(apps, mock.Mock(connection=connection))
+        self.assertEqual(
+            dict(MediaIndexEntry.objects.values_list('path', 'size')),
+            {'image/blob/aa.png': 3, media_file.file.name: 3},
+        )
+
+    def test_list_returns_every_file_unless_page_is_given(self):
+        MediaIndexEntry.objects.bulk_create(
+            [MediaIndexEntry(path=f'image/{i:03d}.png', size=i) for i in range(120)]
+        )
+        files = self.client.get('/api/chat/list_media_files/').json()['files']
+        self.assertEqual(len(files), 120)
+
+        page = self.client.get('/api/chat/list_media_files/', {'page': 2, 'page_size': 50}).json()
+        self.assertEqual(page['files'][0], 'image/050.png')
+        self.assertEqual(len(page['files']), 50)
+        self.assertTrue(page['has_next'])
+
+
+class AdminStatsRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='stats-user')
+        self.room = ChatRoom.objects.create(name='stats-room', room_type='ai')
+        self.future = timezone.now() + timedelta(seconds=5)
+
+    def rollup(self, name):
+        return next(rollup for rollup in admin_stats.ROLLUPS if rollup.name == name)
+
+    def send(self, count):
+        return [Chat.save_user_message(f'message {i}', self.room.id, user=self.user) for i in range(count)]
+
+    def message_total(self):
+        return admin_stats._total(DailyMessageStat)
+
+    def test_each_run_adds_only_rows_after_the_watermark(self):
+        sent = self.send(3)
+        rollup = self.rollup('chat_daily')
+        self.assertEqual(admin_stats.run_rollup(rollup, cutoff=self.future), 1)
+        self.assertEqual(self.message_total(), 3)
+        self.assertEqual(StatsWatermark.objects.get(name='chat_daily').last_id, sent[-1].id)
+
+        self.send(2)
+        admin_stats.run_rollup(rollup, cutoff=timezone.now() + timedelta(seconds=5))
+        self.assertEqual(self.message_total(), 5)
+        self.assertEqual(admin_stats.run_rollup(rollup, cutoff=timezone.now() + timedelta(seconds=5)), 0)
+        self.assertEqual(self.message_total(), 5)
+
+    def test_batches_resume_from_the_recorded_watermark(self):
+        sent = self.send(3)
+        StatsWatermark.objects.create(name='chat_daily', last_id=sent[0].id - 1)
+        rollup = self.rollup('chat_daily')
+        self.assertEqual(admin_stats.run_rollup(rollup, batch_size=1, max_batches=2, cutoff=self.future), 2)
+        self.assertEqual(StatsWatermark.objects.get(name='chat_daily').last_id, sent[1].id)
+        self.assertEqual(self.message_total(), 2)
+
+        admin_stats.run_rollup(rollup, batch_size=1, cutoff=self.future)
+        self.assertEqual(self.message_total(), 3)
+
+    def test_rows_newer_than_the_cutoff_wait_for_the_next_run(self):
+        cutoff = timezone.now() - timedelta(seconds=5)
+        self.send(2)
+        self.assertEqual(admin_stats.run_rollup(self.rollup('chat_daily'), cutoff=cutoff), 0)
+        self.assertEqual(self.message_total(), 0)
+
+    def test_user_rollup_counts_new_users(self):
+        User.objects.create(username='stats-user-2')
+        admin_stats.run_rollup(self.rollup('user_daily'), cutoff=self.future)
+        self.assertEqual(admin_stats._total(DailyUserStat), User.objects.count())
+        self.assertEqual(StatsWatermark.objects.get(name='user_daily').last_id, User.objects.order_by('-id').first().id)
+
+    def test_totals_come_from_rollups_and_drop_on_delete(self):
+        sent = self.send(3)
+        admin_stats.refresh_admin_stats(cutoff=self.future)
+        late = self.send(1)   # 아직 집계되지 않은 행: 지워도 뺄 것이 없음
+        delete_messages_chunk(Chat.objects.filter(id__in=[sent[0].id, late[0].id]))
+
+        with CaptureQueriesContext(connection) as queries:
+            totals = admin_stats.overview_totals()
+            sender_totals = admin_stats.sender_type_totals()
+            room_totals = admin_stats.room_type_totals()
+        self.assertFalse([q['sql'] for q in queries if '"chat_chat"' in q['sql'] or '"chat_chatroom"' in q['sql']])
+        self.assertEqual(totals['total_messages'], 2)
+        self.assertEqual(sender_totals, [{'sender_type': 'user', 'count': 2}])
+        self.assertEqual(room_totals, [{'room_type': 'ai', 'count': 1}])
+
+        admin_stats.refresh_admin_stats(cutoff=timezone.now() + timedelta(seconds=5))
+        self.assertEqual(admin_stats.overview_totals()['total_messages'], 2)
+
+    def test_room_delete_job_subtracts_rooms_and_messages(self):
+        self.send(2)
+        admin_stats.refresh_admin_stats(cutoff=self.future)
+        job = AdminJob.objects.create(job_type='delete_rooms', params=json.dumps({'ids': [self.room.id]}))
+        with mock.patch.object(admin_jobs, '_notify'):
+            admin_jobs.run_job(job.id)
+        totals = admin_stats.overview_totals()
+        self.assertEqual((totals['total_rooms'], totals['total_messages']), (0, 0))
+        self.assertEqual(admin_stats.room_type_totals(), [])
+
+    def test_dashboard_schedules_one_background_refresh(self):
+        cache.delete(admin_stats.REFRESHED_AT_KEY)
+        cache.delete(admin_stats.REFRESH_LOCK_KEY)
+        self.addCleanup(cache.delete, admin_stats.REFRESH_LOCK_KEY)
+        with mock.patch('chat.admin_jobs.run_in_background') as run_in_background:
+            self.assertTrue(admin_stats.schedule_admin_stats_refresh())
+            self.assertFalse(admin_stats.schedule_admin_stats_refresh())
+        run_in_background.assert_called_once_with(admin_stats._refresh_in_background)
+
+
+
+class MessageTrafficTests(TestCase):
+    def setUp(self):
+        def hour(day, h):
+            return analytics.parse_bound(f'2024-05-{day:02d}T{h:02d}:00:00+00:00')
+
+        HourlyTrafficStat.objects.bulk_create([
+            HourlyTrafficStat(hour=hour(1, 9), room_id=1, sender_type='user', count=3),
+            HourlyTrafficStat(hour=hour(1, 9), room_id=1, sender_type='ai', ai_name='Lily', count=2),
+            HourlyTrafficStat(hour=hour(1, 10), room_id=2, sender_type='user', count=4),
+            HourlyTrafficStat(hour=hour(1, 11), room_id=2, sender_type='user', count=7),
+        ])
+        DailyTrafficStat.objects.bulk_create([
+            DailyTrafficStat(date=date(2024, 4, 30), room_id=1, sender_type='user', count=5),
+            DailyTrafficStat(date=date(2024, 5, 1), room_id=1, sender_type='user', count=3),
+            DailyTrafficStat(date=date(2024, 5, 1), room_id=1, sender_type='ai', count=2),
+            DailyTrafficStat(date=date(2024, 5, 1), room_id=2, sender_type='user', count=4),
+            DailyTrafficStat(date=date(2024, 5, 2), room_id=1, sender_type='user', count=1),
+        ])
+
+    def traffic(self, start, end, granularity='hour', group_by=(), **filters):
+        return analytics.message_traffic(analytics.parse_bound(start), analytics.parse_bound(end),
+                                         granularity, group_by, filters)
+
+    def test_hourly_series_is_grouped_and_end_exclusive(self):
+        result = self.traffic('2024-05-01T09:00:00', '2024-05-01T11:00:00', group_by=['sender_type'])
+        self.assertEqual(result, {'total': 9, 'series': [
+            {'bucket': '2024-05-01T09:00:00+00:00', 'sender_type': 'ai', 'count': 2},
+            {'bucket': '2024-05-01T09:00:00+00:00', 'sender_type': 'user', 'count': 3},
+            {'bucket': '2024-05-01T10:00:00+00:00', 'sender_type': 'user', 'count': 4},
+        ]})
+
+    def test_filters_narrow_the_rows_and_blank_values_are_ignored(self):
+        start, end = '2024-05-01T00:00:00', '2024-05-02T00:00:00'
+        self.assertEqual(self.traffic(start, end, room_id=1)['total'], 5)
+        self.assertEqual(self.traffic(start, end, room_id=2, sender_type='user')['total'], 11)
+        self.assertEqual(self.traffic(start, end, ai_name='Lily', emotion='')['total'], 2)
+
+    def test_day_range_is_rounded_to_whole_days(self):
+        # 시작 시각은 그날 0시로 내리고, 자정이 아닌 끝 시각은 그날까지 포함
+        self.assertEqual(self.traffic('2024-05-01T15:00:00', '2024-05-02T00:00:00', 'day')['total'], 9)
+        self.assertEqual(self.traffic('2024-05-01T15:00:00', '2024-05-02T00:30:00', 'day')['total'], 10)
+        result = self.traffic('2024-04-30', '2024-05-03', 'day', group_by=['room'])
+        self.assertEqual([(item['bucket'], item['room'], item['count']) for item in result['series']], [
+            ('2024-04-30', 1, 5), ('2024-05-01', 1, 5), ('2024-05-01', 2, 4), ('2024-05-02', 1, 1),
+        ])
+
+    @override_settings(TIME_ZONE='Asia/Seoul')
+    def test_day_boundaries_follow_the_local_timezone(self):
+        # UTC 2024-04-30T15:00 = 서울 2024-05-01 0시
+        self.assertEqual(self.traffic('2024-04-30T15:00:00+00:00', '2024-05-01T15:00:00+00:00', 'day')['total'], 9)
+
+    def test_invalid_queries_raise(self):
+        for kwargs in (
+            {'granularity': 'minute'},
+            {'group_by': ['user']},
+            {'start': '2024-05-02', 'end': '2024-05-01'},
+            {'start': '2024-03-01', 'end': '2024-05-01'},
+        ):
+            params = {'start': '2024-05-01', 'end': '2024-05-02', **kwargs}
+            with self.subTest(**kwargs), self.assertRaises(analytics.AnalyticsQueryError):
+                self.traffic(params.pop('start'), params.pop('end'), **params)
+
+    def test_admin_endpoint_returns_series_and_400_on_bad_query(self):
+        client = APIClient()
+        url = '/api/admin/analytics/'
+        with mock.patch('chat.admin_views.admin_stats.schedule_admin_stats_refresh'):
+            self.assertEqual(client.get(url).status_code, 403)
+            client.force_authenticate(User.objects.create(username='analytics-staff', is_staff=True))
+            response = client.get(url, {'granularity': 'day', 'start': '2024-05-01', 'end': '2024-05-02',
+                                        'group_by': 'sender_type', 'room_id': '1'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['total'], 5)
+            self.assertEqual([item['sender_type'] for item in response.data['series']], ['ai', 'user'])
+
+            for params in ({'group_by': 'user'}, {'granularity': 'week'}, {'start': 'yesterday'}):
+                response = client.get(url, params)
+                self.assertEqual(response.status_code, 400, params)
+                self.assertIn('error', response.data)
+
+@override_settings(ADMIN_JOB_BATCH_SIZE=2)
+class AdminJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='job-user')
+        self.room = ChatRoom.objects.create(name='job-room', room_type='ai')
+        self.messages = [Chat.save_user_message(f'message {i}', self.room.id, user=self.user) for i in range(5)]
+
+    def test_message_chunks_delete_at_most_batch_size_rows(self):
+        queryset = Chat.objects.filter(room_id=self.room.id)
+        self.assertEqual([delete_messages_chunk(queryset, 2) for _ in range(4)], [2, 2, 1, 0])
+        self.assertFalse(queryset.exists())
+
+    def test_job_runs_every_step_in_batches(self):
+        job = AdminJob.objects.create(job_type='delete_rooms', params=json.dumps({'ids': [self.room.id]}))
+        with mock.patch.object(admin_jobs, '_notify') as notify:
+            admin_jobs.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.processed, job.total)
+        # 메시지 5개 → 2/2/1 세 배치 + 대화방 1개 배치, 배치마다 진행 이벤트 + 완료 이벤트
+        self.assertEqual(notify.call_count, 5)
+        self.assertFalse(Chat.objects.filter(room_id=self.room.id).exists())
+        self.assertFalse(ChatRoom.objects.filter(id=self.room.id).exists())
+
+    def test_stale_job_resumes_from_recorded_step(self):
+        # 메시지 단계를 끝낸 뒤 멈춘 작업: 다시 실행하면 남은 단계만 처리
+        job = AdminJob.objects.create(
+            job_type='delete_rooms', params=json.dumps({'ids': [self.room.id]}), status='running',
+            state=json.dumps({'counted': True, 'step': 1}), total=6, processed=5,
+        )
+        AdminJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        with mock.patch.object(admin_jobs, '_notify'):
+            self.assertEqual(admin_jobs.resume_stale_jobs(stale_seconds=60, run_inline=True), [job.pk])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        # 메시지 단계는 다시 세지 않고 대화방 1개만 더해짐
+        self.assertEqual(job.processed, 6)
+        self.assertFalse(ChatRoom.objects.filter(id=self.room.id).exists())
+
+    def test_bulk_action_rejects_non_numeric_ids(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='job-staff', is_staff=True))
+        for ids in (['1', 'abc'], '12', [None]):
+            response = client.post('/api/admin/bulk-action/', {'action': 'delete_messages', 'ids': ids}, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(AdminJob.objects.exists())
+
+
+class PendingDeleteTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create(username='room-owner')
+        self.staff = User.objects.create(username='room-staff', is_staff=True)
+        self.room = ChatRoom.objects.create(name='doomed', room_type='ai', is_public=True)
+        ChatRoomParticipant.objects.create(room=self.room, user=self.owner, is_owner=True)
+        self.messages = [Chat.save_user_message(f'message {i}', self.room.id, user=self.owner) for i in range(3)]
+        self.client = APIClient()
+        notify = mock.patch.object(admin_jobs, '_notify')
+        notify.start()
+        self.addCleanup(notify.stop)
+
+    def as_user(self, user):
+        self.client.force_authenticate(user)
+        return self.client
+
+    def test_destroy_hides_the_room_then_the_job_purges_it(self):
+        with mock.patch('chat.views.get_channel_layer'), self.captureOnCommitCallbacks() as callbacks:
+            response = self.as_user(self.owner).delete(f'/api/chat/rooms/{self.room.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(callbacks), 1)   # 워커 풀 제출은 커밋 후
+
+        self.assertEqual(self.client.get(f'/api/chat/rooms/{self.room.id}/').status_code, 404)
+        self.assertTrue(Chat.objects.filter(room_id=self.room.id).exists())
+
+        admin_jobs.run_job(response.data['job_id'])
+        self.assertFalse(ChatRoom.objects.filter(id=self.room.id).exists())
+        self.assertFalse(Chat.objects.filter(room_id=self.room.id).exists())
+        self.assertEqual(AdminJob.objects.get(pk=response.data['job_id']).status, 'completed')
+
+    def test_room_pending_purge_cannot_be_reactivated(self):
+        job = admin_jobs.soft_delete_rooms([self.room.id], self.staff)
+        url = f'/api/admin/rooms/{self.room.id}/toggle_active/'
+        self.assertEqual(self.as_user(self.staff).post(url).status_code, 409)
+        self.room.refresh_from_db()
+        self.assertFalse(self.room.is_active)
+
+        AdminJob.objects.filter(pk=job.pk).update(status='completed')
+        self.assertEqual(self.client.post(url).status_code, 200)
+
+    def test_user_pending_purge_cannot_be_reactivated(self):
+        admin_jobs.purge_users([self.owner.id], self.staff)
+        client = self.as_user(self.staff)
+        self.assertEqual(client.post(f'/api/admin/users/{self.owner.id}/toggle_active/').status_code, 409)
+        response = client.post('/api/admin/bulk-action/', {'action': 'activate_users', 'ids': [self.owner.id]},
+                               format='json')
+        self.assertEqual((response.data['updated_count'], response.data['skipped_ids']), (0, [self.owner.id]))
+        self.owner.refresh_from_db()
+        self.assertFalse(self.owner.is_active)
+
+class AdminPaginationTests(TestCase):
+    def setUp(self):
+        self.rooms = [ChatRoom.objects.create(name=f'page-room-{i}', room_type='ai') for i in range(5)]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='page-staff', is_staff=True))
+
+    @override_settings(ADMIN_COUNT_CAP=3, ADMIN_EXACT_COUNT_THRESHOLD=100)
+    def test_fast_count_uses_estimates_and_caps(self):
+        rooms = ChatRoom.objects.all()
+        self.assertEqual(fast_count(rooms), (5, False))
+        with mock.patch('chat.admin_pagination.estimated_table_rows', return_value=50000):
+            self.assertEqual(fast_count(rooms), (50000, True))
+        with mock.patch('chat.admin_pagination.estimated_table_rows', return_value=50):
+            self.assertEqual(fast_count(rooms), (5, False))
+        self.assertEqual(fast_count(rooms.filter(room_type='ai')), (3, True))
+        self.assertEqual(fast_count(rooms.filter(id__in=[r.id for r in self.rooms[:2]])), (2, False))
+
+    def test_paginator_fetches_page_rows_by_primary_key(self):
+        paginator = EstimatedCountPaginator(ChatRoom.objects.order_by('-id'), 2)
+        self.assertEqual(paginator.count, 5)
+        with self.assertNumQueries(2):
+            page = list(paginator.page(2))
+        self.assertEqual([room.id for room in page], [self.rooms[2].id, self.rooms[1].id])
+
+        with mock.patch('chat.admin_pagination.fast_count', return_value=(4, True)):
+            estimated = EstimatedCountPaginator(ChatRoom.objects.order_by('-id'), 2)
+            # 추정치 기준 마지막 페이지 뒤에도 실제 행이 있으면 그대로 돌려줌
+            self.assertEqual([room.id for room in estimated.page(3)], [self.rooms[0].id])
+            self.assertEqual(list(estimated.page(4)), [])
+
+    def test_admin_lists_default_to_cursor_pagination(self):
+        seen = []
+        url, params = '/api/admin/rooms/', {'page_size': 2}
+        while url:
+            data = self.client.get(url, params).json()
+            if data['next']:
+                self.assertIn('cursor=', data['next'])
+            seen.extend(room['id'] for room in data['results'])
+            url, params = data['next'], None
+        self.assertEqual(seen, [room.id for room in ChatRoom.objects.order_by('-created_at', '-id')])
+
+        second = self.client.get('/api/admin/rooms/', {'page_size': 2}).json()['next']
+        self.assertIsNotNone(self.client.get(second).json()['previous'])
+
+    def test_page_number_is_still_accepted(self):
+        data = self.client.get('/api/admin/rooms/', {'page': 2, 'page_size': 2}).json()
+        self.assertEqual(data['count'], 5)
+        self.assertIn('page=3', data['next'])
+        self.assertEqual(len(data['results']), 2)
+
+class AdminSearchIndexTests(TestCase):
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite FTS 트리거 전용')
+        admin_search._sqlite_ready.clear()
+        self.addCleanup(admin_search._sqlite_ready.clear)
+
+    def test_migration_installs_fts_index(self):
+        ChatRoom.objects.create(name='needle room', room_type='ai')
+        self.assertIsNotNone(admin_search._candidate_ids('chat_chatroom', ('name',), 'needle'))
+        self.assertEqual(
+            list(admin_search.search_queryset(ChatRoom.objects.all(), 'NEEDLE').values_list('name', flat=True)),
+            ['needle room'],
+        )
+
+    def test_dropped_triggers_are_restored_after_migrate(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER chat_chatroom_search_ai')
+        self.assertEqual(admin_search.restore_sqlite_search_triggers(), ['chat_chatroom'])
+        self.assertEqual(admin_search.restore_sqlite_search_triggers(), [])
+        room = ChatRoom.objects.create(name='haystack needle', room_type='ai')
+        sql, params = admin_search._candidate_sql('chat_chatroom', ('name',), 'needle')
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            self.assertEqual([row[0] for row in cursor.fetchall()], [room.id])
+
+
+class MetricsAccessTests(TestCase):
+    @override_settings(METRICS_AUTH_TOKEN='', METRICS_ALLOW_LOCALHOST=False)
+    def test_local_requests_need_token_or_staff_by_default(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.client.force_login(User.objects.create(username='metrics-staff', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICS_AUTH_TOKEN='secret', METRICS_ALLOW_LOCALHOST=False)
+    def test_bearer_token_is_checked(self):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    @override_settings(METRICS_AUTH_TOKEN='', METRICS_ALLOW_LOCALHOST=True)
+    def test_localhost_bypass_only_when_enabled(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.5').status_code, 403)
+
+
+class ConsumerProviderModelTests(SimpleTestCase):
+    async def test_lily_slot_uses_the_stored_model_not_the_client_model(self):
+        from .consumers import ChatConsumer
+
+        consumer = ChatConsumer()
+        consumer.scope = {'user': mock.Mock(is_authenticated=True, id=7, username='kim')}
+        consumer.channel_name = 'test-channel'
+        slots = []
+
+        async def wait_for_ai_slot(provider, model, room_id=None, room_level=False):
+            slots.append((provider, model))
+            raise AIRateLimitExceeded('busy')
+
+        with mock.patch.object(consumer, 'get_user_ai_settings', mock.AsyncMock(
+            return_value={'aiProvider': 'lily', 'lilyModel': 'stored-model'}
+        )), mock.patch.object(consumer, 'is_ai_response_cache_enabled', mock.AsyncMock(return_value=False)), \
+                mock.patch.object(consumer, 'wait_for_ai_slot', wait_for_ai_slot):
+            await consumer.get_ai_response('hi', client_ai_settings={'lilyModel': 'client-model'}, room_id=1)
+        self.assertIn(('lily', 'stored-model'), slots)
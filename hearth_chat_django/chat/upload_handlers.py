@@ -0,0 +1,70 @@
+"""채팅 이미지 업로드 스트리밍 핸들러
+
+기본 업로드 처리는 작은 파일을 통째로 메모리에 올린 뒤 뷰에서 file.read()로 한 번 더 복사했다.
+이 핸들러는 요청 본문을 청크 단위로 임시 파일에 바로 쓰면서
+
+- 첫 청크의 매직 바이트로 실제 이미지 포맷을 확인 (클라이언트가 보낸 content_type은 믿지 않음)
+- 받은 크기가 한도를 넘는 순간 해당 파일을 중단
+
+하므로 동시 업로드가 많아도 업로드당 메모리 사용량이 청크 크기로 고정된다.
+거부된 파일은 request.upload_rejections 에 (파일 순번, 파일 이름, 사유)로 남는다.
+"""
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+
+from .image_preprocess import sniff_mime_type
+
+SNIFF_BYTES = 16
+
+
+class ChatImageUploadHandler(TemporaryFileUploadHandler):
+    """임시 파일 스트리밍 + 매직 바이트/크기 검사"""
+
+    def __init__(self, request=None, max_size=None, allowed_mime_types=None):
+        super().__init__(request)
+        self.max_size = max_size
+        self.allowed_mime_types = set(allowed_mime_types or [])
+        self.file_index = -1
+        if request is not None and not hasattr(request, 'upload_rejections'):
+            request.upload_rejections = []
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        self.file_index += 1
+        self._received = 0
+        self._head = b''
+        self._sniffed_type = None
+        super().new_file(field_name, file_name, *args, **kwargs)
+
+    def _record_rejection(self, reason):
+        if self.request is not None:
+            self.request.upload_rejections.append((self.file_index, self.file_name, reason))
+        self.file.close()
+
+    def _reject(self, reason):
+        self._record_rejection(reason)
+        raise SkipFile(reason)
+
+    def receive_data_chunk(self, raw_data, start):
+        self._received += len(raw_data)
+        if self.max_size and self._received > self.max_size:
+            self._reject('size')
+
+        if self._sniffed_type is None:
+            self._head += raw_data[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniffed_type = sniff_mime_type(self._head)
+                if self.allowed_mime_types and self._sniffed_type not in self.allowed_mime_types:
+                    self._reject('type')
+
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self._sniffed_type is None:
+            # 16바이트보다 작은 파일 (file_complete에서는 SkipFile 대신 None 반환으로 제외)
+            self._sniffed_type = sniff_mime_type(self._head)
+            if self.allowed_mime_types and self._sniffed_type not in self.allowed_mime_types:
+                self._record_rejection('type')
+                return None
+        file = super().file_complete(file_size)
+        file.sniffed_content_type = self._sniffed_type
+        file.upload_index = self.file_index
+        return file
@@ -22,11 +22,15 @@ urlpatterns = [
     path('sessions/', views.get_all_sessions, name='all_sessions'),
     path('upload_image/', views.upload_chat_image, name='upload_chat_image'),
     path('upload_multiple_images/', views.upload_multiple_chat_images, name='upload_multiple_chat_images'),
+    path('upload_intent/', views.create_upload_intent, name='create_upload_intent'),
+    path('upload_direct/<str:token>/', views.receive_direct_upload, name='direct_upload_put'),
+    path('upload_complete/', views.complete_direct_upload, name='complete_direct_upload'),
     path('logout/', views.logout_api, name='logout_api'),
     path('rooms/user_chat_alt/', views.UserChatCreateAPIView.as_view(), name='user_chat_api'),
     path('messages/<int:pk>/delete/', views.ChatViewSet.as_view({'delete': 'delete_message'}), name='delete_message'),
     path('messages/<int:pk>/favorite/', views.toggle_message_favorite, name='toggle_message_favorite'),  # 즐겨찾기 별도 뷰
     path('file_exists/', views.file_exists, name='file_exists'),
+    path('assets/exists/', views.assets_exist, name='assets_exist'),
     path('list_media_files/', views.list_media_files, name='list_media_files'),
 ]
 
@@ -5,6 +5,8 @@ from django.views.decorators.http import require_http_methods
 from .models import Chat
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
@@ -32,10 +34,17 @@ from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 import json
 from django.db import models
+from django.db import connections, transaction
 from django.core.cache import cache
 from django.conf import settings
 from .models import MessageFavorite
-from .models import MediaFile
+from .models import MediaFile, MediaIndexEntry
+from .image_variants import attach_image_variants, schedule_image_variants, upload_variant_fields
+from .media_store import acquire_message_media, release_chat_media, store_uploaded_file
+from .image_preprocess import extension_for_mime
+from .upload_handlers import ChatImageUploadHandler
+from . import admin_jobs, admin_stats, direct_upload, media_index
+from .asset_index import asset_index
 
 
 # Create your views here.
@@ -99,14 +108,34 @@ ALLOWED_EXTENSIONS = ['jpg', 'jpeg', 'png', 'webp']
 ALLOWED_MIME_TYPES = ['image/jpeg', 'image/png', 'image/webp']
 MAX_FILE_SIZE_MB = 4
 
+def _install_upload_handler(request):
+    """요청 본문을 읽기 전에 스트리밍 업로드 핸들러로 교체"""
+    request.upload_handlers = [ChatImageUploadHandler(
+        request,
+        max_size=MAX_FILE_SIZE_MB * 1024 * 1024,
+        allowed_mime_types=ALLOWED_MIME_TYPES,
+    )]
+
+
+def _upload_rejection_message(reason):
+    if reason == 'size':
+        return f'파일 용량은 {MAX_FILE_SIZE_MB}MB 이하만 허용됩니다.'
+    return '허용되지 않는 파일 형식입니다. (JPEG, PNG, WebP 이미지만 가능)'
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def upload_chat_image(request):
-    """채팅 이미지 업로드 API (확장자, 용량, MIME 타입 검사)"""
+    """채팅 이미지 업로드 API (확장자, 용량, 파일 내용(매직 바이트) 검사)"""
+    _install_upload_handler(request)
     file = request.FILES.get('file')
     session_id = request.POST.get('session_id', None)
     content = request.POST.get('content', '')  # 메시지 내용도 받음    
     if not file:        
+        # 용량 초과/이미지가 아닌 파일은 업로드 중에 걸러짐
+        if request.upload_rejections:
+            _, _, reason = request.upload_rejections[0]
+            return JsonResponse({'status': 'error', 'message': _upload_rejection_message(reason)}, status=400)
         return JsonResponse({'status': 'error', 'message': '파일이 첨부되지 않았습니다.'}, status=400)
 
     # 확장자 검사
@@ -114,21 +143,16 @@ def upload_chat_image(request):
     if ext not in ALLOWED_EXTENSIONS:        
         return JsonResponse({'status': 'error', 'message': f'허용되지 않는 확장자입니다: {ext}'}, status=400)
 
-    # 용량 검사
-    if file.size > MAX_FILE_SIZE_MB * 1024 * 1024:        
-        return JsonResponse({'status': 'error', 'message': f'파일 용량은 {MAX_FILE_SIZE_MB}MB 이하만 허용됩니다.'}, status=400)
-
-    # MIME 타입 검사
-    if file.content_type not in ALLOWED_MIME_TYPES:        
-        return JsonResponse({'status': 'error', 'message': f'허용되지 않는 MIME 타입입니다: {file.content_type}'}, status=400)
+    # 실제 내용 기준 MIME 타입 (저장 확장자도 내용 기준)
+    content_type = file.sniffed_content_type
+    ext = extension_for_mime(content_type)
 
     # 파일 저장
-    from django.core.files.storage import default_storage
-    from django.core.files.base import ContentFile
     from django.conf import settings
     
-    # 파일을 저장하고 URL 생성
-    file_path = default_storage.save(f'image/chat_attach/{file.name}', ContentFile(file.read()))
+    # 내용 해시 경로로 저장 (같은 파일이 이미 있으면 쓰기 생략)
+    blob, _ = store_uploaded_file(file, ext, content_type)
+    file_path = blob.path
     
     # 절대 URL 생성
     if hasattr(settings, 'MEDIA_URL') and settings.MEDIA_URL.startswith('http'):
@@ -137,72 +161,98 @@ def upload_chat_image(request):
         # 로컬 개발 환경에서는 상대 경로를 절대 경로로 변환
         file_url = f"/media/{file_path}"
     
+    # 썸네일/WebP 변환본은 워커 풀에서 생성, 응답에는 이미 만들어진 변환본만 포함 (생성 중이면 pending)
+    variants = schedule_image_variants(file_path, file)
+    
     # 메시지 저장 제거 - WebSocket을 통해 받은 메시지만 저장
     
     return JsonResponse({
         'status': 'success',
-        'file_url': file_url
+        'file_url': file_url,
+        'content_hash': blob.sha256,
+        **upload_variant_fields(variants)
     })
 
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
+
+
+def _get_upload_executor():
+    global _upload_executor
+    with _upload_executor_lock:
+        if _upload_executor is None:
+            workers = max(1, int(getattr(settings, 'CHAT_UPLOAD_WORKERS', 4)))
+            _upload_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chat-upload')
+        return _upload_executor
+
+
+def _store_multi_upload_file(file):
+    """다중 업로드 파일 1개 검사/저장. (순번, 업로드 정보 또는 None, 오류 메시지 또는 None) 반환"""
+    i = getattr(file, 'upload_index', 0)
+    try:
+        # 확장자 검사
+        ext = file.name.split('.')[-1].lower()
+        if ext not in ALLOWED_EXTENSIONS:
+            return i, None, f'허용되지 않는 확장자입니다: {ext}'
+
+        # 실제 내용 기준 MIME 타입 (저장 확장자도 내용 기준)
+        content_type = file.sniffed_content_type
+        ext = extension_for_mime(content_type)
+
+        # 내용 해시 경로로 저장 (같은 파일이 이미 있으면 쓰기 생략)
+        blob, _ = store_uploaded_file(file, ext, content_type)
+        file_path = blob.path
+
+        # 절대 URL 생성
+        if hasattr(settings, 'MEDIA_URL') and settings.MEDIA_URL.startswith('http'):
+            file_url = f"{settings.MEDIA_URL}{file_path}"
+        else:
+            # 로컬 개발 환경에서는 상대 경로를 절대 경로로 변환
+            file_url = f"/media/{file_path}"
+
+        variants = schedule_image_variants(file_path, file)
+
+        return i, {
+            'original_name': file.name,
+            'file_url': file_url,
+            'size': file.size,
+            'content_hash': blob.sha256,
+            **upload_variant_fields(variants)
+        }, None
+    except Exception as e:
+        return i, None, f'업로드 중 오류가 발생했습니다. ({str(e)})'
+    finally:
+        # 워커 스레드의 DB 연결 정리
+        connections.close_all()
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def upload_multiple_chat_images(request):
     """다중 채팅 이미지 업로드 API"""
+    _install_upload_handler(request)
     files = request.FILES.getlist('files')
     content = request.POST.get('content', '')
+    rejections = request.upload_rejections
     
-    if not files:
+    if not files and not rejections:
         return JsonResponse({'status': 'error', 'message': '파일이 첨부되지 않았습니다.'}, status=400)
 
     # 최대 파일 개수 제한
     MAX_FILES = 5
-    if len(files) > MAX_FILES:
+    if len(files) + len(rejections) > MAX_FILES:
         return JsonResponse({'status': 'error', 'message': f'최대 {MAX_FILES}개의 파일만 업로드할 수 있습니다.'}, status=400)
 
-    uploaded_files = []
-    errors = []
+    # 업로드 중에 걸러진 파일 (용량 초과/이미지 아님)
+    results = [(index, None, _upload_rejection_message(reason)) for index, _, reason in rejections]
 
-    for i, file in enumerate(files):
-        try:
-            # 확장자 검사
-            ext = file.name.split('.')[-1].lower()
-            if ext not in ALLOWED_EXTENSIONS:
-                errors.append(f'파일 {i+1}: 허용되지 않는 확장자입니다: {ext}')
-                continue
-
-            # 용량 검사
-            if file.size > MAX_FILE_SIZE_MB * 1024 * 1024:
-                errors.append(f'파일 {i+1}: 파일 용량은 {MAX_FILE_SIZE_MB}MB 이하만 허용됩니다.')
-                continue
-
-            # MIME 타입 검사
-            if file.content_type not in ALLOWED_MIME_TYPES:
-                errors.append(f'파일 {i+1}: 허용되지 않는 MIME 타입입니다: {file.content_type}')
-                continue
-
-            # 파일 저장
-            from django.core.files.storage import default_storage
-            from django.core.files.base import ContentFile
-            from django.conf import settings
-            
-            # 파일을 저장하고 URL 생성
-            file_path = default_storage.save(f'image/chat_attach/{file.name}', ContentFile(file.read()))
-            
-            # 절대 URL 생성
-            if hasattr(settings, 'MEDIA_URL') and settings.MEDIA_URL.startswith('http'):
-                file_url = f"{settings.MEDIA_URL}{file_path}"
-            else:
-                # 로컬 개발 환경에서는 상대 경로를 절대 경로로 변환
-                file_url = f"/media/{file_path}"
-            
-            uploaded_files.append({
-                'original_name': file.name,
-                'file_url': file_url,
-                'size': file.size
-            })
+    # 저장(원격 저장소면 네트워크 쓰기)은 제한된 스레드 풀에서 동시에 처리
+    futures = [_get_upload_executor().submit(_store_multi_upload_file, file) for file in files]
+    results.extend(future.result() for future in futures)
+    results.sort(key=lambda result: result[0])
 
-        except Exception as e:
-            errors.append(f'파일 {i+1}: 업로드 중 오류가 발생했습니다. ({str(e)})')
+    uploaded_files = [uploaded for _, uploaded, _ in results if uploaded]
+    errors = [f'파일 {i+1}: {error}' for i, _, error in results if error]
 
     if errors:
         return JsonResponse({
@@ -216,6 +266,83 @@ def upload_multiple_chat_images(request):
             'uploaded_files': uploaded_files
         })
 
+def _direct_upload_payload(blob):
+    """업로드 완료 응답 (upload_chat_image와 같은 형식)"""
+    file_path = blob.path
+    if hasattr(settings, 'MEDIA_URL') and settings.MEDIA_URL.startswith('http'):
+        file_url = f"{settings.MEDIA_URL}{file_path}"
+    else:
+        file_url = f"/media/{file_path}"
+    with default_storage.open(file_path, 'rb') as f:
+        variants = schedule_image_variants(file_path, f)
+    return {
+        'status': 'success',
+        'file_url': file_url,
+        'content_hash': blob.sha256,
+        **upload_variant_fields(variants)
+    }
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def create_upload_intent(request):
+    """직접 업로드 시작 API: 파일 정보를 검증하고 PUT URL 발급 (같은 파일이 있으면 바로 완료)"""
+    try:
+        data = json.loads(request.body or b'{}')
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'status': 'error', 'message': '잘못된 요청 형식입니다.'}, status=400)
+
+    ext = (data.get('filename') or '').split('.')[-1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        return JsonResponse({'status': 'error', 'message': f'허용되지 않는 확장자입니다: {ext}'}, status=400)
+
+    try:
+        intent = direct_upload.create_upload_intent(
+            request,
+            filename=data.get('filename'),
+            content_type=data.get('content_type'),
+            size=data.get('size'),
+            sha256=data.get('sha256'),
+            allowed_mime_types=ALLOWED_MIME_TYPES,
+            max_size=MAX_FILE_SIZE_MB * 1024 * 1024,
+        )
+    except direct_upload.DirectUploadError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    if intent['exists']:
+        payload = _direct_upload_payload(intent['blob'])
+        payload['upload_required'] = False
+        return JsonResponse(payload)
+    return JsonResponse({'status': 'pending', 'upload_required': True, 'upload': intent['upload']})
+
+
+@csrf_exempt
+@require_http_methods(["PUT"])
+def receive_direct_upload(request, token):
+    """S3가 아닌 저장소(로컬 개발)에서 presigned PUT을 대신 받는 엔드포인트"""
+    if direct_upload.is_s3_storage():
+        return JsonResponse({'status': 'error', 'message': '오브젝트 스토리지로 직접 업로드해야 합니다.'}, status=400)
+    try:
+        direct_upload.receive_local_put(token, request)
+    except direct_upload.DirectUploadError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return HttpResponse(status=200)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def complete_direct_upload(request):
+    """직접 업로드 완료 콜백: 업로드된 객체를 검증/등록하고 파일 URL 반환"""
+    try:
+        data = json.loads(request.body or b'{}')
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'status': 'error', 'message': '잘못된 요청 형식입니다.'}, status=400)
+    try:
+        blob, _ = direct_upload.complete_upload(data.get('token', ''), ALLOWED_MIME_TYPES)
+    except direct_upload.DirectUploadError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse(_direct_upload_payload(blob))
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def user_info(request):
@@ -275,12 +402,13 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         # 인증되지 않은 사용자는 공개방만 볼 수 있음
         if user.is_authenticated:
             # 공개방은 모두, 비공개방은 참여자만
-            return ChatRoom.objects.filter(
+            # 삭제 처리 중인 방(is_active=False)은 숨김
+            return ChatRoom.objects.filter(is_active=True).filter(
                 models.Q(is_public=True) | models.Q(chatroomparticipant__user=user)
             ).distinct()
         else:
             # 인증되지 않은 사용자는 공개방만
-            return ChatRoom.objects.filter(is_public=True)
+            return ChatRoom.objects.filter(is_public=True, is_active=True)
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -296,7 +424,7 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def public(self, request):
         """전체 공개방 목록"""
-        queryset = ChatRoom.objects.filter(is_public=True).order_by('-created_at')
+        queryset = ChatRoom.objects.filter(is_public=True, is_active=True).order_by('-created_at')
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -474,9 +602,9 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         except Exception as e:
             print(f"WebSocket 알림 실패: {e}")
         
-        # 대화방 삭제
-        room.delete()
-        return Response({'deleted': True, 'room_id': room.id})
+        # 바로 숨기고 메시지/첨부 참조 등은 백그라운드 작업으로 배치 삭제
+        job = admin_jobs.soft_delete_rooms([room.id], request.user)
+        return Response({'deleted': True, 'room_id': room.id, 'job_id': job.id})
 
     @action(detail=True, methods=['post'])
     def favorite(self, request, pk=None):
@@ -498,7 +626,7 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         if not user.is_authenticated:
             return Response({'error': '로그인이 필요합니다.'}, status=401)
         
-        rooms = ChatRoom.objects.filter(favorite_users=user)
+        rooms = ChatRoom.objects.filter(favorite_users=user, is_active=True)
         page = self.paginate_queryset(rooms)
         if page is not None:
             serializer = self.get_serializer(page, many=True, context={'request': request})
@@ -519,7 +647,7 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         except User.DoesNotExist:
             return Response({'error': '상대 유저가 존재하지 않습니다.'}, status=404)
         # 기존 1:1 방이 있으면 반환
-        room = ChatRoom.objects.filter(room_type='user', participants=user1).filter(participants=user2).first()
+        room = ChatRoom.objects.filter(room_type='user', is_active=True, participants=user1).filter(participants=user2).first()
         if not room:
             room = ChatRoom.create_user_chat_room(user1, user2)
         serializer = self.get_serializer(room, context={'request': request})
@@ -617,7 +745,10 @@ class ChatViewSet(viewsets.ModelViewSet):
         
         # 메시지 삭제
         message_id = message.id
-        message.delete()
+        with transaction.atomic():
+            release_chat_media(Chat.objects.filter(id=message_id))
+            admin_stats.subtract_deleted_rows(Chat.objects.filter(id=message_id))
+            message.delete()
         
         return Response({'status': 'deleted', 'message_id': message_id})
 
@@ -634,10 +765,11 @@ class ChatViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         # sender 필드가 없으므로, username과 user_id만 설정
-        serializer.save(
+        message = serializer.save(
             username=self.request.user.username,
             user_id=self.request.user.id
         )
+        acquire_message_media(message.attach_image, message.imageUrls)
         
     @action(detail=False, methods=['get'])
     def offset(self, request):
@@ -753,7 +885,8 @@ class ChatViewSet(viewsets.ModelViewSet):
                 
                 message_list.append(message_data)
                 
-            
+            # 목록에는 썸네일을 참조하도록 변환본 정보 추가 (쿼리 1회)
+            attach_image_variants(message_list)
 
             response_data = {
                 'results': message_list,
@@ -832,6 +965,8 @@ class ChatViewSet(viewsets.ModelViewSet):
                 }
                 message_list.append(message_data)
 
+            attach_image_variants(message_list)
+
             # cache.set(cache_key, message_list, 60) # 필요시 캐싱
             return Response({'results': message_list})
 
@@ -1115,43 +1250,26 @@ class UserDeleteView(APIView):
                     'error': '회원탈퇴 확인이 필요합니다. confirmation 필드에 "DELETE_ACCOUNT"를 입력해주세요.'
                 }, status=400)
             
-            # 사용자 관련 데이터 삭제
-            # 1. 사용자 설정 삭제
-            UserSettings.objects.filter(user=user).delete()
-            
-            # 2. 채팅방 참여자 정보 삭제
-            ChatRoomParticipant.objects.filter(user=user).delete()
-            
-            # 3. 사용자가 작성한 채팅 메시지 삭제
-            Chat.objects.filter(sender=user.username).delete()
-            
-            # 4. 사용자가 생성한 채팅방 삭제 (방장인 경우)
-            ChatRoom.objects.filter(creator=user).delete()
-            
-            # 5. 소셜 계정 연결 삭제
-            from allauth.socialaccount.models import SocialAccount
-            SocialAccount.objects.filter(user=user).delete()
-            
-            # 6. 이메일 주소 삭제
-            from allauth.account.models import EmailAddress
-            EmailAddress.objects.filter(user=user).delete()
-            
-            # 7. 사용자 계정 삭제
-            username = user.username  # 삭제 전에 username 저장
-            user.delete()
+            # 계정은 바로 비활성화하고 메시지/참여 정보/설정 등은 백그라운드 작업으로 배치 정리
+            username = user.username
+            job = admin_jobs.purge_users(
+                [user.id], user,
+                messages=getattr(settings, 'USER_PURGE_MESSAGES', 'anonymize'),
+            )
             
-            # 8. 로그아웃 처리
+            # 로그아웃 처리
             django_logout(request)
             
-            # 9. 세션 완전 삭제
+            # 세션 완전 삭제
             if hasattr(request, 'session'):
                 request.session.flush()
                 request.session.delete()
             
-            # 10. 응답에서 세션 쿠키 삭제
+            # 응답에서 세션 쿠키 삭제
             response = Response({
                 'status': 'success',
-                'message': f'사용자 {username}의 계정이 성공적으로 삭제되었습니다.'
+                'message': f'사용자 {username}의 계정이 성공적으로 삭제되었습니다.',
+                'job_id': job.id
             })
             response.delete_cookie('sessionid')
             response.delete_cookie('csrftoken')
@@ -1276,7 +1394,7 @@ class UserChatCreateAPIView(APIView):
             return Response({'error': '상대 유저가 존재하지 않습니다.'}, status=404)
 
         # 기존 방이 있는지 확인
-        room = ChatRoom.objects.filter(room_type='user', participants=user1).filter(participants=user2).first()
+        room = ChatRoom.objects.filter(room_type='user', is_active=True, participants=user1).filter(participants=user2).first()
         if not room:
             room = ChatRoom.create_user_chat_room(user1, user2)
 
@@ -1303,7 +1421,7 @@ class NotificationReadViewSet(viewsets.ModelViewSet):
         read_message_ids = read_qs.values_list('message_id', flat=True)
         # 예시: 즐겨찾기 방의 최신 메시지 중 읽지 않은 것만 반환
         from .models import ChatRoom, Chat
-        favorite_rooms = ChatRoom.objects.filter(favorite_users=request.user)
+        favorite_rooms = ChatRoom.objects.filter(favorite_users=request.user, is_active=True)
         unread = []
         for room in favorite_rooms:
             latest = Chat.objects.filter(room=room).order_by('-timestamp').first()
@@ -1321,21 +1439,135 @@ class NotificationReadViewSet(viewsets.ModelViewSet):
 from django.core.files.storage import default_storage
 from django.http import JsonResponse
 
+FILE_EXISTS_MAX_PATHS = 100
+MEDIA_LIST_DEFAULT_PAGE_SIZE = 100
+MEDIA_LIST_MAX_PAGE_SIZE = 500
+
+
+def _requested_paths(request):
+    """?paths=a&paths=b, ?paths=a,b 또는 POST JSON {"paths": [...]}"""
+    if request.method == 'POST':
+        try:
+            paths = json.loads(request.body or b'{}').get('paths') or []
+        except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+            return None
+        return [p for p in paths if isinstance(p, str)]
+    paths = []
+    for value in request.GET.getlist('paths'):
+        paths.extend(p for p in value.split(',') if p)
+    return paths
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
 def file_exists(request):
-    rel_path = request.GET.get("path", "").lstrip("/")
-    abs_path_media = os.path.join(settings.MEDIA_ROOT, rel_path)
-    abs_path_static = os.path.join(settings.STATIC_ROOT, rel_path)
-    exists = os.path.exists(abs_path_media) or os.path.exists(abs_path_static)    
-    return JsonResponse({ "exists": exists })
+    """파일 존재 여부 (미디어 색인 + STATIC_ROOT, 메모리 에셋 색인에서 조회)
+
+    - ?path=x → {"exists": bool} (기존 형식)
+    - ?paths=a,b 또는 POST {"paths": [...]} → {"results": {경로: bool}} (한 번에 최대 FILE_EXISTS_MAX_PATHS개)
+    """
+    if request.method == 'GET' and 'path' in request.GET:
+        rel_path = media_index.normalize_path(request.GET.get("path", ""))
+        exists = bool(rel_path) and asset_index.lookup([rel_path])[rel_path] is not None
+        return JsonResponse({ "exists": exists })
+
+    paths = _requested_paths(request)
+    if paths is None:
+        return JsonResponse({'status': 'error', 'message': '잘못된 요청 형식입니다.'}, status=400)
+    if len(paths) > FILE_EXISTS_MAX_PATHS:
+        return JsonResponse({'status': 'error', 'message': f'한 번에 최대 {FILE_EXISTS_MAX_PATHS}개 경로만 조회할 수 있습니다.'}, status=400)
+
+    normalized = {path: media_index.normalize_path(path) for path in paths}
+    entries = asset_index.lookup(normalized.values())
+    return JsonResponse({"results": {
+        path: entries.get(rel_path) is not None
+        for path, rel_path in normalized.items()
+    }})
 
-# 미디어 파일 목록 조회
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+def assets_exist(request):
+    """에셋 배치 존재 확인: 경로별 존재 여부, 크기, ETag
+
+    ?paths=a,b 또는 POST {"paths": [...]} (최대 ASSET_EXISTS_MAX_PATHS개)
+    → {"results": {경로: {"exists": bool, "size": int|null, "etag": str|null}}}
+    """
+    paths = _requested_paths(request)
+    if paths is None:
+        return JsonResponse({'status': 'error', 'message': '잘못된 요청 형식입니다.'}, status=400)
+    max_paths = int(getattr(settings, 'ASSET_EXISTS_MAX_PATHS', 200))
+    if len(paths) > max_paths:
+        return JsonResponse({'status': 'error', 'message': f'한 번에 최대 {max_paths}개 경로만 조회할 수 있습니다.'}, status=400)
+
+    normalized = {path: media_index.normalize_path(path) for path in paths}
+    entries = asset_index.lookup(normalized.values())
+    results = {}
+    for path, rel_path in normalized.items():
+        entry = entries.get(rel_path)
+        results[path] = {
+            'exists': entry is not None,
+            'size': entry['size'] if entry else None,
+            'etag': entry['etag'] if entry else None,
+        }
+    return JsonResponse({"results": results})
+
+
+# 미디어 파일 목록 조회 (색인 테이블, page를 주면 페이지 단위)
+@require_http_methods(["GET"])
 def list_media_files(request):
-    file_list = []
-    for root, dirs, files in os.walk(settings.MEDIA_ROOT):
-        for name in files:
-            rel_path = os.path.relpath(os.path.join(root, name), settings.MEDIA_ROOT)            
-            file_list.append(rel_path)    
-    return JsonResponse({"files": file_list})
+    """?page=&page_size=&prefix=&q=&ext=&modified_after=&ordering=(path|-path|mtime|-mtime|size|-size)
+
+    page를 주지 않으면 기존 형식대로 조건에 맞는 전체 경로 목록({"files": [...]})을 반환한다.
+    """
+    paginate = 'page' in request.GET
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+        page_size = min(MEDIA_LIST_MAX_PAGE_SIZE, max(1, int(request.GET.get('page_size', MEDIA_LIST_DEFAULT_PAGE_SIZE))))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'page/page_size는 숫자여야 합니다.'}, status=400)
+
+    qs = MediaIndexEntry.objects.all()
+    prefix = media_index.normalize_path(request.GET.get('prefix', ''))
+    if prefix:
+        qs = qs.filter(path__startswith=prefix)
+    if request.GET.get('q'):
+        qs = qs.filter(path__icontains=request.GET['q'])
+    if request.GET.get('ext'):
+        qs = qs.filter(path__iendswith='.' + request.GET['ext'].lstrip('.'))
+    if request.GET.get('modified_after'):
+        from django.utils.dateparse import parse_datetime
+        modified_after = parse_datetime(request.GET['modified_after'])
+        if modified_after is None:
+            return JsonResponse({'status': 'error', 'message': 'modified_after는 ISO 8601 형식이어야 합니다.'}, status=400)
+        qs = qs.filter(mtime__gte=modified_after)
+    ordering = request.GET.get('ordering', 'path')
+    if ordering.lstrip('-') not in ('path', 'mtime', 'size'):
+        ordering = 'path'
+    qs = qs.order_by(ordering, 'id')
+    if not paginate:
+        return JsonResponse({"files": list(qs.values_list('path', flat=True))})
+
+    offset = (page - 1) * page_size
+    # 다음 페이지 존재 여부는 1건 더 읽어서 판단 (전체 COUNT 없이)
+    rows = list(qs.values('path', 'size', 'sha256', 'mtime')[offset:offset + page_size + 1])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    return JsonResponse({
+        "files": [row['path'] for row in rows],
+        "results": [
+            {
+                'path': row['path'],
+                'size': row['size'],
+                'sha256': row['sha256'] or None,
+                'modified_at': row['mtime'].isoformat() if row['mtime'] else None,
+            }
+            for row in rows
+        ],
+        "page": page,
+        "page_size": page_size,
+        "has_next": has_next,
+    })
 
 
 @csrf_exempt
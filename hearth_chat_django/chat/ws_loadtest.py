@@ -0,0 +1,288 @@
+"""WebSocket 채팅 경로 부하 테스트
+
+실제 ChatConsumer(가짜 AI 제공자만 교체)를 URLRouter로 프로세스 안에서 띄우고 asgiref
+ApplicationCommunicator 클라이언트 수천 개를 연결해 메시지를 보낸다. 네트워크/서버 프로세스 없이
+컨슈머 → 채널 레이어(InMemoryChannelLayer 또는 Redis) → 그룹 전달 경로만 측정한다.
+
+- 전달 지연: 클라이언트가 보낸 시각 → 같은 방의 각 소켓(보낸 사람 포함)이 user_message를 받은 시각
+- 처리량: 초당 보낸 메시지 수 / 초당 전달 수
+- 연결당 메모리: 연결 전후 프로세스 RSS 차이 / 연결 수 (클라이언트 객체도 같은 프로세스라 포함됨)
+- 서버 단계별 시간: chat/metrics.py ws_stage_duration_seconds 의 실행 전후 차이 (평균)
+
+InMemoryChannelLayer는 receive마다 모든 채널의 만료 메시지를 훑으므로 연결이 수천 개면 레이어 자체가 병목이 된다.
+운영과 비슷한 수치가 필요하면 로컬 Redis(--redis)로 측정할 것.
+
+결과는 JSON으로 저장해 compare_reports()로 이전 결과와 비교한다. 관리 명령: loadtest_websocket
+"""
+import asyncio
+import gc
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+from channels.layers import channel_layers
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.urls import re_path
+
+from . import metrics
+from .ai_scheduler import ai_scheduler
+from .consumers import ChatConsumer
+
+MESSAGE_PREFIX = 'loadtest'
+# 비교할 지표 → 값이 커지면 나빠지는지
+COMPARED_METRICS = {
+    ('delivery_latency_ms', 'p50'): True,
+    ('delivery_latency_ms', 'p95'): True,
+    ('delivery_latency_ms', 'p99'): True,
+    ('throughput', 'messages_per_second'): False,
+    ('throughput', 'deliveries_per_second'): False,
+    ('memory', 'rss_per_connection_kb'): True,
+}
+
+
+class FakeAIConsumer(ChatConsumer):
+    """AI 제공자 호출 대신 설정한 지연 후 고정 응답을 돌려주는 ChatConsumer"""
+
+    def __init__(self, *args, ai_latency=0.5, ai_jitter=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ai_latency = ai_latency
+        self.ai_jitter = ai_jitter
+
+    async def get_ai_response(self, user_message, user_emotion="neutral", image_urls=None, documents=None,
+                              room_id=None, session_id=None, client_ai_settings=None, ticket=None, room_level=False):
+        if ticket is not None and not ticket.start_call():
+            raise asyncio.CancelledError()
+        delay = self.ai_latency + random.uniform(-self.ai_jitter, self.ai_jitter)
+        await asyncio.sleep(max(delay, 0))
+        return {
+            'response': f'{MESSAGE_PREFIX} reply ({len(user_message or "")})',
+            'provider': 'loadtest',
+            'ai_name': 'LoadTest AI',
+            'ai_type': 'loadtest',
+        }
+
+
+class _ScopeUserMiddleware:
+    """쿼리 문자열 ?u=<번호> 로 미리 불러 둔 사용자를 scope['user']에 넣음 (세션 쿠키 조회 대신)"""
+
+    def __init__(self, app, users):
+        self.app = app
+        self.users = users
+
+    async def __call__(self, scope, receive, send):
+        index = int(scope.get('query_string', b'').decode().partition('u=')[2] or 0)
+        return await self.app(dict(scope, user=self.users[index]), receive, send)
+
+
+def build_application(users, ai_latency=0.5, ai_jitter=0.0):
+    consumer = FakeAIConsumer.as_asgi(ai_latency=ai_latency, ai_jitter=ai_jitter)
+    return _ScopeUserMiddleware(URLRouter([
+        re_path(r'^ws/chat/$', consumer),
+        re_path(r'^ws/chat/(?P<room_id>\d+)/$', consumer),
+    ]), users)
+
+
+def make_channel_layer(redis_url=None, capacity=1000):
+    if redis_url:
+        from channels_redis.core import RedisChannelLayer
+        return RedisChannelLayer(hosts=[redis_url], capacity=capacity)
+    from channels.layers import InMemoryChannelLayer
+    return InMemoryChannelLayer(capacity=capacity)
+
+
+def current_rss_bytes():
+    """현재 RSS (Linux /proc), 없으면 최대 RSS"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def _stage_snapshot():
+    stages = ('parse', 'settings', 'save_user_message', 'group_send', 'ai_response', 'ai_save', 'broadcast')
+    snapshot = {stage: metrics.ws_stage_duration.snapshot(stage=stage) for stage in stages}
+    snapshot['ai_time_to_first_byte'] = metrics.ai_time_to_first_byte.snapshot()
+    return snapshot
+
+
+def _stage_means(before, after):
+    means = {}
+    for name, end in after.items():
+        count = end['count'] - before[name]['count']
+        if count:
+            means[name] = {'count': count, 'mean_ms': round((end['sum'] - before[name]['sum']) / count * 1000, 3)}
+    return means
+
+
+class _Client:
+    def __init__(self, index, room_id, communicator):
+        self.index = index
+        self.room_id = room_id
+        self.communicator = communicator
+        self.reader = None
+
+
+class LoadTest:
+    """clients개 소켓을 rooms개 방에 나눠 연결하고 소켓마다 messages개씩 interval 간격으로 전송"""
+
+    def __init__(self, users, room_ids, messages=5, interval=1.0, ai_latency=0.5, ai_jitter=0.0,
+                 connect_concurrency=200, drain_timeout=60.0, layer=None, progress=None):
+        self.users = users
+        self.room_ids = room_ids
+        self.messages = messages
+        self.interval = interval
+        self.connect_concurrency = connect_concurrency
+        self.drain_timeout = drain_timeout
+        self.layer = layer
+        self.progress = progress or (lambda message: None)
+        self.application = build_application(users, ai_latency, ai_jitter)
+
+        self.sent_at = {}  # (클라이언트 번호, 순번) → 전송 시각
+        self.room_members = {}  # 방 ID → 연결된 소켓 수
+        self.latencies = []
+        self.expected = 0
+        self.ai_messages = set()
+        self.errors = 0
+        self._all_delivered = None
+
+    async def _read(self, client):
+        while True:
+            output = await client.communicator.output_queue.get()
+            now = time.perf_counter()
+            if output.get('type') != 'websocket.send' or not output.get('text'):
+                continue
+            data = json.loads(output['text'])
+            if data.get('type') == 'user_message':
+                parts = (data.get('message') or '').split(' ')
+                if len(parts) == 3 and parts[0] == MESSAGE_PREFIX:
+                    sent = self.sent_at.get((int(parts[1]), int(parts[2])))
+                    if sent is not None:
+                        self.latencies.append(now - sent)
+                        if len(self.latencies) >= self.expected:
+                            self._all_delivered.set()
+            elif data.get('type') == 'ai_message':
+                self.ai_messages.add((data.get('roomId'), data.get('timestamp')))
+
+    async def _connect(self, index, semaphore):
+        room_id = self.room_ids[index % len(self.room_ids)]
+        communicator = WebsocketCommunicator(self.application, f'/ws/chat/{room_id}/?u={index}')
+        async with semaphore:
+            connected, _ = await communicator.connect(timeout=30)
+            if not connected:
+                self.errors += 1
+                return None
+            # 경로 기반 자동 입장 확인 (join_ack)
+            await communicator.receive_json_from(timeout=30)
+        self.room_members[room_id] = self.room_members.get(room_id, 0) + 1
+        client = _Client(index, room_id, communicator)
+        client.reader = asyncio.ensure_future(self._read(client))
+        return client
+
+    async def _send_messages(self, client):
+        await asyncio.sleep(random.uniform(0, self.interval))
+        for seq in range(self.messages):
+            self.sent_at[(client.index, seq)] = time.perf_counter()
+            await client.communicator.send_json_to({
+                'message': f'{MESSAGE_PREFIX} {client.index} {seq}',
+                'roomId': client.room_id,
+            })
+            await asyncio.sleep(self.interval)
+
+    async def _wait_idle(self, deadline):
+        """모든 전달과 AI 작업이 끝날 때까지 (deadline까지) 대기"""
+        try:
+            await asyncio.wait_for(self._all_delivered.wait(), max(deadline - time.perf_counter(), 0))
+        except asyncio.TimeoutError:
+            pass
+        while ai_scheduler.task_counts() != (0, 0) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+
+    async def run(self):
+        old_layer = channel_layers.set('default', self.layer) if self.layer is not None else None
+        self._all_delivered = asyncio.Event()
+        stages_before = _stage_snapshot()
+        try:
+            gc.collect()
+            rss_before = current_rss_bytes()
+            semaphore = asyncio.Semaphore(self.connect_concurrency)
+            started = time.perf_counter()
+            clients = [c for c in await asyncio.gather(
+                *(self._connect(i, semaphore) for i in range(len(self.users)))) if c]
+            connect_seconds = time.perf_counter() - started
+            gc.collect()
+            rss_after = current_rss_bytes()
+            self.progress(f'연결 {len(clients):,}개: {connect_seconds:.2f}초')
+
+            self.expected = sum(self.room_members[c.room_id] for c in clients) * self.messages
+            if not self.expected:
+                self._all_delivered.set()
+            started = time.perf_counter()
+            await asyncio.gather(*(self._send_messages(c) for c in clients))
+            send_seconds = time.perf_counter() - started
+            await self._wait_idle(time.perf_counter() + self.drain_timeout)
+            total_seconds = time.perf_counter() - started
+            self.progress(f'전송 {len(self.sent_at):,}건: {send_seconds:.2f}초, 전달 {len(self.latencies):,}/{self.expected:,}건')
+
+            for client in clients:
+                client.reader.cancel()
+            semaphore = asyncio.Semaphore(self.connect_concurrency)
+
+            async def disconnect(client):
+                async with semaphore:
+                    await client.communicator.disconnect(timeout=30)
+
+            await asyncio.gather(*(disconnect(c) for c in clients), return_exceptions=True)
+        finally:
+            if self.layer is not None:
+                channel_layers.set('default', old_layer)
+
+        latencies = sorted(self.latencies)
+        return {
+            'clients': len(clients),
+            'connect_errors': self.errors,
+            'rooms': len(self.room_ids),
+            'messages_sent': len(self.sent_at),
+            'deliveries': {'expected': self.expected, 'received': len(latencies),
+                           'lost': max(self.expected - len(latencies), 0)},
+            'delivery_latency_ms': {
+                name: round(percentile(latencies, fraction) * 1000, 3) if latencies else None
+                for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))
+            },
+            'throughput': {
+                'messages_per_second': round(len(self.sent_at) / send_seconds, 1) if send_seconds else None,
+                'deliveries_per_second': round(len(latencies) / total_seconds, 1) if total_seconds else None,
+            },
+            'connect_seconds': round(connect_seconds, 3),
+            'ai_replies': len(self.ai_messages),
+            'memory': {
+                'rss_before_mb': round(rss_before / 2 ** 20, 1),
+                'rss_connected_mb': round(rss_after / 2 ** 20, 1),
+                'rss_per_connection_kb': round((rss_after - rss_before) / max(len(clients), 1) / 1024, 2),
+            },
+            'server_stages': _stage_means(stages_before, _stage_snapshot()),
+        }
+
+
+def compare_reports(report, baseline):
+    """[(지표 이름, 기준값, 현재값, 악화율 %)] (악화율이 음수면 개선)"""
+    rows = []
+    for (section, key), higher_is_worse in COMPARED_METRICS.items():
+        base = (baseline.get(section) or {}).get(key)
+        current = (report.get(section) or {}).get(key)
+        if not base or current is None:
+            continue
+        change = (current - base) / base * 100
+        rows.append((f'{section}.{key}', base, current, round(change if higher_is_worse else -change, 1)))
+    return rows
@@ -1,6 +1,7 @@
 
 from pathlib import Path
 import os
+import json
 import socket
 from urllib.parse import urlparse
 from dotenv import load_dotenv
@@ -346,6 +347,92 @@ except Exception as _db_opt_e:
 # Gemini API 키
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
 
+# 방 단위 AI 스케줄러 (chat/ai_scheduler.py)
+# - 디바운스 시간 안에 들어온 메시지는 하나의 프롬프트로 묶어 AI를 한 번만 호출
+# - 방마다 동시에 진행 가능한 AI 호출 수 제한
+# - 메시지가 계속 들어와도 가장 오래된 메시지는 최대 지연 시간 안에 AI 호출 (디바운스/대체 상한)
+AI_COALESCE_DEBOUNCE_SECONDS = float(os.getenv("AI_COALESCE_DEBOUNCE_SECONDS", "0.6"))
+AI_COALESCE_MAX_BATCH = int(os.getenv("AI_COALESCE_MAX_BATCH", "10"))
+AI_COALESCE_MAX_DEFER_SECONDS = float(os.getenv("AI_COALESCE_MAX_DEFER_SECONDS", "5"))
+AI_ROOM_MAX_IN_FLIGHT = int(os.getenv("AI_ROOM_MAX_IN_FLIGHT", "1"))
+
+# AI 제공자/모델별 토큰 버킷 (chat/ai_ratelimit.py)
+# 예: AI_RATE_LIMITS='{"gemini": {"rate_per_minute": 60, "burst": 10}, "gemini:gemini-1.5-pro": {"rate_per_minute": 2, "burst": 1}}'
+try:
+    AI_RATE_LIMITS = json.loads(os.getenv("AI_RATE_LIMITS", "{}"))
+except ValueError:
+    AI_RATE_LIMITS = {}
+# 대기열에서 차례를 기다리는 최대 시간(초). 넘으면 안내 메시지로 응답
+AI_RATE_LIMIT_MAX_WAIT = float(os.getenv("AI_RATE_LIMIT_MAX_WAIT", "60"))
+
+# AI 제공자 서킷 브레이커 (chat/ai_circuit.py, Lily는 기본으로 30초 넘게 걸린 응답도 실패로 집계)
+# 예: AI_CIRCUIT_BREAKER='{"failure_threshold": 3, "recovery_timeout": 30, "lily": {"slow_call_seconds": 120}}'
+try:
+    AI_CIRCUIT_BREAKER = json.loads(os.getenv("AI_CIRCUIT_BREAKER", "{}"))
+except ValueError:
+    AI_CIRCUIT_BREAKER = {}
+# 제공자 장애 시 순서대로 시도할 폴백 제공자. 예: AI_PROVIDER_FALLBACKS='{"lily": ["gemini"]}'
+try:
+    AI_PROVIDER_FALLBACKS = json.loads(os.getenv("AI_PROVIDER_FALLBACKS", "{}"))
+except ValueError:
+    AI_PROVIDER_FALLBACKS = {}
+# 제공자별 (연결, 응답) 타임아웃(초, 기본 lily 5/60). 예: AI_PROVIDER_TIMEOUTS='{"lily": [5, 45]}'
+try:
+    AI_PROVIDER_TIMEOUTS = json.loads(os.getenv("AI_PROVIDER_TIMEOUTS", "{}"))
+except ValueError:
+    AI_PROVIDER_TIMEOUTS = {}
+
+# AI 응답 캐시 (chat/ai_cache.py). 방별 사용 여부는 ChatRoom.ai_response_cache_enabled
+AI_RESPONSE_CACHE_ENABLED = os.getenv("AI_RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+AI_RESPONSE_CACHE_TTL = float(os.getenv("AI_RESPONSE_CACHE_TTL", "600"))
+AI_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("AI_RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+
+# 비전 모델 전송 전 이미지 축소 기준 (짧은 변 픽셀, 0이면 축소하지 않음)
+AI_IMAGE_SHORT_SIDE_LIMIT = int(os.getenv("AI_IMAGE_SHORT_SIDE_LIMIT", "128"))
+# 저장소에 없는 이미지를 HTTP로 가져올 수 있는 외부 호스트 (쉼표 구분, 절대 URL MEDIA_URL 호스트는 자동 허용)
+AI_IMAGE_FETCH_ALLOWED_HOSTS = [h.strip() for h in os.getenv("AI_IMAGE_FETCH_ALLOWED_HOSTS", "").split(",") if h.strip()]
+AI_IMAGE_FETCH_MAX_BYTES = int(os.getenv("AI_IMAGE_FETCH_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# 직접 업로드(presigned PUT) 유효 시간 (초, chat/direct_upload.py)
+CHAT_UPLOAD_INTENT_TTL = int(os.getenv("CHAT_UPLOAD_INTENT_TTL", "900"))
+
+# 에셋 존재 확인 메모리 색인 (chat/asset_index.py)
+ASSET_EXISTS_MAX_PATHS = int(os.getenv("ASSET_EXISTS_MAX_PATHS", "200"))
+ASSET_INDEX_STATIC_TTL = float(os.getenv("ASSET_INDEX_STATIC_TTL", "300"))
+ASSET_INDEX_MAX_MEDIA_ENTRIES = int(os.getenv("ASSET_INDEX_MAX_MEDIA_ENTRIES", "50000"))
+
+# 관리자 통계 일별 집계 (chat/admin_stats.py, manage.py refresh_admin_stats)
+ADMIN_STATS_BATCH_SIZE = int(os.getenv("ADMIN_STATS_BATCH_SIZE", "50000"))
+ADMIN_STATS_LAG_SECONDS = float(os.getenv("ADMIN_STATS_LAG_SECONDS", "30"))
+ADMIN_STATS_REFRESH_INTERVAL = float(os.getenv("ADMIN_STATS_REFRESH_INTERVAL", "60"))
+
+# 관리자 대량 작업 백그라운드 실행 (chat/admin_jobs.py, manage.py run_admin_jobs)
+ADMIN_JOB_WORKERS = int(os.getenv("ADMIN_JOB_WORKERS", "2"))
+ADMIN_JOB_BATCH_SIZE = int(os.getenv("ADMIN_JOB_BATCH_SIZE", "1000"))
+ADMIN_JOB_STALE_SECONDS = float(os.getenv("ADMIN_JOB_STALE_SECONDS", "300"))
+# 회원 탈퇴 시 작성한 메시지 처리: anonymize(작성자 정보만 제거, 대화 내용 유지) | delete
+USER_PURGE_MESSAGES = os.getenv("USER_PURGE_MESSAGES", "anonymize")
+
+# 관리자 목록 API 개수 계산 (chat/admin_pagination.py)
+# 필터 없는 목록은 이 행 수를 넘으면 DB 통계 추정치 사용, 필터가 있으면 ADMIN_COUNT_CAP까지만 셈
+ADMIN_EXACT_COUNT_THRESHOLD = int(os.getenv("ADMIN_EXACT_COUNT_THRESHOLD", "10000"))
+ADMIN_COUNT_CAP = int(os.getenv("ADMIN_COUNT_CAP", "10000"))
+# 관리자 검색 인덱스 후보가 이보다 많으면(흔한 검색어) 인덱스 대신 정렬 순서대로 icontains (chat/admin_search.py)
+ADMIN_SEARCH_MAX_CANDIDATES = int(os.getenv("ADMIN_SEARCH_MAX_CANDIDATES", "5000"))
+
+# Prometheus 메트릭 (/metrics, chat/metrics.py)
+# Authorization: Bearer <METRICS_AUTH_TOKEN> 또는 관리자 세션만 조회 가능
+# METRICS_ALLOW_LOCALHOST=true 이면 127.0.0.1/::1 요청도 허용 (같은 호스트의 리버스 프록시 뒤에서는 켜지 말 것)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_AUTH_TOKEN = os.getenv("METRICS_AUTH_TOKEN", "")
+METRICS_ALLOW_LOCALHOST = os.getenv("METRICS_ALLOW_LOCALHOST", "false").lower() == "true"
+# 요청/WebSocket 메시지별 쿼리 계측 (chat/query_stats.py)
+# 같은 SQL이 이 횟수 이상 반복되면 N+1 의심 경고, 샘플링된 요청만 SQL 문자열을 로그에 남김 (0~1)
+QUERY_STATS_DUPLICATE_THRESHOLD = int(os.getenv("QUERY_STATS_DUPLICATE_THRESHOLD", "5"))
+QUERY_STATS_SAMPLE_RATE = float(os.getenv("QUERY_STATS_SAMPLE_RATE", "0"))
+# chat 앱 로그 레벨 (WebSocket 메시지별 상세 로그는 DEBUG)
+CHAT_LOG_LEVEL = os.getenv("CHAT_LOG_LEVEL", "INFO").upper()
+
 # Application definition
 INSTALLED_APPS = [
     "daphne",
@@ -707,6 +794,8 @@ SOCIALACCOUNT_PROVIDERS = {
 }
 
 MIDDLEWARE = [
+    # 요청 메트릭 (가장 바깥에서 전체 처리 시간 측정)
+    *(["chat.middleware.PerformanceMonitoringMiddleware"] if METRICS_ENABLED else []),
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -846,6 +935,8 @@ if IS_PRODUCTION:
     # AWS_S3_REGION_NAME = os.environ.get('AWS_S3_REGION_NAME', 'ap-northeast-2')
     # AWS_DEFAULT_ACL = None
     # AWS_S3_OBJECT_PARAMETERS = {'CacheControl': 'max-age=86400'}
+    # MinIO 사용 시: AWS_S3_ENDPOINT_URL = os.environ.get('AWS_S3_ENDPOINT_URL')  # 예: http://minio:9000
+    # S3 저장소에서는 직접 업로드(upload_intent/) 시 presigned PUT URL을 발급, 그 외에는 로컬 PUT 엔드포인트 사용
 else:
     # 로컬 개발 환경
     MEDIA_ROOT = os.path.abspath(os.path.join(BASE_DIR, '..', 'hearth_chat_media'))
@@ -907,6 +998,11 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': True,
         },
+        'chat': {
+            'handlers': ['console', 'file'],
+            'level': CHAT_LOG_LEVEL,
+            'propagate': False,
+        },
     },
 }
 
@@ -920,6 +1016,7 @@ if IS_CLOUDTYPE_DEPLOY:
         # LOGGING['loggers']['django']['handlers'] = ['console']
         # LOGGING['loggers']['allauth']['handlers'] = ['console']
         # LOGGING['loggers']['hearth_chat.adapters']['handlers'] = ['console']
+        # LOGGING['loggers']['chat']['handlers'] = ['console']
         print('✅ Cloudtype 환경 - 로그 파일을 /tmp 경로로 설정')
     except Exception:
         pass
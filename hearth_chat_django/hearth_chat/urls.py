@@ -8,6 +8,7 @@ from django.http import HttpResponse
 from django.views.static import serve
 import os
 
+from chat.metrics import metrics_view
 from .views import (
     social_connections_api, social_login_redirect_view, get_csrf_token, 
     google_login_redirect, google_login_callback, kakao_login_redirect, kakao_login_callback, 
@@ -23,6 +24,7 @@ urlpatterns = [
     path('api/chat/', include('chat.urls')),
     path('api/admin/', include('chat.admin_urls')),
     path('health/', lambda r: HttpResponse(b"OK", content_type="text/plain"), name="health_check"),
+    path('metrics', metrics_view, name="metrics"),
     path("api/social-connections/", social_connections_api, name="social_connections_api"),
     path("social-redirect/", social_login_redirect_view, name='social_login_redirect'),
     path("api/csrf/", get_csrf_token, name="get_csrf_token"),
@@ -15,8 +15,9 @@ const AdminDashboard = () => {
     const [error, setError] = useState(null);
     const [selectedItems, setSelectedItems] = useState([]);
     const [searchTerm, setSearchTerm] = useState('');
-    const [currentPage, setCurrentPage] = useState(1);
-    const [totalPages, setTotalPages] = useState(1);
+    // 목록별 커서 페이지네이션 상태 (현재 커서, 응답의 next/previous 커서)
+    const [pageCursors, setPageCursors] = useState({ users: null, rooms: null, messages: null });
+    const [pageLinks, setPageLinks] = useState({});
     const [defaultMaxMembers, setDefaultMaxMembers] = useState(4);
     const [showCreateRoomModal, setShowCreateRoomModal] = useState(false);
     const [filterValue, setFilterValue] = useState('');
@@ -65,47 +66,43 @@ const AdminDashboard = () => {
         }
     };
 
-    // 유저 목록 로드
-    const loadUsers = async (page = 1, search = '') => {
+    // next/previous 링크에서 cursor 값만 꺼냄 (링크의 호스트는 API_BASE와 다를 수 있음)
+    const cursorFromLink = (link) => (
+        link ? new URL(link, window.location.origin).searchParams.get('cursor') : null
+    );
+
+    // 관리자 목록 로드 (서버 기본값인 커서 페이지네이션, 깊은 페이지도 인덱스 범위 조회)
+    const loadList = async (list, setItems, cursor = null, search = '') => {
         try {
-            const params = { page, page_size: 20 };
+            const params = { page_size: 20 };
+            if (cursor) params.cursor = cursor;
             if (search) params.search = search;
 
-            const data = await fetchData('/users/', params);
-            setUsers(data.results || data);
-            setTotalPages(Math.ceil((data.count || data.length) / 20));
+            const data = await fetchData(`/${list}/`, params);
+            setItems(data.results || data);
+            setPageCursors(prev => ({ ...prev, [list]: cursor }));
+            setPageLinks(prev => ({
+                ...prev,
+                [list]: {
+                    next: cursorFromLink(data.next),
+                    previous: cursorFromLink(data.previous),
+                    count: data.count,
+                    countIsEstimate: data.count_is_estimate,
+                },
+            }));
         } catch (error) {
             setError(error.message);
         }
     };
 
-    // 방 목록 로드
-    const loadRooms = async (page = 1, search = '') => {
-        try {
-            const params = { page, page_size: 20 };
-            if (search) params.search = search;
+    // 유저 목록 로드
+    const loadUsers = (cursor = null, search = '') => loadList('users', setUsers, cursor, search);
 
-            const data = await fetchData('/rooms/', params);
-            setRooms(data.results || data);
-            setTotalPages(Math.ceil((data.count || data.length) / 20));
-        } catch (error) {
-            setError(error.message);
-        }
-    };
+    // 방 목록 로드
+    const loadRooms = (cursor = null, search = '') => loadList('rooms', setRooms, cursor, search);
 
     // 메시지 목록 로드
-    const loadMessages = async (page = 1, search = '') => {
-        try {
-            const params = { page, page_size: 20 };
-            if (search) params.search = search;
-
-            const data = await fetchData('/messages/', params);
-            setMessages(data.results || data);
-            setTotalPages(Math.ceil((data.count || data.length) / 20));
-        } catch (error) {
-            setError(error.message);
-        }
-    };
+    const loadMessages = (cursor = null, search = '') => loadList('messages', setMessages, cursor, search);
 
     // 대량 액션 실행
     const executeBulkAction = async (action, ids) => {
@@ -127,7 +124,12 @@ const AdminDashboard = () => {
             }
 
             const result = await response.json();
-            alert(`${action} 완료: ${result.deleted_count || result.updated_count}개 처리됨`);
+            if (result.status === 'accepted') {
+                // 삭제는 백그라운드 작업으로 처리됨 (진행 상황은 admin_job_progress 이벤트)
+                alert(`${action} 작업 등록: ${result.queued_count}개 (작업 #${result.job.id})`);
+            } else {
+                alert(`${action} 완료: ${result.deleted_count || result.updated_count}개 처리됨`);
+            }
 
             // 데이터 새로고침
             refreshData();
@@ -170,9 +172,9 @@ const AdminDashboard = () => {
 
         Promise.all([
             loadStats(),
-            loadUsers(currentPage, searchTerm),
-            loadRooms(currentPage, searchTerm),
-            loadMessages(currentPage, searchTerm)
+            loadUsers(pageCursors.users, searchTerm),
+            loadRooms(pageCursors.rooms, searchTerm),
+            loadMessages(pageCursors.messages, searchTerm)
         ]).finally(() => setLoading(false));
     };
 
@@ -184,14 +186,41 @@ const AdminDashboard = () => {
     // 검색 처리
     const handleSearch = (e) => {
         e.preventDefault();
-        setCurrentPage(1);
-        refreshData();
+        // 검색 조건이 바뀌면 모든 목록을 첫 페이지부터
+        setLoading(true);
+        setError(null);
+        Promise.all([
+            loadStats(),
+            loadUsers(null, searchTerm),
+            loadRooms(null, searchTerm),
+            loadMessages(null, searchTerm)
+        ]).finally(() => setLoading(false));
     };
 
     // 페이지 변경
-    const handlePageChange = (newPage) => {
-        setCurrentPage(newPage);
-        refreshData();
+    const handlePageChange = (list, cursor) => {
+        const loaders = { users: loadUsers, rooms: loadRooms, messages: loadMessages };
+        loaders[list](cursor, searchTerm);
+    };
+
+    // 이전/다음 페이지 버튼 (커서 페이지네이션이라 페이지 번호 대신 next/previous 링크를 따라감)
+    const renderPagination = (list) => {
+        const links = pageLinks[list] || {};
+        return (
+            <div className="pagination">
+                <button onClick={() => handlePageChange(list, links.previous)} disabled={!links.previous}>
+                    이전
+                </button>
+                {links.count !== undefined && (
+                    <span className="pagination-count">
+                        {links.countIsEstimate ? '약 ' : ''}{links.count}개
+                    </span>
+                )}
+                <button onClick={() => handlePageChange(list, links.next)} disabled={!links.next}>
+                    다음
+                </button>
+            </div>
+        );
     };
 
     // 아이템 선택 토글
@@ -401,17 +430,7 @@ const AdminDashboard = () => {
                     </table>
                 </div>
 
-                <div className="pagination">
-                    {Array.from({ length: totalPages }, (_, i) => i + 1).map(page => (
-                        <button
-                            key={page}
-                            onClick={() => handlePageChange(page)}
-                            className={currentPage === page ? 'active' : ''}
-                        >
-                            {page}
-                        </button>
-                    ))}
-                </div>
+                {renderPagination('users')}
             </div>
         );
     };
@@ -518,17 +537,7 @@ const AdminDashboard = () => {
                 </table>
             </div>
 
-            <div className="pagination">
-                {Array.from({ length: totalPages }, (_, i) => i + 1).map(page => (
-                    <button
-                        key={page}
-                        onClick={() => handlePageChange(page)}
-                        className={currentPage === page ? 'active' : ''}
-                    >
-                        {page}
-                    </button>
-                ))}
-            </div>
+            {renderPagination('rooms')}
         </div>
     );
 
@@ -609,17 +618,7 @@ const AdminDashboard = () => {
                     </table>
                 </div>
 
-                <div className="pagination">
-                    {Array.from({ length: totalPages }, (_, i) => i + 1).map(page => (
-                        <button
-                            key={page}
-                            onClick={() => handlePageChange(page)}
-                            className={currentPage === page ? 'active' : ''}
-                        >
-                            {page}
-                        </button>
-                    ))}
-                </div>
+                {renderPagination('messages')}
             </div>
         );
     };